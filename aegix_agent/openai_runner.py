@@ -1,17 +1,47 @@
 """Minimal example: user prompt -> LLM tool call -> Aegix exec -> final answer."""
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, List, Optional, Tuple
 import json
+import logging
 import os
+import time
+import uuid
 
 from openai import OpenAI
 
-class AegixRuntime:
-    """Placeholder Aegix client; replace with real gateway calls."""
+from aegix.gateway import DEFAULT_ADDRESS, GatewayClient
+
+log = logging.getLogger(__name__)
 
-    def execute(self, command: str) -> dict:
-        print(f"[aegix] executing: {command}")
-        return {"stdout": f"ran: {command}", "stderr": "", "exit_code": 0}
+class AegixRuntime:
+    """
+    Client for a running gateway (`aegix gateway`, or `--backend fake` offline).
+    Connections are pooled and kept alive across calls. AEGIX_GATEWAY overrides
+    the address, e.g. unix:///tmp/aegix.sock.
+    """
+
+    def __init__(self, address: Optional[str] = None, pool_size: int = 8) -> None:
+        self.client = GatewayClient(address or os.getenv("AEGIX_GATEWAY", DEFAULT_ADDRESS), pool_size=pool_size)
+
+    def execute(self, command: str, run_id: Optional[str] = None) -> dict:
+        res = self.client.call("bash", command, run_id=run_id)
+        exec_result = res["exec_result"] or {}
+        out = {
+            "stdout": exec_result.get("stdout", ""),
+            "stderr": exec_result.get("stderr", ""),
+            "exit_code": exec_result.get("exit_code"),
+        }
+        if res["error"]:
+            out["error"] = res["error"]
+        return out
+
+    def cancel(self, run_id: str) -> bool:
+        return self.client.cancel(run_id)
+
+    def close(self) -> None:
+        self.client.close()
 
 
 TOOLS = [
@@ -35,10 +65,89 @@ TOOLS = [
 ]
 
 
+MAX_PARALLEL_TOOL_CALLS = int(os.getenv("AEGIX_MAX_PARALLEL_TOOL_CALLS", "4"))
+TURN_DEADLINE_S = float(os.getenv("AEGIX_TURN_DEADLINE_S", "120"))
+CANCEL_GRACE_S = float(os.getenv("AEGIX_CANCEL_GRACE_S", "5"))  # past the deadline, for cancelled calls to return
+CANCEL_RETRY_S = 0.05
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your_key_here"))
 aegix = AegixRuntime()
 
 
+def run_tool_calls(
+    tool_calls: List[Any],
+    max_parallel: int = MAX_PARALLEL_TOOL_CALLS,
+    deadline_s: float = TURN_DEADLINE_S,
+) -> List[dict]:
+    """
+    Run one turn's tool calls concurrently (at most `max_parallel` at a time).
+
+    Results come back in tool_calls order. Calls still running or queued when the
+    turn deadline passes are cancelled and reported as CANCELLED; one that has
+    not returned CANCEL_GRACE_S later is abandoned and reported as TIMEOUT. So
+    the turn takes about as long as its slowest call, never much longer than
+    deadline_s.
+    """
+    turn = uuid.uuid4().hex[:8]
+    run_ids = [f"turn-{turn}-{i}" for i in range(len(tool_calls))]
+
+    def _execute(call: Any, run_id: str) -> dict:
+        args = json.loads(call.function.arguments)
+        return aegix.execute(args["command"], run_id=run_id)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(tool_calls))))
+    try:
+        futures = [pool.submit(_execute, call, run_id) for call, run_id in zip(tool_calls, run_ids)]
+        _, late = wait(futures, timeout=deadline_s)
+        # queued ones are simply dropped; running ones are killed by the gateway
+        _cancel_running([(f, run_id) for f, run_id in zip(futures, run_ids) if f in late and not f.cancel()])
+    finally:
+        pool.shutdown(wait=False)  # a call the gateway never stopped must not hold up the turn
+
+    results = []
+    for future in futures:
+        if future.cancelled():
+            results.append({"error": {"type": "CANCELLED", "message": f"Turn deadline of {deadline_s}s exceeded"}})
+        elif not future.done():
+            results.append({"error": {
+                "type": "TIMEOUT",
+                "message": f"Turn deadline of {deadline_s}s exceeded; the call did not stop within {CANCEL_GRACE_S}s",
+            }})
+        elif future.exception() is not None:
+            e = future.exception()
+            results.append({"error": {"type": "CLIENT_ERROR", "message": f"{type(e).__name__}: {e}"}})
+        else:
+            results.append(future.result())
+    return results
+
+
+def _cancel_running(running: List[Tuple[Any, str]], grace_s: Optional[float] = None) -> None:
+    """
+    Cancel calls still running at the turn deadline and wait up to grace_s for them.
+
+    The gateway may not have registered a call yet (the request is still in
+    flight), in which case cancel() returns False: retry until it knows the call
+    or the call has finished. A failing cancel() is logged, never raised.
+    """
+    deadline = time.monotonic() + (CANCEL_GRACE_S if grace_s is None else grace_s)
+    pending = list(running)
+    while pending and time.monotonic() < deadline:
+        retry = []
+        for future, run_id in pending:
+            if future.done():
+                continue
+            try:
+                if aegix.cancel(run_id):
+                    continue
+            except Exception as e:
+                log.warning("cancelling %s failed: %s: %s", run_id, type(e).__name__, e)
+            retry.append((future, run_id))
+        pending = retry
+        if pending:
+            time.sleep(CANCEL_RETRY_S)
+    wait([future for future, _ in running], timeout=max(deadline - time.monotonic(), 0))
+
+
 def run_agent(prompt: str) -> str:
     messages = [{"role": "user", "content": prompt}]
 
@@ -53,9 +162,8 @@ def run_agent(prompt: str) -> str:
         return first.content or ""
 
     messages.append(first)
-    for call in first.tool_calls:
-        args = json.loads(call.function.arguments)
-        result = aegix.execute(args["command"])
+    results = run_tool_calls(first.tool_calls)
+    for call, result in zip(first.tool_calls, results):
         messages.append(
             {
                 "role": "tool",
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+# `aegix` console script; commands import their dependencies lazily (see aegix.cli)
+from aegix.cli import app
+
+if __name__ == "__main__":
+    app()
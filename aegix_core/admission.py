@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import itertools
+import threading
+import time
+
+PRUNE_INTERVAL_S = 60.0  # how often idle actors' state is dropped
+
+@dataclass(frozen=True)
+class ActorQuota:
+    rate_per_s: Optional[float] = 20.0  # token bucket refill; None => no rate limit
+    burst: int = 40                     # token bucket size
+    max_running: int = 16               # concurrent runs of this actor
+    max_queued: int = 64                # waiting runs of this actor before shedding
+    weight: float = 1.0                 # share of contended slots relative to other actors
+
+    def __post_init__(self) -> None:
+        if self.rate_per_s is not None and self.rate_per_s <= 0:
+            raise ValueError(f"Invalid rate_per_s: {self.rate_per_s}")
+        if self.burst < 1 or self.max_running < 1 or self.max_queued < 0 or self.weight <= 0:
+            raise ValueError(f"Invalid actor quota: {self}")
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    max_running: int = 32     # runs executing at once, across actors
+    max_queued: int = 256     # runs waiting, across actors; beyond this calls are shed
+    max_wait_s: float = 60.0  # a queued run gives up (OVERLOADED) after this long
+    default: ActorQuota = field(default_factory=ActorQuota)
+    per_actor: Dict[str, ActorQuota] = field(default_factory=dict)  # e.g. {"cli": ActorQuota(weight=4)}
+
+    def __post_init__(self) -> None:
+        if self.max_running < 1 or self.max_queued < 0 or self.max_wait_s <= 0:
+            raise ValueError(f"Invalid admission config: max_running={self.max_running} max_queued={self.max_queued}")
+
+    def quota(self, actor: str) -> ActorQuota:
+        return self.per_actor.get(actor, self.default)
+
+
+class AdmissionError(Exception):
+    """A call was not admitted; `error_type` is the AegixError type to report."""
+
+    def __init__(self, error_type: str, message: str, wait_s: float = 0.0) -> None:
+        super().__init__(message)
+        self.error_type = error_type
+        self.wait_s = wait_s
+
+
+@dataclass
+class Ticket:
+    actor: str
+    priority: int
+    wait_s: float = 0.0
+    queued: bool = False
+
+    def as_report(self) -> Dict[str, Any]:
+        return {
+            "actor": self.actor,
+            "priority": self.priority,
+            "queued": self.queued,
+            "queue_wait_ms": round(self.wait_s * 1000, 3),
+        }
+
+
+@dataclass
+class _Actor:
+    quota: ActorQuota
+    tokens: float
+    refilled_at: float
+    running: int = 0
+    queued: int = 0
+    vtime: float = 0.0  # virtual finish time for weighted fair queueing
+
+
+@dataclass
+class _Waiter:
+    ticket: Ticket
+    seq: int
+    enqueued_at: float
+    granted: threading.Event = field(default_factory=threading.Event)
+
+
+class AdmissionController:
+    """
+    Decides when a call may start, in front of ToolRouter's sandbox work.
+
+    Each actor has a token bucket (rate_per_s, burst): a call arriving with the
+    bucket empty is rejected with RATE_LIMITED. Admitted calls start at once if
+    both the global and the actor's max_running allow it, otherwise they queue.
+    A freed slot goes to the waiter with the highest priority; between equal
+    priorities, to the actor with the lowest virtual time, which advances by
+    1/weight per dispatch, so contended slots are shared in proportion to
+    weight and an idle actor can't bank credit. Calls that would overflow the
+    global or per-actor queue, or wait longer than max_wait_s, are shed with
+    OVERLOADED, and get their token back. Actors with nothing running or queued
+    and a full bucket are forgotten (their state is indistinguishable from a new
+    actor's), so arbitrary actor names don't accumulate.
+    """
+
+    def __init__(self, config: Optional[AdmissionConfig] = None) -> None:
+        self.config = config or AdmissionConfig()
+        self._lock = threading.Lock()
+        self._actors: Dict[str, _Actor] = {}
+        self._waiters: List[_Waiter] = []
+        self._running = 0
+        self._vclock = 0.0  # virtual time of the last dispatch
+        self._seq = itertools.count()
+        self._pruned_at = time.monotonic()
+
+    def admit(self, actor: str, priority: int = 0, cancel: Optional[threading.Event] = None) -> Ticket:
+        """Block until the call may run. Pair every returned ticket with release()."""
+        now = time.monotonic()
+        ticket = Ticket(actor=actor, priority=priority)
+        with self._lock:
+            if now - self._pruned_at >= PRUNE_INTERVAL_S:
+                self._prune(now)
+            state = self._actor(actor, now)
+            quota = state.quota
+            if quota.rate_per_s is not None:
+                if state.tokens < 1:
+                    retry_after = (1 - state.tokens) / quota.rate_per_s
+                    raise AdmissionError(
+                        "RATE_LIMITED",
+                        f"Actor {actor} exceeded {quota.rate_per_s}/s (burst {quota.burst}); retry in {retry_after:.2f}s",
+                    )
+                state.tokens -= 1
+
+            if not self._waiters and self._can_run(state):
+                self._start(state)
+                return ticket
+
+            if len(self._waiters) >= self.config.max_queued or state.queued >= quota.max_queued:
+                self._refund(state)
+                raise AdmissionError(
+                    "OVERLOADED",
+                    f"Admission queue full ({len(self._waiters)} waiting, {state.queued} for actor {actor}); retry later",
+                )
+            waiter = _Waiter(ticket=ticket, seq=next(self._seq), enqueued_at=now)
+            self._waiters.append(waiter)
+            state.queued += 1
+            ticket.queued = True
+            # the head waiter may belong to an actor at its quota while this one can run
+            self._dispatch()
+
+        deadline = now + self.config.max_wait_s
+        while not waiter.granted.wait(0.05):
+            reason = None
+            if cancel is not None and cancel.is_set():
+                reason = ("CANCELLED", "Call cancelled while queued for admission")
+            elif time.monotonic() >= deadline:
+                reason = ("OVERLOADED", f"Waited {self.config.max_wait_s}s for admission; retry later")
+            if reason is None:
+                continue
+            with self._lock:
+                if waiter.granted.is_set():
+                    break  # granted in the meantime; run it
+                self._waiters.remove(waiter)
+                state.queued -= 1
+                self._refund(state)
+            raise AdmissionError(reason[0], reason[1], wait_s=time.monotonic() - now)
+
+        ticket.wait_s = time.monotonic() - now
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        with self._lock:
+            self._actors[ticket.actor].running -= 1
+            self._running -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": len(self._waiters),
+                "actors": {
+                    name: {"running": a.running, "queued": a.queued, "tokens": round(a.tokens, 3)}
+                    for name, a in self._actors.items()
+                },
+            }
+
+    # ---------------- helpers (under _lock) ----------------
+
+    def _actor(self, actor: str, now: float) -> _Actor:
+        state = self._actors.get(actor)
+        if state is None:
+            quota = self.config.quota(actor)
+            state = self._actors[actor] = _Actor(quota=quota, tokens=float(quota.burst), refilled_at=now)
+        elif state.quota.rate_per_s is not None:
+            state.tokens = min(
+                float(state.quota.burst),
+                state.tokens + (now - state.refilled_at) * state.quota.rate_per_s,
+            )
+        state.refilled_at = now
+        return state
+
+    def _refund(self, state: _Actor) -> None:
+        # the call never ran, so it shouldn't count against the rate limit
+        if state.quota.rate_per_s is not None:
+            state.tokens = min(float(state.quota.burst), state.tokens + 1)
+
+    def _prune(self, now: float) -> None:
+        self._pruned_at = now
+        for name, state in list(self._actors.items()):
+            if state.running or state.queued:
+                continue
+            full = state.quota.rate_per_s is None or (
+                state.tokens + (now - state.refilled_at) * state.quota.rate_per_s >= state.quota.burst
+            )
+            if full:
+                del self._actors[name]
+
+    def _can_run(self, state: _Actor) -> bool:
+        return self._running < self.config.max_running and state.running < state.quota.max_running
+
+    def _start(self, state: _Actor) -> None:
+        state.running += 1
+        self._running += 1
+        # an actor returning from idle starts at the current virtual time, not behind it
+        state.vtime = max(state.vtime, self._vclock) + 1 / state.quota.weight
+        self._vclock = max(self._vclock, state.vtime - 1 / state.quota.weight)
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._running < self.config.max_running:
+            eligible = [w for w in self._waiters if self._can_run(self._actors[w.ticket.actor])]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (
+                -w.ticket.priority,
+                max(self._actors[w.ticket.actor].vtime, self._vclock),
+                w.seq,
+            ))
+            self._waiters.remove(waiter)
+            state = self._actors[waiter.ticket.actor]
+            state.queued -= 1
+            self._start(state)
+            waiter.granted.set()
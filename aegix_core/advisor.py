@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, Optional, Tuple
+import math
+import posixpath
+import re
+import shlex
+
+from aegix.metrics import Histogram
+from aegix.policy import PolicyConfig
+
+def _geometric(lo: float, hi: float, ratio: float = 2 ** 0.25) -> Tuple[float, ...]:
+    # ~19% apart: a p99 read from these buckets is off by at most one step
+    out = []
+    value = lo
+    while value <= hi:
+        out.append(value)
+        value *= ratio
+    return tuple(out)
+
+MEM_BUCKETS_MB = _geometric(1, 256 * 1024)
+CPU_BUCKETS = _geometric(0.01, 256)     # cores: cpu seconds per exec second
+PIDS_BUCKETS = _geometric(1, 65536)
+SECONDS_BUCKETS = _geometric(0.01, 86400)
+
+# floors, so a tool that has only run trivial commands still gets usable limits
+MIN_LIMITS: Dict[str, float] = {"mem_mb": 64, "cpu": 0.25, "pids": 16, "timeout_s": 5}
+
+_ENV_ASSIGNMENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*=")
+
+def command_class(cmd: str) -> str:
+    """The program a command starts with: "FOO=1 /usr/bin/python3 -m x | head" -> "python3"."""
+    try:
+        words = shlex.split(cmd)
+    except ValueError:
+        words = cmd.split()
+    for word in words:
+        if _ENV_ASSIGNMENT.match(word):
+            continue
+        return posixpath.basename(word)
+    return ""
+
+
+@dataclass
+class UsageProfile:
+    """Usage distribution of one (tool, command class); constant size however many runs."""
+    runs: int = 0
+    mem_mb: Histogram = field(default_factory=lambda: Histogram(MEM_BUCKETS_MB))
+    cpu: Histogram = field(default_factory=lambda: Histogram(CPU_BUCKETS))
+    pids: Histogram = field(default_factory=lambda: Histogram(PIDS_BUCKETS))
+    exec_s: Histogram = field(default_factory=lambda: Histogram(SECONDS_BUCKETS))
+
+    def observe(self, usage: Dict[str, Any], exec_s: float) -> None:
+        self.runs += 1
+        self.mem_mb.observe(usage.get("peak_mem_mb", 0.0))
+        self.pids.observe(usage.get("peak_pids", 0))
+        self.exec_s.observe(exec_s)
+        if exec_s > 0:
+            self.cpu.observe(usage.get("cpu_s", 0.0) / exec_s)
+
+    def merge(self, other: UsageProfile) -> None:
+        self.runs += other.runs
+        for name in ("mem_mb", "cpu", "pids", "exec_s"):
+            getattr(self, name).merge(getattr(other, name))
+
+    def quantiles(self, q: float) -> Dict[str, Optional[float]]:
+        return {
+            "mem_mb": self.mem_mb.quantile(q),
+            "cpu": self.cpu.quantile(q),
+            "pids": self.pids.quantile(q),
+            "timeout_s": self.exec_s.quantile(q),
+        }
+
+
+class LimitsAdvisor:
+    """
+    Suggests per_tool limits from the usage recorded in past reports.
+
+    Runs are grouped by tool and command class (command_class()); a tool's
+    suggestion covers the most demanding of its classes, since limits are set
+    per tool. Each limit becomes the `quantile` of observed usage times
+    `headroom`, never below MIN_LIMITS. Only tools with at least min_runs
+    sampled runs get a suggestion, and tighten() only ever lowers limits;
+    raising a limit is left to a human.
+    """
+
+    def __init__(self, headroom: float = 1.5, quantile: float = 0.99, min_runs: int = 20) -> None:
+        if headroom < 1:
+            raise ValueError(f"headroom must be >= 1, got {headroom}")
+        self.headroom = headroom
+        self.quantile = quantile
+        self.min_runs = min_runs
+        self.profiles: Dict[Tuple[str, str], UsageProfile] = {}
+
+    def observe_report(self, report: Dict[str, Any]) -> bool:
+        """Fold one report.json in; False if it carries no usage (denied, cached, unsampled)."""
+        usage = report.get("usage") or {}
+        if not usage.get("available"):
+            return False
+        tool = report.get("tool") or {}
+        key = (tool.get("tool_name") or "", command_class(tool.get("cmd") or ""))
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self.profiles[key] = UsageProfile()
+        profile.observe(usage, (report.get("timings_ms") or {}).get("exec", 0.0) / 1000)
+        return True
+
+    def observe_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        return sum(self.observe_report(report) for report in reports)
+
+    def suggest(self, cfg: PolicyConfig) -> Dict[str, Dict[str, Any]]:
+        """Per tool: current limits, proposed limits, the subset that would tighten, per-class usage."""
+        by_tool: Dict[str, Dict[str, UsageProfile]] = {}
+        for (tool, cls), profile in self.profiles.items():
+            by_tool.setdefault(tool, {})[cls] = profile
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for tool, classes in sorted(by_tool.items()):
+            runs = sum(p.runs for p in classes.values())
+            current = cfg.default_limits.merged(cfg.per_tool_limits.get(tool))
+            entry: Dict[str, Any] = {
+                "runs": runs,
+                "current": {name: getattr(current, name) for name in MIN_LIMITS},
+                "classes": {
+                    cls: {"runs": p.runs, **{k: _round(v) for k, v in p.quantiles(self.quantile).items()}}
+                    for cls, p in sorted(classes.items(), key=lambda item: -item[1].runs)
+                },
+            }
+            if runs < self.min_runs:
+                entry["skipped"] = f"only {runs} sampled runs (min_runs={self.min_runs})"
+                out[tool] = entry
+                continue
+
+            proposed: Dict[str, float] = {}
+            for name, floor in MIN_LIMITS.items():
+                # the most demanding class decides
+                observed = max((p.quantiles(self.quantile)[name] or 0.0) for p in classes.values())
+                proposed[name] = _limit_value(name, max(observed * self.headroom, floor))
+            entry["proposed"] = proposed
+            entry["tighten"] = {name: v for name, v in proposed.items() if v < entry["current"][name]}
+            out[tool] = entry
+        return out
+
+    def tighten(self, cfg: PolicyConfig) -> PolicyConfig:
+        """cfg with every suggested reduction applied to per_tool limits (e.g. for PolicyEngine.swap)."""
+        per_tool = {tool: dict(limits) for tool, limits in cfg.per_tool_limits.items()}
+        for tool, entry in self.suggest(cfg).items():
+            if entry.get("tighten"):
+                per_tool.setdefault(tool, {}).update(entry["tighten"])
+        return replace(cfg, per_tool_limits=per_tool)
+
+
+def tighten_policy_data(data: Dict[str, Any], suggestions: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply suggest() reductions to a policy YAML document (as loaded by yaml.safe_load)."""
+    limits = data.setdefault("limits", {}) or {}
+    data["limits"] = limits
+    per_tool = limits.setdefault("per_tool", {}) or {}
+    limits["per_tool"] = per_tool
+    for tool, entry in suggestions.items():
+        if entry.get("tighten"):
+            per_tool[tool] = {**(per_tool.get(tool) or {}), **entry["tighten"]}
+    return data
+
+
+def _limit_value(name: str, value: float) -> float:
+    if name == "cpu":
+        return math.ceil(value * 4) / 4  # quarter cores
+    return int(math.ceil(value))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
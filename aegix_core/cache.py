@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from aegix.io.artifacts import ArtifactWriter
+from aegix.models import AdjustedPolicy
+from aegix.runtime.docker_backend import ExecResult
+
+CACHED_ARTIFACTS = ("stdout.txt", "stderr.txt", "exit_code.txt")
+COPY_CHUNK = 1024 * 1024
+
+@dataclass(frozen=True)
+class CacheEntry:
+    key: str
+    exec_result: ExecResult
+    path: Path
+    created_at: float
+
+
+class ResultCache:
+    """
+    On-disk, content-addressed cache of successful tool runs.
+
+    Entries live in <root>/<key[:2]>/<key>/ with a meta.json and the run's output
+    artifacts. Entries expire after `ttl_s`; when the cache grows past `max_bytes`
+    the least recently used entries are removed.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 1024 * 1024 * 1024, ttl_s: float = 24 * 3600) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, float]] = {}  # key -> (size, last_used)
+        self._total = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(
+        image_digest: str,
+        cmd: str,
+        env: Dict[str, str],
+        cwd: str,
+        workspace_digest: Optional[str],
+        adjusted: AdjustedPolicy,
+    ) -> str:
+        material = {
+            "image": image_digest,
+            "cmd": cmd,
+            "env": dict(sorted(env.items())),
+            "cwd": cwd,
+            "workspace": workspace_digest,
+            "policy": asdict(adjusted),
+        }
+        raw = json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._entry_path(key)
+        try:
+            meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - meta["created_at"] > self.ttl_s:
+            self._remove(key)
+            return None
+
+        now = time.time()
+        os.utime(path / "meta.json", (now, now))
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        return CacheEntry(
+            key=key,
+            exec_result=ExecResult(**meta["exec_result"]),
+            path=path,
+            created_at=meta["created_at"],
+        )
+
+    def put(self, key: str, exec_result: ExecResult, artifacts: ArtifactWriter) -> None:
+        final = self._entry_path(key)
+        if final.exists():
+            return
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        try:
+            size = 0
+            for rel in CACHED_ARTIFACTS:
+                with artifacts.open_read(rel) as src, (tmp / rel).open("wb") as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK)
+                size += (tmp / rel).stat().st_size
+            meta = {"key": key, "created_at": time.time(), "exec_result": asdict(exec_result)}
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+            final.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, final)
+        except OSError:
+            # a concurrent put won the rename, or the run's artifacts are gone
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        with self._lock:
+            self._index[key] = (size, time.time())
+            self._total += size
+        self._evict()
+
+    def restore(self, entry: CacheEntry, artifacts: ArtifactWriter) -> None:
+        """Copy a cached run's artifacts into a new run directory."""
+        for rel in CACHED_ARTIFACTS:
+            with (entry.path / rel).open("rb") as src, artifacts.open_binary(rel) as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._index), "bytes": self._total, "max_bytes": self.max_bytes}
+
+    # ---------------- helpers ----------------
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _load_index(self) -> None:
+        for meta_path in self.root.glob("*/*/meta.json"):
+            entry = meta_path.parent
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir() if f.name != "meta.json")
+                last_used = meta_path.stat().st_mtime
+            except OSError:
+                continue
+            self._index[entry.name] = (size, last_used)
+            self._total += size
+        for tmp in self.root.glob(".tmp-*"):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * 0.9)  # evict in batches, not on every put
+            victims = []
+            for key, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+                if self._total <= target:
+                    break
+                victims.append(key)
+                self._total -= size
+                del self._index[key]
+        for key in victims:
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            size, _ = self._index.pop(key, (0, 0.0))
+            self._total -= size
+        shutil.rmtree(self._entry_path(key), ignore_errors=True)
@@ -1,30 +1,233 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
+import json
+import re
+import time
 import typer
 
-from aegix.router import ToolRouter
+# command bodies import what they need: `aegix --help` and a denied `aegix run`
+# load neither docker nor the sandbox runtime
 
 app = typer.Typer(help="Aegix - Command Line Interface")
+audit_app = typer.Typer(help="Inspect the audit log")
+app.add_typer(audit_app, name="audit")
 
 @app.command()
 def run(
     cmd: str = typer.Option(..., "--cmd", help="Command to run inside docker sandbox"),
     image: str = typer.Option("python:3.11-slim", "--image", help="Docker image"),
     run_dir: Path = typer.Option(Path("runs"), "--run-dir", help="Runs output directory"),
+    tool: str = typer.Option("bash", "--tool", help="Tool name the policy is evaluated for"),
+    policy: Optional[Path] = typer.Option(None, "--policy", help="Policy YAML; default: built-in"),
 ) -> None:
     """
     Run a single command in an isolated docker container and persist artifacts + events
     """
-    router = ToolRouter(run_dir=run_dir)
-    cfg = RunConfig(cmd=cmd, image=image)
-    result = router.handle(cfg)
+    import uuid
 
-    typer.echo(f"run_id: {result.run_id}")
-    typer.echo(f"run_dir: {result.run_dir}")
-    typer.echo(f"exit_code: {result.exit_code}")
-    if result.exit_code != 0:
-        typer.echo(f"stderr (tail): {result.stderr_tail}")
+    from aegix.io.artifacts import ArtifactWriter
+    from aegix.logging.audit import AuditLogger
+    from aegix.models import ToolCall, ToolContext
+    from aegix.policy import PolicyEngine
+    from aegix.router import ToolRouter
+    from aegix.runtime.docker_backend import DockerBackend
+
+    policy_path = policy or Path(__file__).resolve().parent / "policy" / "default.yaml"
+    auditor = AuditLogger(run_dir / "events.jsonl")
+    # DockerBackend connects on first create(): a call the policy denies never reaches docker
+    router = ToolRouter(
+        PolicyEngine.from_file(policy_path),
+        DockerBackend(),
+        auditor,
+        ArtifactWriter(run_dir),
+        default_image=image,
+    )
+    run_id = uuid.uuid4().hex[:12]
+    try:
+        result = router.handle(
+            ToolCall(tool_name=tool, cmd=cmd, image=image),
+            ToolContext(run_id=run_id, actor="cli"),
+            run_dir / run_id,
+        )
+    finally:
+        router.close()
+        auditor.close()
+
+    typer.echo(f"run_id: {run_id}")
+    typer.echo(f"run_dir: {run_dir / run_id}")
+    if result.exec_result is not None:
+        typer.echo(f"exit_code: {result.exec_result.exit_code}")
+    if not result.ok:
+        typer.echo(f"error: {result.error.type}: {result.error.message}")
+        if result.exec_result is not None:
+            typer.echo(f"stderr (tail): {result.stderr_tail}")
+        raise typer.Exit(code=1)
+
+@app.command()
+def gateway(
+    address: str = typer.Option("http://127.0.0.1:8787", "--address", help="http://127.0.0.1:PORT or unix:///path/to.sock"),
+    run_dir: Path = typer.Option(Path("runs"), "--run-dir", help="Runs output directory"),
+    policy: Optional[Path] = typer.Option(None, "--policy", help="Policy YAML (hot-reloaded); default: built-in"),
+    backend: str = typer.Option("docker", "--backend", help="docker | process | fake"),
+    image: List[str] = typer.Option([], "--image", help="Image to keep warm containers of (repeatable)"),
+    sessions: bool = typer.Option(False, "--sessions", help="Reuse one sandbox per session id"),
+    workspace_root: Optional[Path] = typer.Option(None, "--workspace-root", help="Host directory call workspaces must be under; default: no workspaces"),
+    usage_interval: Optional[float] = typer.Option(None, "--usage-interval", help="Sample sandbox resource usage every N seconds (for `aegix advise`); default: off"),
+) -> None:
+    """
+    Serve tool calls from a long-lived process (policy, pools and loggers stay warm)
+    """
+    from aegix.gateway import create_gateway
+
+    gw = create_gateway(
+        run_dir, policy_path=policy, backend=backend, images=image, sessions=sessions,
+        workspace_root=workspace_root, usage_interval_s=usage_interval,
+    )
+    server = gw.serve(address)
+    typer.echo(f"aegix gateway listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        gw.close()
+
+@app.command()
+def stats(
+    runs: Path = typer.Option(Path("runs"), "--runs", help="Runs directory"),
+    events: Optional[Path] = typer.Option(None, "--events", help="Audit log to count events from; default: <runs>/events.jsonl"),
+    blobs: Optional[Path] = typer.Option(None, "--blobs", help="Blob store of StoreArtifactWriter runs"),
+    since: Optional[str] = typer.Option(None, "--since", help="Start: ISO timestamp or age like 15m, 1h, 2d"),
+    until: Optional[str] = typer.Option(None, "--until", help="End (exclusive): ISO timestamp or age"),
+    tool: List[str] = typer.Option([], "--tool", help="Only runs of this tool (repeatable)"),
+    workers: Optional[int] = typer.Option(None, "--workers", help="Worker processes (0: in-process); default: CPU count"),
+    fmt: str = typer.Option("table", "--format", help="table | json"),
+) -> None:
+    """
+    Latency percentiles per phase, errors, output sizes and slowest commands over past runs
+    """
+    from aegix.stats import StatsFilter, collect_stats, format_table
+
+    if fmt not in ("table", "json"):
+        raise typer.BadParameter(f"Unknown format: {fmt}")
+    events = events or runs / "events.jsonl"
+    flt = StatsFilter(
+        since_ns=_parse_time(since) if since else None,
+        until_ns=_parse_time(until) if until else None,
+        tools=tuple(tool),
+    )
+    result = collect_stats(runs, flt, events_path=events, blob_root=blobs, workers=workers).as_dict()
+    typer.echo(json.dumps(result, indent=2) if fmt == "json" else format_table(result))
+
+@app.command()
+def advise(
+    runs: Path = typer.Option(Path("runs"), "--runs", help="Runs directory"),
+    policy: Optional[Path] = typer.Option(None, "--policy", help="Policy YAML the runs used; default: built-in"),
+    blobs: Optional[Path] = typer.Option(None, "--blobs", help="Blob store of StoreArtifactWriter runs"),
+    headroom: float = typer.Option(1.5, "--headroom", help="Proposed limit = p99 usage x headroom"),
+    min_runs: int = typer.Option(20, "--min-runs", help="Sampled runs a tool needs before it gets a suggestion"),
+    write: Optional[Path] = typer.Option(None, "--write", help="Write the policy with tightened per_tool limits here"),
+) -> None:
+    """
+    Suggest tighter per-tool limits from the resource usage recorded in past runs
+    (runs record usage only when sampled: `aegix gateway --usage-interval`)
+    """
+    import yaml
+
+    from aegix.advisor import LimitsAdvisor, tighten_policy_data
+    from aegix.policy import parse_policy
+    from aegix.stats import iter_run_dirs, read_report
+
+    policy_path = policy or Path(__file__).resolve().parent / "policy" / "default.yaml"
+    text = policy_path.read_text()
+    advisor = LimitsAdvisor(headroom=headroom, min_runs=min_runs)
+    advisor.observe_reports(
+        report for report in (read_report(d, blobs) for d in iter_run_dirs(runs)) if report is not None
+    )
+    suggestions = advisor.suggest(parse_policy(text))
+    typer.echo(json.dumps(suggestions, indent=2))
+
+    if write is not None:
+        # comments in the source policy are not preserved
+        data = tighten_policy_data(yaml.safe_load(text) or {}, suggestions)
+        out = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+        parse_policy(out)  # never write a policy that would not load
+        write.write_text(out)
+        typer.echo(f"wrote {write}")
+
+@app.command()
+def gc(
+    blobs: Path = typer.Option(..., "--blobs", help="Blob store of StoreArtifactWriter runs"),
+    runs: Path = typer.Option(Path("runs"), "--runs", help="Runs directory"),
+    retention: str = typer.Option("7d", "--retention", help="Delete runs older than this age (90s, 15m, 1h, 2d)"),
+    grace: str = typer.Option("1h", "--grace", help="Keep unreferenced blobs younger than this (runs still writing)"),
+) -> None:
+    """
+    Delete expired runs, then the blobs no remaining run references
+    """
+    from aegix.io.store import BlobStore, collect_garbage
+
+    result = collect_garbage(BlobStore(blobs), runs, retention_s=_parse_age(retention), grace_s=_parse_age(grace))
+    typer.echo(json.dumps(result, indent=2))
+
+@audit_app.command("query")
+def audit_query(
+    log: Path = typer.Option(Path("runs/events.jsonl"), "--log", help="Audit log (events.jsonl of the run dir)"),
+    run_id: Optional[str] = typer.Option(None, "--run-id", help="Only events of this run"),
+    event_type: List[str] = typer.Option([], "--type", help="Only events of this type (repeatable)"),
+    since: Optional[str] = typer.Option(None, "--since", help="Start: ISO timestamp or age like 90s, 15m, 1h, 2d"),
+    until: Optional[str] = typer.Option(None, "--until", help="End (exclusive): ISO timestamp or age"),
+    limit: Optional[int] = typer.Option(None, "--limit", help="At most this many events"),
+    count: bool = typer.Option(False, "--count", help="Print the number of matching events only"),
+    reindex: bool = typer.Option(False, "--reindex", help="Index lines the writer has not indexed first"),
+) -> None:
+    """
+    Look up audit events through the sidecar index (one JSON event per line)
+    """
+    from aegix.logging.audit import index_path, segment_paths
+    from aegix.logging.index import AuditIndex
+
+    index = AuditIndex(index_path(log))
+    try:
+        if reindex:
+            index.catch_up(segment_paths(log))
+        filters = dict(
+            run_id=run_id,
+            types=event_type,
+            since_ns=_parse_time(since) if since else None,
+            until_ns=_parse_time(until) if until else None,
+        )
+        if count:
+            typer.echo(index.count(**filters))
+            return
+        for event in index.query(limit=limit, **filters):
+            typer.echo(json.dumps(event, ensure_ascii=False))
+    finally:
+        index.close()
+
+_AGE = re.compile(r"(\d+(?:\.\d+)?)([smhd])")
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _parse_age(value: str) -> float:
+    """An age like "15m" -> seconds."""
+    age = _AGE.fullmatch(value)
+    if not age:
+        raise typer.BadParameter(f"Not an age: {value}")
+    return float(age.group(1)) * _AGE_UNITS[age.group(2)]
+
+def _parse_time(value: str) -> int:
+    """ISO timestamp or an age ("15m" = 15 minutes ago) -> epoch ns."""
+    age = _AGE.fullmatch(value)
+    if age:
+        return time.time_ns() - int(float(age.group(1)) * _AGE_UNITS[age.group(2)] * 1e9)
+    try:
+        return int(datetime.fromisoformat(value).astimezone().timestamp() * 1e9)
+    except ValueError:
+        raise typer.BadParameter(f"Not a timestamp or age: {value}")
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -7,8 +7,14 @@ ErrorType = Literal[
     "DENIED_POLICY",
     "INVALID_TOOL_CALL",
     "TIMEOUT",
+    "CANCELLED",
     "NONZERO_EXIT",
     "BACKEND_ERROR",
+    "BUDGET_EXCEEDED",
+    "IMAGE_PULLING",
+    "IMAGE_UNAVAILABLE",
+    "RATE_LIMITED",
+    "OVERLOADED",
 ]
 
 @dataclass(frozen=True)
@@ -0,0 +1,495 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from http.client import HTTPConnection, HTTPException, RemoteDisconnected
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import threading
+import uuid
+
+from aegix.admission import AdmissionConfig, AdmissionController
+from aegix.models import AdjustedPolicy, ToolCall, ToolContext
+from aegix.router import ToolResult, ToolRouter
+from aegix.runtime.images import ResolvedImage
+from aegix.runtime.snapshots import DEFAULT_MAX_BYTES, SnapshotError, SnapshotStore
+
+DEFAULT_ADDRESS = "http://127.0.0.1:8787"
+MAX_BODY_BYTES = 16 * 1024 * 1024
+_RUN_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")  # run ids become directory names
+
+class Gateway:
+    """
+    Long-lived Aegix service: one ToolRouter (policy engine, backends, pools,
+    loggers) shared by every client, so a tool call costs one HTTP round trip
+    instead of a process start, a docker client and a policy parse.
+
+      POST   /v1/calls                  {"call": {...ToolCall}, "ctx": {...ToolContext}}
+      POST   /v1/calls/<run_id>/cancel  cancel an in-flight call
+      POST   /v1/sessions/<id>/reset    put a session sandbox back to its image / snapshot
+      DELETE /v1/sessions/<id>          close a session sandbox
+      POST   /v1/snapshots              {"name", "setup_cmd", "tool_name", "image"}: prepare a snapshot
+      GET    /v1/snapshots              list snapshots, most recently used first
+      GET    /v1/health                 liveness + policy version
+      GET    /metrics                   Prometheus text
+
+    Serves HTTP/1.1 with keep-alive on localhost TCP or a Unix socket. Each run's
+    artifacts go to <runs_root>/<run_id>. Clients are not authenticated, so a
+    call's `workspace` is resolved under workspace_root and refused if it leaves
+    it; without a workspace_root, calls can't name a workspace at all.
+    """
+
+    def __init__(self, router: ToolRouter, runs_root: Path, workspace_root: Optional[Path] = None) -> None:
+        self.router = router
+        self.runs_root = Path(runs_root)
+        self.workspace_root = Path(workspace_root).resolve() if workspace_root is not None else None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+
+    def call(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        call_data = dict(payload["call"])
+        call_data["workspace"] = self._workspace(call_data.get("workspace"))
+        call = ToolCall(**call_data)
+        ctx_data = dict(payload.get("ctx") or {})
+        ctx_data.setdefault("run_id", uuid.uuid4().hex[:12])
+        ctx = ToolContext(**ctx_data)
+        if not _RUN_ID.match(ctx.run_id):
+            raise ValueError(f"Invalid run_id: {ctx.run_id!r}")
+
+        cancel = threading.Event()
+        with self._lock:
+            if ctx.run_id in self._inflight:
+                raise ValueError(f"run_id {ctx.run_id} is already running")
+            self._inflight[ctx.run_id] = cancel
+        try:
+            run_dir = self.runs_root / ctx.run_id
+            result = self.router.handle(call, ctx, run_dir, cancel=cancel)
+        finally:
+            with self._lock:
+                self._inflight.pop(ctx.run_id, None)
+        return result_to_dict(result, ctx.run_id, run_dir)
+
+    def create_snapshot(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prepare a named snapshot: setup_cmd runs in a fresh sandbox of the backend,
+        image and limits the policy gives tool_name, and must be allowed for it.
+        """
+        if self.router.snapshots is None:
+            raise ValueError("Snapshots are not enabled")
+        call = ToolCall(
+            tool_name=payload.get("tool_name") or "bash",
+            cmd=payload["setup_cmd"],
+            image=payload.get("image") or self.router.default_image,
+        )
+        decision = self.router.policy.evaluate(call, ToolContext(run_id=f"snapshot-{payload['name']}"))
+        if not decision.allow:
+            raise PermissionError(f"setup_cmd denied by policy: {decision.reason}")
+        snap = self.router.snapshots.prepare(
+            payload["name"],
+            decision.adjusted.backend,
+            call.image,
+            call.cmd,
+            adjusted=decision.adjusted,
+            timeout_s=decision.adjusted.limits.timeout_s,
+        )
+        self.router.auditor.log("SNAPSHOT_CREATED", snap.as_report())
+        return snap.as_report()
+
+    def cancel(self, run_id: str) -> bool:
+        with self._lock:
+            event = self._inflight.get(run_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def _workspace(self, requested: Optional[str]) -> Optional[str]:
+        """The host directory a call may sync into /workspace: inside workspace_root only."""
+        if not requested:
+            return None
+        if self.workspace_root is None:
+            raise PermissionError("This gateway accepts no workspaces (start it with a workspace root)")
+        path = (self.workspace_root / requested).resolve()
+        if path != self.workspace_root and self.workspace_root not in path.parents:
+            raise PermissionError(f"Workspace {requested!r} is outside the gateway's workspace root")
+        return str(path)
+
+    def serve(self, address: str = DEFAULT_ADDRESS) -> ThreadingHTTPServer:
+        """Bind `address` ("http://host:port" or "unix:///path.sock"); call serve_forever() on the result."""
+        url = urlparse(address)
+        handler = _make_handler(self, tcp=url.scheme == "http")
+        if url.scheme == "unix":
+            try:
+                os.unlink(url.path)  # stale socket from a previous run
+            except FileNotFoundError:
+                pass
+            server: ThreadingHTTPServer = _UnixHTTPServer(url.path, handler)
+        elif url.scheme == "http":
+            if url.hostname not in ("127.0.0.1", "localhost", "::1"):
+                raise ValueError("The gateway has no authentication; bind it to localhost only")
+            server = ThreadingHTTPServer((url.hostname, url.port or 8787), handler)
+        else:
+            raise ValueError(f"Unsupported gateway address: {address}")
+        server.daemon_threads = True
+        return server
+
+    def close(self) -> None:
+        with self._lock:
+            events = list(self._inflight.values())
+        for event in events:
+            event.set()
+        self.router.close()
+        if self.router.images is not None:
+            self.router.images.close()
+        for backend in {id(b): b for b in self.router.backends.values()}.values():
+            close = getattr(backend, "close", None)  # warm pools
+            if close is not None:
+                close()
+        self.router.auditor.close()
+
+
+def result_to_dict(result: ToolResult, run_id: str, run_dir: Path) -> Dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "run_dir": str(run_dir),
+        "ok": result.ok,
+        "exec_result": asdict(result.exec_result) if result.exec_result is not None else None,
+        "error": asdict(result.error) if result.error is not None else None,
+    }
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self) -> None:
+        socketserver.TCPServer.server_bind(self)  # HTTPServer's would resolve a host name
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def _make_handler(gateway: Gateway, tcp: bool) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive: clients reuse one connection per worker
+        # headers and body go out in separate writes; without this every response
+        # on a kept-alive TCP connection waits out the peer's delayed ACK
+        disable_nagle_algorithm = tcp
+
+        def do_GET(self) -> None:
+            if self.path == "/v1/health":
+                health: Dict[str, Any] = {"ok": True, "policy_version": gateway.router.policy.version}
+                if gateway.router.admission is not None:
+                    health["admission"] = gateway.router.admission.stats()
+                self._send_json(200, health)
+            elif self.path == "/v1/snapshots":
+                snapshots = gateway.router.snapshots
+                self._send_json(200, {"snapshots": snapshots.list() if snapshots is not None else []})
+            elif self.path == "/metrics":
+                body = gateway.router.metrics.render_prometheus().encode("utf-8")
+                self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                self._send_json(404, {"error": f"No route for GET {self.path}"})
+
+        def do_POST(self) -> None:
+            payload = self._read_json()
+            if payload is None:
+                return
+            parts = self.path.strip("/").split("/")
+            try:
+                if parts == ["v1", "calls"]:
+                    self._send_json(200, gateway.call(payload))
+                elif len(parts) == 4 and parts[:2] == ["v1", "calls"] and parts[3] == "cancel":
+                    self._send_json(200, {"cancelled": gateway.cancel(parts[2])})
+                elif len(parts) == 4 and parts[:2] == ["v1", "sessions"] and parts[3] == "reset":
+                    self._send_json(200, {"reset": gateway.router.reset_session(parts[2])})
+                elif parts == ["v1", "snapshots"]:
+                    self._send_json(200, gateway.create_snapshot(payload))
+                else:
+                    self._send_json(404, {"error": f"No route for POST {self.path}"})
+            except (KeyError, TypeError, ValueError) as e:
+                self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+            except (PermissionError, SnapshotError) as e:
+                self._send_json(403 if isinstance(e, PermissionError) else 422, {"error": f"{type(e).__name__}: {e}"})
+            except Exception as e:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def do_DELETE(self) -> None:
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 3 and parts[:2] == ["v1", "sessions"]:
+                self._send_json(200, {"closed": gateway.router.close_session(parts[2])})
+            else:
+                self._send_json(404, {"error": f"No route for DELETE {self.path}"})
+
+        def _read_json(self) -> Optional[Dict[str, Any]]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self._send_json(413, {"error": "Request body too large"})
+                return None
+            try:
+                return json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid JSON: {e}"})
+                return None
+
+        def _send_json(self, status: int, obj: Any) -> None:
+            self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json")
+
+        def _send(self, status: int, body: bytes, ctype: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def address_string(self) -> str:
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # every call is already in the audit log
+
+    return _Handler
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class GatewayClient:
+    """
+    Thread-safe client for a Gateway. Keeps up to `pool_size` idle keep-alive
+    connections and reuses them across calls; a connection the server has closed
+    while idle is replaced transparently.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, pool_size: int = 8, timeout_s: float = 600.0) -> None:
+        url = urlparse(address)
+        if url.scheme not in ("http", "unix"):
+            raise ValueError(f"Unsupported gateway address: {address}")
+        self.address = address
+        self.timeout_s = timeout_s
+        self._url = url
+        self._idle: "queue.LifoQueue[HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def call(
+        self,
+        tool_name: str,
+        cmd: str,
+        run_id: Optional[str] = None,
+        image: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        workspace: Optional[str] = None,
+        actor: str = "agent",
+        metadate: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        call: Dict[str, Any] = {"tool_name": tool_name, "cmd": cmd}
+        if image:
+            call["image"] = image
+        if env:
+            call["env"] = env
+        if workspace:
+            call["workspace"] = workspace
+        ctx: Dict[str, Any] = {"actor": actor, "metadate": metadate or {}}
+        if run_id:
+            ctx["run_id"] = run_id
+        return self._request("POST", "/v1/calls", {"call": call, "ctx": ctx})
+
+    def cancel(self, run_id: str) -> bool:
+        return self._request("POST", f"/v1/calls/{run_id}/cancel", {})["cancelled"]
+
+    def close_session(self, session_id: str) -> bool:
+        return self._request("DELETE", f"/v1/sessions/{session_id}")["closed"]
+
+    def reset_session(self, session_id: str) -> bool:
+        return self._request("POST", f"/v1/sessions/{session_id}/reset", {})["reset"]
+
+    def create_snapshot(
+        self,
+        name: str,
+        setup_cmd: str,
+        tool_name: str = "bash",
+        image: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Prepare a snapshot; later calls start from it with metadate={"snapshot": name}."""
+        payload: Dict[str, Any] = {"name": name, "setup_cmd": setup_cmd, "tool_name": tool_name}
+        if image:
+            payload["image"] = image
+        return self._request("POST", "/v1/snapshots", payload)
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/v1/snapshots")["snapshots"]
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/v1/health")
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn, reused = self._checkout()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue  # the server dropped an idle keep-alive connection; retry once on a fresh one
+                raise
+            except (OSError, HTTPException):
+                conn.close()
+                raise
+            self._checkin(conn, resp.will_close)
+            result = json.loads(data or b"{}")
+            if resp.status != 200:
+                raise GatewayError(resp.status, result.get("error", ""))
+            return result
+        raise AssertionError("unreachable")
+
+    def _checkout(self) -> Tuple[HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        if self._url.scheme == "unix":
+            return _UnixHTTPConnection(self._url.path, timeout=self.timeout_s), False
+        return HTTPConnection(self._url.hostname, self._url.port or 8787, timeout=self.timeout_s), False
+
+    def _checkin(self, conn: HTTPConnection, will_close: bool) -> None:
+        if will_close:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+class GatewayError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"gateway returned {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def create_gateway(
+    runs_root: Path,
+    policy_path: Optional[Path] = None,
+    backend: str = "docker",
+    images: Sequence[str] = (),
+    sessions: bool = False,
+    admission: Optional[AdmissionConfig] = None,
+    snapshot_max_bytes: int = DEFAULT_MAX_BYTES,
+    workspace_root: Optional[Path] = None,
+    usage_interval_s: Optional[float] = None,
+) -> Gateway:
+    """
+    Wire a Gateway the way `aegix gateway` does.
+
+    backend: "docker" (warm-pooled containers), "process" (local subprocesses) or
+    "fake" (FakeBackend: nothing runs, for offline tests of clients). With docker,
+    `images` are also pulled in the background at startup, runs are pinned to
+    the image id their tag resolves to, and the pool keeps containers of that id
+    warm under the limits of every tool the policy runs on docker. Calls pass per-actor admission control
+    (AdmissionConfig defaults unless `admission` is given). Snapshots are indexed
+    in <runs_root>/snapshots.json and evicted past snapshot_max_bytes (10 GiB).
+    Call workspaces must lie under workspace_root (see Gateway). Resource usage is
+    sampled every usage_interval_s when given (off by default; see ToolRouter).
+    """
+    from aegix.io.artifacts import ArtifactWriter
+    from aegix.logging.audit import AuditLogger
+    from aegix.policy import PolicyEngine
+    from aegix.sessions import SessionManager
+
+    runs_root = Path(runs_root)
+    policy_path = policy_path or Path(__file__).resolve().parent / "policy" / "default.yaml"
+    engine = PolicyEngine.from_file(policy_path, watch=True)
+
+    image_manager = None
+    if backend == "docker":
+        from aegix.runtime.images import ImageManager
+        from aegix.runtime.pool import PooledDockerBackend
+        default_backend: Any = PooledDockerBackend()
+        image_manager = ImageManager(prefetch=images, on_resolved=_pool_warmer(default_backend, engine, images))
+    elif backend == "process":
+        from aegix.runtime.process_backend import LocalProcessBackend
+        default_backend = LocalProcessBackend()
+    elif backend == "fake":
+        from aegix.runtime.fake_backend import FakeBackend
+        default_backend = FakeBackend()
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    # tools the policy routes to "process"; a fake gateway never runs anything
+    if backend == "fake":
+        backends: Dict[str, Any] = {"process": default_backend}
+    elif backend == "docker":
+        from aegix.runtime.process_backend import LocalProcessBackend
+        backends = {"process": LocalProcessBackend()}
+    else:
+        backends = {"process": default_backend}
+
+    # daily / 256 MiB segments, indexed for `aegix audit query`
+    auditor = AuditLogger(runs_root / "events.jsonl", segment_bytes=256 * 1024 * 1024, segment_s=86400, index=True)
+    router = ToolRouter(
+        engine,
+        default_backend,
+        auditor,
+        ArtifactWriter(runs_root),
+        backends=backends,
+        sessions=SessionManager(auditor) if sessions else None,
+        images=image_manager,
+        admission=AdmissionController(admission),
+        usage_interval_s=usage_interval_s,
+    )
+    # after the router so the store sees the same backends it routes to
+    router.snapshots = SnapshotStore(router.backends, max_bytes=snapshot_max_bytes, index_path=runs_root / "snapshots.json")
+    return Gateway(router, runs_root, workspace_root=workspace_root)
+
+
+def _pool_warmer(pool: Any, engine: Any, images: Sequence[str]) -> Callable[[ResolvedImage], None]:
+    """
+    ImageManager.on_resolved for create_gateway: warm containers under the key calls
+    actually lease, (resolved image id, each docker tool's sandbox options), and
+    stop warming the previous id once a tag moves.
+    """
+    refs = set(images)
+    lock = threading.Lock()
+    warmed: Dict[str, Tuple[str, List[AdjustedPolicy]]] = {}  # ref -> (image id, policies warmed)
+
+    def on_resolved(image: ResolvedImage) -> None:
+        if image.ref not in refs:
+            return  # images calls happen to use are pooled, but not kept warm
+        snapshot = engine.snapshot
+        adjusted = [a for a in (snapshot.default_adjusted, *snapshot.per_tool.values()) if a.backend == "docker"]
+        with lock:
+            previous = warmed.get(image.ref)
+            warmed[image.ref] = (image.id, adjusted)
+        if previous is not None:
+            for old in previous[1]:
+                pool.unwarm(previous[0], old)
+        for new in adjusted:
+            pool.warm(image.id, new)
+
+    return on_resolved
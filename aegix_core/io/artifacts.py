@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import BinaryIO
 import json
 
 class ArtifactWriter:
     def __init__(self, run_dir: Path) -> None:
         self.run_dir = run_dir
 
+    def for_run(self, run_dir: Path) -> ArtifactWriter:
+        return ArtifactWriter(run_dir)
+
     def write_text(self, rel_path: str, content: str) -> None:
         p = self.run_dir / rel_path
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text(content or "", encoding="utf-8")
 
+    def open_binary(self, rel_path: str) -> BinaryIO:
+        """Open an artifact for streamed writes; the caller closes it."""
+        p = self.run_dir / rel_path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        return p.open("wb")
+
+    def open_read(self, rel_path: str) -> BinaryIO:
+        return (self.run_dir / rel_path).open("rb")
+
     @staticmethod
     def json_dumps(obj: object) -> str:
         return json.dumps(obj, ensure_ascii=False, indent=2) + "\n"
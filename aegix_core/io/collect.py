@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Set
+import posixpath
+import re
+import shutil
+import tarfile
+import time
+
+from aegix.io.artifacts import ArtifactWriter
+from aegix.models import ArtifactRule
+from aegix.runtime.archive import CHUNK_SIZE, IterReader
+
+ARTIFACTS_DIR = "artifacts"
+
+def collect_artifacts(backend, container_id: str, rule: ArtifactRule, writer: ArtifactWriter) -> Dict[str, Any]:
+    """
+    Copy files matching `rule.globs` out of a sandbox into artifacts/<container path>.
+
+    Each glob's literal base directory is read with one streamed backend.get_archive;
+    matching members are piped through writer.open_binary chunk by chunk, so no file
+    is ever held in memory. Files that would exceed max_bytes are skipped, collection
+    stops at max_files, and either marks the result truncated.
+    """
+    start = time.perf_counter()
+    files: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    total = 0
+    skipped = 0
+    truncated = False
+    errors: List[str] = []
+
+    for glob in rule.globs:
+        if len(files) >= rule.max_files:
+            truncated = True
+            break
+        base = glob_base(glob)
+        pattern = glob_regex(glob)
+        try:
+            chunks = backend.get_archive(container_id, base)
+        except FileNotFoundError:
+            continue  # nothing was produced there
+        except Exception as e:
+            # a glob the backend refuses (outside /workspace, API error) is a collection
+            # error, not a failed call
+            errors.append(f"{glob}: {type(e).__name__}: {e}")
+            continue
+        try:
+            with tarfile.open(fileobj=IterReader(chunks), mode="r|") as tar:
+                for member in tar:
+                    # archive members are named relative to the base's parent, like `docker cp`
+                    path = posixpath.join(posixpath.dirname(base.rstrip("/")) or "/", member.name)
+                    if not member.isfile() or path in seen or not pattern.fullmatch(path):
+                        continue
+                    seen.add(path)
+                    if len(files) >= rule.max_files:
+                        truncated = True
+                        break  # stop the transfer; nothing more can be kept
+                    if total + member.size > rule.max_bytes:
+                        skipped += 1  # a smaller file further on may still fit
+                        truncated = True
+                        continue
+                    rel = f"{ARTIFACTS_DIR}/{path.lstrip('/')}"
+                    src = tar.extractfile(member)
+                    with writer.open_binary(rel) as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                    total += member.size
+                    files.append({"path": path, "artifact": rel, "size": member.size})
+        except Exception as e:
+            errors.append(f"{glob}: {type(e).__name__}: {e}")
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # stop the transfer if we left the archive early
+
+    result: Dict[str, Any] = {
+        "globs": list(rule.globs),
+        "files": files,
+        "file_count": len(files),
+        "bytes": total,
+        "skipped": skipped,
+        "truncated": truncated,
+        "collect_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def glob_base(glob: str) -> str:
+    """Longest leading directory of `glob` without wildcards ("/workspace/out/**" -> "/workspace/out")."""
+    if not any(c in glob for c in "*?["):
+        return glob  # a plain path: fetch just that file (or tree)
+    parts = []
+    for part in glob.split("/")[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return "/".join(parts) or "/"
+
+
+def glob_regex(glob: str) -> re.Pattern:
+    """Shell-style glob over posix paths: * and ? stay within one directory, ** spans any depth."""
+    out = []
+    i = 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = glob.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile("".join(out))
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Set
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from aegix.io.artifacts import ArtifactWriter
+
+MANIFEST = "manifest.json"
+
+class BlobStore:
+    """
+    Content-addressed, gzip-compressed blob storage.
+
+    Blobs are keyed by the sha256 of their uncompressed bytes and stored once at
+    <root>/<d[:2]>/<d[2:4]>/<d>.gz, however many runs reference them.
+    """
+
+    def __init__(self, root: Path, level: int = 6) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.level = level
+
+    def writer(self, on_commit: Optional[Callable[[str, int], None]] = None) -> BlobWriter:
+        return BlobWriter(self, on_commit)
+
+    def put_bytes(self, data: bytes) -> str:
+        with self.writer() as w:
+            w.write(data)
+        return w.digest
+
+    def open(self, digest: str) -> BinaryIO:
+        """Stream a blob's uncompressed bytes; nothing is inflated up front."""
+        return gzip.open(self.path(digest), "rb")
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.gz"
+
+    def iter_digests(self) -> Iterator[str]:
+        for p in self.root.glob("*/*/*.gz"):
+            yield p.name[:-len(".gz")]
+
+    def remove(self, digest: str) -> None:
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class BlobWriter(io.RawIOBase):
+    """Hashes and compresses into a temp file; on close the blob is committed (or deduplicated)."""
+
+    def __init__(self, store: BlobStore, on_commit: Optional[Callable[[str, int], None]] = None) -> None:
+        super().__init__()
+        self.store = store
+        self.digest: Optional[str] = None
+        self.size = 0
+        self._on_commit = on_commit
+        self._hash = hashlib.sha256()
+        self._tmp = store.root / f".tmp-{uuid.uuid4().hex}"
+        self._raw = self._tmp.open("wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=store.level, mtime=0)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        self._hash.update(b)
+        self._gz.write(b)
+        self.size += len(b)
+        return len(b)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._gz.close()
+            self._raw.close()
+            self.digest = self._hash.hexdigest()
+            final = self.store.path(self.digest)
+            if final.exists():
+                self._tmp.unlink()
+                os.utime(final)  # keep recently re-used blobs clear of the GC grace window
+            else:
+                final.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(self._tmp, final)
+            if self._on_commit is not None:
+                self._on_commit(self.digest, self.size)
+        finally:
+            super().close()
+
+
+class StoreArtifactWriter(ArtifactWriter):
+    """
+    ArtifactWriter that keeps artifact bytes in a shared BlobStore.
+
+    The run directory only holds manifest.json, mapping each artifact path to the
+    blob digest and size. Reads stream back through the store.
+    """
+
+    def __init__(self, run_dir: Path, store: BlobStore) -> None:
+        super().__init__(run_dir)
+        self.store = store
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Any] = {"created_at": time.time(), "artifacts": {}}
+
+    def for_run(self, run_dir: Path) -> StoreArtifactWriter:
+        return StoreArtifactWriter(run_dir, self.store)
+
+    def write_text(self, rel_path: str, content: str) -> None:
+        with self.open_binary(rel_path) as f:
+            f.write((content or "").encode("utf-8"))
+
+    def open_binary(self, rel_path: str) -> BinaryIO:
+        return self.store.writer(on_commit=lambda digest, size: self._record(rel_path, digest, size))
+
+    def open_read(self, rel_path: str) -> BinaryIO:
+        entry = read_manifest(self.run_dir)["artifacts"][rel_path]
+        return self.store.open(entry["digest"])
+
+    def _record(self, rel_path: str, digest: str, size: int) -> None:
+        with self._lock:
+            self._manifest["artifacts"][rel_path] = {"digest": digest, "size": size}
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.run_dir / f".{MANIFEST}.tmp"
+            tmp.write_text(json.dumps(self._manifest, indent=2), encoding="utf-8")
+            os.replace(tmp, self.run_dir / MANIFEST)
+
+
+def read_manifest(run_dir: Path) -> Dict[str, Any]:
+    return json.loads((Path(run_dir) / MANIFEST).read_text(encoding="utf-8"))
+
+
+def collect_garbage(
+    store: BlobStore,
+    runs_root: Path,
+    retention_s: float,
+    grace_s: float = 3600.0,
+) -> Dict[str, int]:
+    """
+    Delete runs older than `retention_s`, then blobs no remaining run references.
+
+    Blobs younger than `grace_s` are kept even if unreferenced, so a run that is
+    still writing (its manifest not yet updated) never loses a blob. `aegix gc`
+    runs this from the command line, e.g. from cron.
+    """
+    now = time.time()
+    runs_removed = 0
+    live: Set[str] = set()
+
+    for manifest_path in Path(runs_root).glob(f"*/{MANIFEST}"):
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if now - manifest.get("created_at", now) > retention_s:
+            shutil.rmtree(manifest_path.parent, ignore_errors=True)
+            runs_removed += 1
+            continue
+        live.update(entry["digest"] for entry in manifest.get("artifacts", {}).values())
+
+    blobs_removed = 0
+    bytes_freed = 0
+    for digest in list(store.iter_digests()):
+        if digest in live:
+            continue
+        path = store.path(digest)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        if now - st.st_mtime < grace_s:
+            continue
+        store.remove(digest)
+        blobs_removed += 1
+        bytes_freed += st.st_size
+
+    for tmp in store.root.glob(".tmp-*"):
+        try:
+            if now - tmp.stat().st_mtime > grace_s:
+                tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+    return {"runs_removed": runs_removed, "blobs_removed": blobs_removed, "bytes_freed": bytes_freed}
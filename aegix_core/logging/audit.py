@@ -1,20 +1,237 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import atexit
 import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
 import time
 
+log = logging.getLogger(__name__)
+
+# none    => leave durability to the OS page cache
+# run_end => fsync when a batch carries RUN_END (or on flush/close)
+# batch   => fsync after every group commit
+FsyncPolicy = Literal["none", "run_end", "batch"]
+
+# events whose log() call blocks until they are on disk
+FLUSH_EVENTS = frozenset({"RUN_END"})
+
+_Meta = Tuple[int, str, Optional[str]]  # (ts_ns, type, run_id) - what the index keys on
+_Item = Tuple[Optional[str], Optional[threading.Event], bool, Optional[_Meta]]  # (line, done, sync, meta)
+
+def segment_paths(events_path: Path) -> List[Path]:
+    """Files of an audit log, oldest first: the unsegmented log, then events.000001.jsonl, ..."""
+    events_path = Path(events_path)
+    paths = [events_path] if events_path.exists() else []
+    return paths + [path for _, path in _numbered_segments(events_path)]
+
+
+def index_path(events_path: Path) -> Path:
+    """The SQLite sidecar index of an audit log (events.jsonl -> events.index.sqlite)."""
+    events_path = Path(events_path)
+    return events_path.with_name(f"{events_path.stem}.index.sqlite")
+
+
+def _numbered_segments(events_path: Path) -> List[Tuple[int, Path]]:
+    stem, suffix = events_path.stem, events_path.suffix
+    segments = []
+    for path in events_path.parent.glob(f"{stem}.*{suffix}"):
+        seq = path.name[len(stem) + 1:len(path.name) - len(suffix)]
+        if seq.isdigit():
+            segments.append((int(seq), path))
+    return sorted(segments)
+
+
 class AuditLogger:
-    def __init__(self, events_path: Path) -> None:
+    """
+    Appends JSON events to events.jsonl through a background writer.
+
+    log() only serialises the event and queues it; the writer keeps one open handle
+    and commits whatever has queued up in a single write. Each event carries a wall
+    clock `ts`, plus `ts_ns` and monotonic `mono_ns` for computing phase latencies.
+
+    With segment_bytes / segment_s set, events go to numbered segments next to
+    events_path (events.000001.jsonl, ...) that rotate once they reach that size
+    or age; retain_segments bounds how many are kept. With index=True the writer
+    also records every event's location in an AuditIndex (events.index.sqlite),
+    in the same group commit, for run_id / type / time lookups.
+    """
+
+    def __init__(
+        self,
+        events_path: Path,
+        fsync: FsyncPolicy = "run_end",
+        max_batch: int = 1024,
+        segment_bytes: Optional[int] = None,
+        segment_s: Optional[float] = None,
+        retain_segments: Optional[int] = None,
+        index: bool = False,
+    ) -> None:
+        if fsync not in ("none", "run_end", "batch"):
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        if retain_segments is not None and retain_segments < 1:
+            raise ValueError(f"Invalid retain_segments: {retain_segments}")
         self.events_path = events_path
         self.events_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self.segment_bytes = segment_bytes
+        self.segment_s = segment_s
+        self.retain_segments = retain_segments
+        self.segmented = segment_bytes is not None or segment_s is not None
+
+        self.index = None
+        if index:
+            from aegix.logging.index import AuditIndex
+            self.index = AuditIndex(index_path(events_path))
+            self.index.catch_up(segment_paths(events_path))  # lines written while nothing indexed them
+
+        self._lock = threading.Lock()  # guards _closed and the fallback path
+        self._closed = False
+        self._queue: "queue.SimpleQueue[_Item]" = queue.SimpleQueue()
+        self._open_segment()
+        self._writer = threading.Thread(target=self._run_writer, name="aegix-audit", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def log(self, event_type: str, data: Dict[str, Any]) -> None:
         event = {
-            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "ts": datetime.now().astimezone().isoformat(timespec="microseconds"),
+            "ts_ns": time.time_ns(),
+            "mono_ns": time.monotonic_ns(),
             "type": event_type,
             "data": data or {},
         }
-        with self.events_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        run_id = event["data"].get("run_id")
+        meta = (event["ts_ns"], event_type, run_id if isinstance(run_id, str) else None)
+
+        with self._lock:
+            if self._closed:
+                # late events after shutdown: append synchronously (catch_up() indexes them)
+                with self._path.open("a", encoding="utf-8") as f:
+                    f.write(line)
+                return
+            if event_type not in FLUSH_EVENTS:
+                self._queue.put((line, None, False, meta))
+                return
+            done = threading.Event()
+            self._queue.put((line, done, self.fsync != "none", meta))
+        done.wait()
+
+    def flush(self) -> None:
+        """Block until every event queued so far is written (and fsynced unless fsync='none')."""
+        with self._lock:
+            if self._closed:
+                return
+            done = threading.Event()
+            self._queue.put((None, done, self.fsync != "none", None))
+        done.wait()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put((None, None, False, None))  # stop marker
+        self._writer.join()
+        self._file.close()
+        if self.index is not None:
+            self.index.close()
+        atexit.unregister(self.close)
+
+    # ---------------- writer ----------------
+
+    def _run_writer(self) -> None:
+        while True:
+            batch: List[_Item] = [self._queue.get()]
+            # group commit: take everything that queued up while we were writing
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(line is None and done is None for line, done, _, _ in batch)
+            try:
+                self._commit(batch)
+            except (OSError, sqlite3.Error) as e:
+                # never wedge callers waiting on RUN_END; report and keep going
+                log.error("audit write failed: %s", e)
+            finally:
+                for _, done, _, _ in batch:
+                    if done is not None:
+                        done.set()
+            if stop:
+                return
+
+    def _commit(self, batch: List[_Item]) -> None:
+        if self.segmented and self._offset > 0 and self._segment_full():
+            self._rotate()
+
+        chunks: List[bytes] = []
+        rows = []
+        offset = self._offset
+        for line, _, _, meta in batch:
+            if not line:
+                continue
+            raw = line.encode("utf-8")
+            chunks.append(raw)
+            rows.append((offset, len(raw), *meta))
+            offset += len(raw)
+        if chunks:
+            self._file.write(b"".join(chunks))
+            self._offset = offset
+        self._file.flush()
+        if self.fsync == "batch" or any(sync for _, _, sync, _ in batch):
+            os.fsync(self._file.fileno())
+        if self.index is not None:
+            # after the write: an event is never indexed before it is readable
+            self.index.add(self._path.name, rows)
+
+    # ---------------- segments ----------------
+
+    def _open_segment(self) -> None:
+        if not self.segmented:
+            self._path = self.events_path
+        else:
+            # continue the newest segment unless it is already full
+            segments = _numbered_segments(self.events_path)
+            self._seq = segments[-1][0] if segments else 1
+            if segments and self.segment_bytes is not None and segments[-1][1].stat().st_size >= self.segment_bytes:
+                self._seq += 1
+            self._path = self._segment_path(self._seq)
+        self._file = self._path.open("ab")
+        self._offset = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.events_path.with_name(f"{self.events_path.stem}.{seq:06d}{self.events_path.suffix}")
+
+    def _segment_full(self) -> bool:
+        if self.segment_bytes is not None and self._offset >= self.segment_bytes:
+            return True
+        return self.segment_s is not None and time.monotonic() - self._opened_at >= self.segment_s
+
+    def _rotate(self) -> None:
+        if self.fsync != "none":
+            os.fsync(self._file.fileno())  # a closed segment is complete on disk
+        self._file.close()
+        self._seq += 1
+        self._path = self._segment_path(self._seq)
+        self._file = self._path.open("ab")
+        self._offset = 0
+        self._opened_at = time.monotonic()
+
+        if self.retain_segments is not None:
+            for _, old in _numbered_segments(self.events_path)[:-self.retain_segments]:
+                if self.index is not None:
+                    self.index.drop_segment(old.name)
+                old.unlink(missing_ok=True)
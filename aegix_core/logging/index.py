@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import json
+import sqlite3
+import threading
+
+# one row per event: where its line lives, plus the fields lookups filter on
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    run_id TEXT,
+    PRIMARY KEY (segment, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_by_run ON events (run_id, ts_ns);
+CREATE INDEX IF NOT EXISTS events_by_type ON events (type, ts_ns);
+CREATE INDEX IF NOT EXISTS events_by_ts ON events (ts_ns);
+"""
+
+# (offset, length, ts_ns, type, run_id) of one line within a segment
+IndexRow = Tuple[int, int, int, str, Optional[str]]
+
+class AuditIndex:
+    """
+    SQLite sidecar index over audit log segments.
+
+    Maps (run_id, type, ts_ns) to the segment and byte offset of each event line, so
+    lookups read only the matching lines instead of scanning the log. Rows are
+    keyed by (segment, offset): re-indexing a range that is already indexed is a
+    no-op, which makes catch_up() safe to run next to a live writer.
+    """
+
+    def __init__(self, index_path: Path) -> None:
+        self.index_path = Path(index_path)
+        self.log_dir = self.index_path.parent
+        self._lock = threading.Lock()
+        self._segment_ids: Dict[str, int] = {}
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # the log is the source of truth; catch_up() repairs
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(_SCHEMA)
+
+    def add(self, segment: str, rows: Sequence[IndexRow]) -> None:
+        """Index lines appended to `segment` (one transaction per call)."""
+        if not rows:
+            return
+        with self._lock:
+            seg_id = self._segment_id(segment)
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO events (segment, offset, length, ts_ns, type, run_id) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(seg_id, *row) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def drop_segment(self, segment: str) -> None:
+        with self._lock:
+            row = self._db.execute("SELECT id FROM segments WHERE name = ?", (segment,)).fetchone()
+            if row is None:
+                return
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM events WHERE segment = ?", (row[0],))
+            self._db.execute("DELETE FROM segments WHERE id = ?", (row[0],))
+            self._db.execute("COMMIT")
+            self._segment_ids.pop(segment, None)
+
+    def catch_up(self, segments: Iterable[Path]) -> int:
+        """Index whatever the segments hold past their last indexed line. Returns events added."""
+        added = 0
+        for path in segments:
+            with self._lock:
+                seg_id = self._segment_id(path.name)
+                end = self._db.execute(
+                    "SELECT MAX(offset + length) FROM events WHERE segment = ?", (seg_id,)
+                ).fetchone()[0] or 0
+            rows: List[IndexRow] = []
+            with path.open("rb") as f:
+                f.seek(end)
+                offset = end
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # a write in progress; the next catch_up gets it
+                    row = _row(line, offset)
+                    if row is not None:
+                        rows.append(row)
+                    offset += len(line)
+                    if len(rows) >= 10_000:
+                        self.add(path.name, rows)
+                        added += len(rows)
+                        rows = []
+            self.add(path.name, rows)
+            added += len(rows)
+        return added
+
+    def query(
+        self,
+        run_id: Optional[str] = None,
+        types: Sequence[str] = (),
+        since_ns: Optional[int] = None,
+        until_ns: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Events matching every given filter, oldest first."""
+        where, params = _where(run_id, types, since_ns, until_ns)
+        sql = (
+            "SELECT s.name, e.offset, e.length FROM events e JOIN segments s ON s.id = e.segment"
+            f"{where} ORDER BY e.ts_ns, e.segment, e.offset"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            locations = self._db.execute(sql, params).fetchall()
+
+        handles: Dict[str, Any] = {}
+        try:
+            for name, offset, length in locations:
+                f = handles.get(name)
+                if f is None:
+                    try:
+                        f = handles[name] = (self.log_dir / name).open("rb")
+                    except FileNotFoundError:
+                        continue  # segment deleted by retention after the lookup
+                f.seek(offset)
+                yield json.loads(f.read(length))
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def count(
+        self,
+        run_id: Optional[str] = None,
+        types: Sequence[str] = (),
+        since_ns: Optional[int] = None,
+        until_ns: Optional[int] = None,
+    ) -> int:
+        where, params = _where(run_id, types, since_ns, until_ns)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM events e{where}", params).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ---------------- helpers ----------------
+
+    def _segment_id(self, name: str) -> int:
+        seg_id = self._segment_ids.get(name)
+        if seg_id is None:
+            self._db.execute("INSERT OR IGNORE INTO segments (name) VALUES (?)", (name,))
+            seg_id = self._db.execute("SELECT id FROM segments WHERE name = ?", (name,)).fetchone()[0]
+            self._segment_ids[name] = seg_id
+        return seg_id
+
+
+def _where(
+    run_id: Optional[str],
+    types: Sequence[str],
+    since_ns: Optional[int],
+    until_ns: Optional[int],
+) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    if run_id is not None:
+        clauses.append("e.run_id = ?")
+        params.append(run_id)
+    if types:
+        clauses.append(f"e.type IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if since_ns is not None:
+        clauses.append("e.ts_ns >= ?")
+        params.append(since_ns)
+    if until_ns is not None:
+        clauses.append("e.ts_ns < ?")
+        params.append(until_ns)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _row(line: bytes, offset: int) -> Optional[IndexRow]:
+    try:
+        event = json.loads(line)
+        data = event.get("data") or {}
+        return (offset, len(line), int(event["ts_ns"]), str(event["type"]), data.get("run_id"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None  # not an event line (e.g. torn by a crash); skipped, not fatal
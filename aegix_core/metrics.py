@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import threading
+import time
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# seconds; dense at the low end where Aegix's own overhead lives
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+LabelKey = Tuple[str, str, str, str]  # (phase, tool_name, image, outcome)
+
+class Histogram:
+    """Fixed-bucket histogram; constant memory however many values are observed."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: Histogram) -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding the q-th value."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lo  # +Inf bucket: best we can say is "at least"
+                hi = self.buckets[i]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class PhaseTimer:
+    """Collects per-phase wall durations (seconds) for one run."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def elapsed(self) -> float:
+        """Wall time since the run started; phases can overlap, so this is not their sum."""
+        return time.perf_counter() - self.started
+
+    def finish(self) -> None:
+        self.durations["total"] = self.elapsed()
+
+    def as_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.durations.items()}
+
+
+class MetricsRegistry:
+    """Per-phase latency histograms labelled by tool_name, image and outcome."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._hists: Dict[LabelKey, Histogram] = {}
+
+    def observe(self, phase: str, seconds: float, tool_name: str, image: str, outcome: str) -> None:
+        key = (phase, tool_name or "", image or "", outcome)
+        with self._lock:
+            hist = self._hists.get(key)
+            if hist is None:
+                hist = self._hists[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def observe_run(self, timer: PhaseTimer, tool_name: str, image: str, outcome: str) -> None:
+        for phase, seconds in timer.durations.items():
+            self.observe(phase, seconds, tool_name, image, outcome)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(key, hist.counts[:], hist.count, hist.sum) for key, hist in self._hists.items()]
+
+        out = []
+        for (phase, tool_name, image, outcome), counts, count, total in sorted(items):
+            hist = Histogram(self.buckets)
+            hist.counts, hist.count, hist.sum = counts, count, total
+            out.append({
+                "phase": phase,
+                "tool_name": tool_name,
+                "image": image,
+                "outcome": outcome,
+                "count": count,
+                "sum_s": total,
+                "p50_s": hist.quantile(0.50),
+                "p99_s": hist.quantile(0.99),
+            })
+        return out
+
+    def render_prometheus(self) -> str:
+        name = "aegix_phase_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of each ToolRouter phase.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            items = sorted((key, hist.counts[:], hist.count, hist.sum) for key, hist in self._hists.items())
+
+        for (phase, tool_name, image, outcome), counts, count, total in items:
+            labels = (
+                f'phase="{_escape(phase)}",tool_name="{_escape(tool_name)}",'
+                f'image="{_escape(image)}",outcome="{_escape(outcome)}"'
+            )
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {total:.9f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+    """Serve GET /metrics (Prometheus text) and GET /metrics.json (snapshot) on a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                body = registry.render_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.snapshot()).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # scrapes are not worth a stderr line each
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="aegix-metrics", daemon=True).start()
+    return server
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
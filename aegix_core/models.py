@@ -11,6 +11,7 @@ class Limits:
     cpu: float = 1.0
     mem_mb: int = 512
     pids: int = 256
+    max_output_bytes: int = 16 * 1024 * 1024  # stdout + stderr persisted per run
     
     def merged(self, override: Optional[Dict[str, Any]]) -> Limits:
         if not override:
@@ -20,6 +21,7 @@ class Limits:
             cpu=float(override.get("cpu", self.cpu)),
             mem_mb=int(override.get("mem_mb", self.mem_mb)),
             pids=int(override.get("pids", self.pids)),
+            max_output_bytes=int(override.get("max_output_bytes", self.max_output_bytes)),
         )
 
 @dataclass(frozen=True)
@@ -27,6 +29,12 @@ class FSRule:
     write_paths: List[str] = field(default_factory=lambda: ["/workspace"])
     read_only_paths: List[str] = field(default_factory=list)
 
+@dataclass(frozen=True)
+class ArtifactRule:
+    globs: List[str] = field(default_factory=list)  # container paths, e.g. "/workspace/out/**/*.json"
+    max_bytes: int = 64 * 1024 * 1024  # per run, across all collected files
+    max_files: int = 256
+
 @dataclass(frozen=True)
 class ToolCall:
     """Structural call made from LLM/Orchestrator"""
@@ -35,6 +43,7 @@ class ToolCall:
     image: Optional[str] = None
     env: Dict[str, str] = field(default_factory=dict)
     cwd: str = "/workspace"
+    workspace: Optional[str] = None  # host directory backing /workspace
 
 @dataclass(frozen=True)
 class ToolContext:
@@ -48,6 +57,8 @@ class AdjustedPolicy:
     network_mode: NetworkMode
     env_allowlist: Optional[List[str]]
     fs_rules: FSRule
+    backend: str = "docker"  # which sandbox backend runs the call
+    artifacts: ArtifactRule = field(default_factory=ArtifactRule)  # files collected after exec
 
 @dataclass(frozen=True)
 class PolicyDecision:
@@ -55,3 +66,4 @@ class PolicyDecision:
     reason: str
     adjusted: AdjustedPolicy
     redactions: Dict[str, Any] = field(default_factory=dict)
+    policy_version: Optional[str] = None  # PolicySnapshot.version that made the decision
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-import json, re, yaml
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib, json, os, re, threading
 
 from aegix.models import (
-    AdjustedPolicy, FSRule, Limits, NetworkMode, PolicyDecision, ToolCall, ToolContext
+    AdjustedPolicy, ArtifactRule, FSRule, Limits, NetworkMode, PolicyDecision, ToolCall, ToolContext
 )
 
+BACKENDS = ("docker", "process")
+
 @dataclass(frozen=True)
 class PolicyConfig:
     version: int = 1
@@ -31,10 +34,23 @@ class PolicyConfig:
     # env
     env_allowlist: Optional[List[str]] = None  # None = allow all passed env keys (not recommended later)
 
+    # backend ("docker" | "process"), selectable per tool
+    default_backend: str = "docker"
+    per_tool_backend: Dict[str, str] = field(default_factory=dict)
+
+    # artifacts collected from the sandbox after exec; per_tool globs add to the common ones
+    artifacts: ArtifactRule = field(default_factory=ArtifactRule)
+    per_tool_artifacts: Dict[str, List[str]] = field(default_factory=dict)
+
 
 def load_policy(path: str | Path) -> PolicyConfig:
-    p = Path(path)
-    data = yaml.safe_load(p.read_text()) or {}
+    return parse_policy(Path(path).read_text())
+
+
+def parse_policy(text: str) -> PolicyConfig:
+    import yaml  # only paid by callers that actually load a policy
+
+    data = yaml.safe_load(text) or {}
 
     commands = data.get("commands", {}) or {}
     network = data.get("network", {}) or {}
@@ -43,6 +59,8 @@ def load_policy(path: str | Path) -> PolicyConfig:
 
     default_limits = limits.get("default", {}) or {}
     per_tool = limits.get("per_tool", {}) or {}
+    backend = data.get("backend", {}) or {}
+    artifacts = data.get("artifacts", {}) or {}
 
     cfg = PolicyConfig(
         version=int(data.get("version", 1)),
@@ -59,16 +77,29 @@ def load_policy(path: str | Path) -> PolicyConfig:
             cpu=float(default_limits.get("cpu", 1.0)),
             mem_mb=int(default_limits.get("mem_mb", 512)),
             pids=int(default_limits.get("pids", 256)),
+            max_output_bytes=int(default_limits.get("max_output_bytes", 16 * 1024 * 1024)),
         ),
         per_tool_limits=dict(per_tool),
         env_allowlist=data.get("env", {}).get("allowlist") if isinstance(data.get("env", {}), dict) else None,
+        default_backend=str(backend.get("default", "docker")),
+        per_tool_backend={str(k): str(v) for k, v in (backend.get("per_tool", {}) or {}).items()},
+        artifacts=ArtifactRule(
+            globs=list(artifacts.get("globs", []) or []),
+            max_bytes=int(artifacts.get("max_bytes", 64 * 1024 * 1024)),
+            max_files=int(artifacts.get("max_files", 256)),
+        ),
+        per_tool_artifacts={str(k): list(v or []) for k, v in (artifacts.get("per_tool", {}) or {}).items()},
     )
     _validate_policy(cfg)
     return cfg
 
 
 def dump_effective_policy(cfg: PolicyConfig, out_path: str | Path) -> None:
-    out = {
+    Path(out_path).write_text(json.dumps(effective_policy(cfg), indent=2, sort_keys=True))
+
+
+def effective_policy(cfg: PolicyConfig) -> Dict[str, Any]:
+    return {
         "version": cfg.version,
         "commands": {
             "deny_cmd_patterns": cfg.deny_cmd_patterns,
@@ -89,64 +120,332 @@ def dump_effective_policy(cfg: PolicyConfig, out_path: str | Path) -> None:
         "env": {
             "allowlist": cfg.env_allowlist,
         },
+        "backend": {
+            "default": cfg.default_backend,
+            "per_tool": cfg.per_tool_backend,
+        },
+        "artifacts": {
+            "globs": cfg.artifacts.globs,
+            "per_tool": cfg.per_tool_artifacts,
+            "max_bytes": cfg.artifacts.max_bytes,
+            "max_files": cfg.artifacts.max_files,
+        },
     }
-    Path(out_path).write_text(json.dumps(out, indent=2, sort_keys=True))
+
+
+def policy_digest(cfg: PolicyConfig) -> str:
+    """Stable id of the effective policy: v<version>-<sha256 prefix>."""
+    raw = json.dumps(effective_policy(cfg), sort_keys=True).encode("utf-8")
+    return f"v{cfg.version}-{hashlib.sha256(raw).hexdigest()[:12]}"
 
 
 def _validate_policy(cfg: PolicyConfig) -> None:
     if cfg.network_mode not in ("none", "bridge", "host", "allowlist"):
         raise ValueError(f"Invalid network_mode: {cfg.network_mode}")
+    for backend in [cfg.default_backend, *cfg.per_tool_backend.values()]:
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}")
+    for glob in [*cfg.artifacts.globs, *(g for globs in cfg.per_tool_artifacts.values() for g in globs)]:
+        if not str(glob).startswith("/"):
+            raise ValueError(f"Artifact glob must be an absolute container path: {glob}")
     # regex compile check (fail fast)
     for pattern in cfg.deny_cmd_patterns + cfg.allow_cmd_patterns:
         re.compile(pattern)
 
 
+try:  # the regex parser moved under re in 3.11
+    import re._parser as _sre_parse
+    import re._constants as _sre
+except ImportError:  # pragma: no cover - python 3.10
+    import sre_parse as _sre_parse
+    import sre_constants as _sre
+
+_WORD = re.compile(r"\w+")
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+_EDGE_ATS = {_sre.AT_BOUNDARY, _sre.AT_BEGINNING, _sre.AT_BEGINNING_STRING, _sre.AT_END, _sre.AT_END_STRING}
+_NON_WORD_CATEGORIES = {_sre.CATEGORY_SPACE, _sre.CATEGORY_NOT_WORD}
+
+
+def _is_word_literal(item: Tuple[Any, Any]) -> bool:
+    op, av = item
+    return op is _sre.LITERAL and chr(av) in _WORD_CHARS
+
+
+def _is_word_edge(item: Tuple[Any, Any]) -> bool:
+    """True if `item` can only match where a \\w+ token starts or ends."""
+    op, av = item
+    if op is _sre.AT:
+        return av in _EDGE_ATS
+    if op is _sre.LITERAL:
+        return chr(av) not in _WORD_CHARS
+    if op is _sre.IN:
+        return all(
+            (o is _sre.CATEGORY and a in _NON_WORD_CATEGORIES) or (o is _sre.LITERAL and chr(a) not in _WORD_CHARS)
+            for o, a in av
+        )
+    if op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+        lo, _, sub = av
+        return lo >= 1 and len(sub) == 1 and _is_word_edge(sub[0])
+    return False
+
+
+def _required_word(pattern: str) -> Optional[str]:
+    """
+    The longest literal word a pattern can only match as a whole \\w+ token, e.g.
+    "sudo" for r"(?i)\\bsudo\\b" or "pip" for r"\\bpip\\s+install\\b". None if there is none.
+    """
+    try:
+        items = list(_sre_parse.parse(pattern))
+    except Exception:
+        return None
+
+    best: Optional[str] = None
+    i = 0
+    while i < len(items):
+        if not _is_word_literal(items[i]):
+            i += 1
+            continue
+        j = i
+        while j < len(items) and _is_word_literal(items[j]):
+            j += 1
+        # top-level items are all required, so a bounded run must be a full token
+        if i > 0 and j < len(items) and _is_word_edge(items[i - 1]) and _is_word_edge(items[j]):
+            word = "".join(chr(av) for _, av in items[i:j]).lower()
+            if best is None or len(word) > len(best):
+                best = word
+        i = j
+    return best
+
+
+class PatternSet:
+    """
+    Matches a list of regexes with a single tokenising pass over the input.
+
+    Each pattern is indexed by a literal word it requires as a whole token (most
+    deny rules look like r"\\bsudo\\b"). A command is split into tokens once and only
+    patterns whose word occurs, plus the few without one, are run. The result is
+    the same as trying every pattern in order, at a cost that tracks the number
+    of candidate patterns rather than the size of the list.
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(p) for p in self.patterns]
+        self._by_word: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+
+        for i, pattern in enumerate(self.patterns):
+            word = _required_word(pattern)
+            if word is None:
+                self._unindexed.append(i)
+            else:
+                self._by_word.setdefault(word, []).append(i)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def search(self, text: str) -> Optional[str]:
+        """Return the first pattern (in list order) that matches `text`, or None."""
+        if not text.isascii():
+            # the token index relies on ASCII case folding; check everything
+            candidates: List[int] = list(range(len(self._compiled)))
+        else:
+            hits = set(self._unindexed)
+            for token in set(_WORD.findall(text.lower())):
+                hits.update(self._by_word.get(token, ()))
+            candidates = sorted(hits)
+
+        for i in candidates:
+            if self._compiled[i].search(text):
+                return self.patterns[i]
+        return None
+
+
+@dataclass(frozen=True)
+class PolicySnapshot:
+    """Immutable, precompiled view of one PolicyConfig; swapped whole on reload."""
+    version: str
+    cfg: PolicyConfig
+    default_adjusted: AdjustedPolicy
+    per_tool: Dict[str, AdjustedPolicy]
+    deny: PatternSet
+    allow: PatternSet
+    static_deny_reason: Optional[str] = None  # config-level denial, independent of cmd
+
+    @classmethod
+    def build(cls, cfg: PolicyConfig, version: Optional[str] = None) -> PolicySnapshot:
+        def adjusted(tool: Optional[str]) -> AdjustedPolicy:
+            return AdjustedPolicy(
+                limits=cfg.default_limits.merged(cfg.per_tool_limits.get(tool)) if tool else cfg.default_limits,
+                network_mode=cfg.network_mode,
+                env_allowlist=cfg.env_allowlist,
+                fs_rules=cfg.fs_rules,
+                backend=cfg.per_tool_backend.get(tool, cfg.default_backend) if tool else cfg.default_backend,
+                artifacts=ArtifactRule(
+                    globs=[*cfg.artifacts.globs, *cfg.per_tool_artifacts.get(tool, [])],
+                    max_bytes=cfg.artifacts.max_bytes,
+                    max_files=cfg.artifacts.max_files,
+                ) if tool in cfg.per_tool_artifacts else cfg.artifacts,
+            )
+
+        static_deny_reason = None
+        if cfg.network_mode == "allowlist" and not cfg.network_allowlist:
+            static_deny_reason = "Denied: network allowlist mode but allowlist is empty"
+
+        return cls(
+            version=version or policy_digest(cfg),
+            cfg=cfg,
+            default_adjusted=adjusted(None),
+            per_tool={
+                tool: adjusted(tool)
+                for tool in {*cfg.per_tool_limits, *cfg.per_tool_backend, *cfg.per_tool_artifacts}
+            },
+            deny=PatternSet(cfg.deny_cmd_patterns),
+            allow=PatternSet(cfg.allow_cmd_patterns),
+            static_deny_reason=static_deny_reason,
+        )
+
+    def adjusted_for(self, tool_name: str) -> AdjustedPolicy:
+        return self.per_tool.get(tool_name, self.default_adjusted)
+
+
 class PolicyEngine:
-    def __init__(self, cfg: PolicyConfig):
-        self.cfg = cfg
-        self._deny_res = [re.compile(p) for p in cfg.deny_cmd_patterns]
-        self._allow_res = [re.compile(p) for p in cfg.allow_cmd_patterns] if cfg.allow_cmd_patterns else []
-    
+    def __init__(self, cfg: PolicyConfig, cache_size: int = 4096):
+        self._snapshot = PolicySnapshot.build(cfg)
+
+        # decisions depend only on (snapshot version, tool_name, cmd)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, str], PolicyDecision]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # hot reload
+        self.path: Optional[Path] = None
+        self.last_reload_error: Optional[str] = None
+        self._file_sig: Optional[Tuple[int, int]] = None
+        self._watch_stop: Optional[threading.Event] = None
+        self._watch_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_file(cls, path: str | Path, watch: bool = False, poll_interval_s: float = 2.0, cache_size: int = 4096) -> PolicyEngine:
+        p = Path(path)
+        sig = _file_signature(p)
+        engine = cls(load_policy(p), cache_size=cache_size)
+        engine.path = p
+        engine._file_sig = sig
+        if watch:
+            engine.watch(poll_interval_s)
+        return engine
+
+    @property
+    def cfg(self) -> PolicyConfig:
+        return self._snapshot.cfg
+
+    @property
+    def snapshot(self) -> PolicySnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
     def evaluate(self, call: ToolCall, ctx: ToolContext) -> PolicyDecision:
-        limits = self.cfg.default_limits.merged(self.cfg.per_tool_limits.get(call.tool_name))
-        
-        adjusted = AdjustedPolicy(
-            limits=limits,
-            network_mode=self.cfg.network_mode,
-            env_allowlist=self.cfg.env_allowlist,
-            fs_rules=self.cfg.fs_rules,
-        )
+        # one attribute read: an in-flight evaluation keeps using the snapshot it started with
+        snapshot = self._snapshot
+        if self.cache_size <= 0:
+            return self._evaluate(snapshot, call)
 
-        for r in self._deny_res:
-            if r.search(call.cmd or ""):
-                return PolicyDecision(
-                    allow=False,
-                    reason=f"Denied by pattern: {r.pattern}",
-                    adjusted=adjusted,
-                    redactions={},
-                )
-        
-        if self._allow_res:
-            ok = any(r.research(call.cmd or "") for r in self._allow_res)
-            if not ok:
-                return PolicyDecision(
-                    allow=False,
-                    reason="Denied: command not in allowlist",
-                    adjusted=adjusted,
-                    redactions={},
-                )
-        
-        if self.cfg.network_mode == "allowlist" and not self.cfg.network_allowlist:
+        key = (snapshot.version, call.tool_name, call.cmd or "")
+        with self._cache_lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                return decision
+
+        decision = self._evaluate(snapshot, call)
+        with self._cache_lock:
+            self._cache[key] = decision
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return decision
+
+    # ---------------- hot reload ----------------
+
+    def swap(self, cfg: PolicyConfig) -> bool:
+        """Atomically replace the active snapshot. Returns False if nothing changed."""
+        _validate_policy(cfg)
+        snapshot = PolicySnapshot.build(cfg)
+        if snapshot.version == self._snapshot.version:
+            return False
+        self._snapshot = snapshot
+        with self._cache_lock:
+            self._cache.clear()
+        return True
+
+    def reload(self) -> bool:
+        """Re-read the policy file if it changed; a bad file keeps the current snapshot."""
+        if self.path is None:
+            raise ValueError("PolicyEngine was not loaded from a file")
+        try:
+            sig = _file_signature(self.path)
+            if sig == self._file_sig:
+                return False
+            cfg = load_policy(self.path)
+            self._file_sig = sig
+            changed = self.swap(cfg)
+        except Exception as e:
+            self.last_reload_error = f"{type(e).__name__}: {e}"
+            return False
+        self.last_reload_error = None
+        return changed
+
+    def watch(self, poll_interval_s: float = 2.0) -> None:
+        if self._watch_thread is not None:
+            return
+        stop = threading.Event()
+
+        def _poll() -> None:
+            while not stop.wait(poll_interval_s):
+                self.reload()
+
+        self._watch_stop = stop
+        self._watch_thread = threading.Thread(target=_poll, name="aegix-policy-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_thread.join()
+        self._watch_stop = None
+        self._watch_thread = None
+
+    # ---------------- helpers ----------------
+
+    def _evaluate(self, snapshot: PolicySnapshot, call: ToolCall) -> PolicyDecision:
+        adjusted = snapshot.adjusted_for(call.tool_name)
+
+        def decide(allow: bool, reason: str) -> PolicyDecision:
             return PolicyDecision(
-                allow=False,
-                reason="Denied: network allowlist mode but allowlist is empty",
+                allow=allow,
+                reason=reason,
                 adjusted=adjusted,
                 redactions={},
+                policy_version=snapshot.version,
             )
+
+        cmd = call.cmd or ""
+        denied_by = snapshot.deny.search(cmd)
+        if denied_by is not None:
+            return decide(False, f"Denied by pattern: {denied_by}")
         
-        return PolicyDecision(
-            allow=True,
-            reason="Allowed",
-            adjusted=adjusted,
-            redactions={},
-        )
+        if snapshot.allow and snapshot.allow.search(cmd) is None:
+            return decide(False, "Denied: command not in allowlist")
+        
+        if snapshot.static_deny_reason:
+            return decide(False, snapshot.static_deny_reason)
+        
+        return decide(True, "Allowed")
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
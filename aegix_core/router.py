@@ -1,18 +1,36 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+import threading
+import re
 import time
 import uuid
 
+from aegix.cache import ResultCache
 from aegix.io.artifacts import ArtifactWriter
+from aegix.io.collect import collect_artifacts
 from aegix.logging.audit import AuditLogger
-from aegix.runtime.docker_backend import DockerBackend, ExecResult
+from aegix.metrics import MetricsRegistry, PhaseTimer
+from aegix.runtime.docker_backend import DockerBackend, ExecCancelled, ExecInterrupted, ExecResult
+from aegix.runtime.images import ImageManager, ImageNotReady, ResolvedImage
+from aegix.runtime.snapshots import Snapshot, SnapshotError, SnapshotStore
+from aegix.runtime.usage import UsageSampler
+from aegix.admission import AdmissionController, AdmissionError, Ticket
 
 # from aegix.models import ToolCall, ToolContext
 from aegix.policy import PolicyEngine
 from aegix.errors import AegixError
+from aegix.sessions import Session, SessionError, SessionManager
+from aegix.workspace import WorkspaceHasher, WorkspaceSyncer
+
+if TYPE_CHECKING:
+    import asyncio  # imported where used: only async callers pay for it
+
+TAIL_CHARS = 2000
+_RUN_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
 
 
 @dataclass
@@ -21,17 +39,167 @@ class ToolResult:
     exec_result: Optional[ExecResult] = None
     error: Optional[AegixError] = None
 
+    @property
+    def stderr_tail(self) -> str:
+        if self.exec_result is None:
+            return self.error.message if self.error else ""
+        return (self.exec_result.stderr or "")[-TAIL_CHARS:]
+
+
+@dataclass
+class _Run:
+    """Per-call state threaded through handle()."""
+    artifacts: ArtifactWriter
+    timer: PhaseTimer
+    report: Dict[str, Any] = field(default_factory=dict)  # extra report.json sections
+    cancel: Optional[threading.Event] = None  # set by the caller to abort the run
+    started_at: float = field(default_factory=time.time)  # epoch seconds
+
 
 class ToolRouter:
-    def __init__(self, policy_engine: PolicyEngine, backend: DockerBackend, auditor: AuditLogger, artifacts: ArtifactWriter, default_image: str = "python:3.11-slim"):
+    def __init__(
+        self,
+        policy_engine: PolicyEngine,
+        backend: DockerBackend,
+        auditor: AuditLogger,
+        artifacts: ArtifactWriter,
+        default_image: str = "python:3.11-slim",
+        max_workers: int = 32,
+        max_concurrency: Optional[int] = None,
+        per_image_concurrency: Optional[Dict[str, int]] = None,
+        stream_output: bool = True,
+        result_cache: Optional[ResultCache] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        backends: Optional[Dict[str, Any]] = None,
+        sessions: Optional[SessionManager] = None,
+        images: Optional[ImageManager] = None,
+        image_wait_s: float = 300.0,
+        admission: Optional[AdmissionController] = None,
+        usage_interval_s: Optional[float] = None,
+        snapshots: Optional[SnapshotStore] = None,
+    ):
         self.policy = policy_engine
         self.backend = backend
+        # sandbox backends by name, picked per call from AdjustedPolicy.backend;
+        # `backend` serves "docker" unless overridden here
+        self.backends: Dict[str, Any] = {"docker": backend, **(backends or {})}
+        # opt-in: calls sharing ctx.metadate["session_id"] reuse one sandbox and its
+        # /workspace; calls without one get a throwaway sandbox, destroyed at RUN_END
+        self.sessions = sessions
+        # docker runs are pinned to the image id a tag resolves to; images still being
+        # pulled are rejected (handle) or awaited for up to image_wait_s (handle_async)
+        self.images = images
+        self.image_wait_s = image_wait_s
+        # per-actor rate limits / quotas; held from sandbox create until teardown.
+        # Guards sandbox work only: denied calls and result-cache hits never reach it
+        self.admission = admission
+        # opt-in: sample sandbox cpu / memory / pids / io during exec (backends with usage()),
+        # for `aegix advise`. Each call then waits on its final usage() round-trip
+        self.usage_interval_s = usage_interval_s
+        # ctx.metadate["snapshot"] = name starts the sandbox from a prepared snapshot
+        # instead of call.image; reset_session() rolls a session back to it
+        self.snapshots = snapshots
         self.auditor = auditor
         self.artifacts = artifacts
         self.default_image = default_image
-
-    def handle(self, call, ctx, run_dir: Path) -> ToolResult:
+        # stream stdout/stderr straight into the run dir when the backend supports it
+        self.stream_output = stream_output
+        # opt-in: successful runs are reused for identical calls; pass
+        # ctx.metadate["cache"] = False for commands with side effects
+        self.result_cache = result_cache
+        self._workspace_hasher = WorkspaceHasher()
+        # call.workspace is copied into /workspace: in full on a fresh sandbox,
+        # only changed files on later calls of a session
+        self.workspace_syncer = WorkspaceSyncer(self._workspace_hasher)
+        # per-phase latency histograms; expose with aegix.metrics.start_metrics_server
+        self.metrics = metrics or MetricsRegistry()
+
+        # async path: blocking handle() calls run on a bounded executor, gated by
+        # a global limit and optional per-image limits (queued callers just await).
+        # The executor is sized to the limit: a smaller pool would cap it silently
+        self.max_concurrency = max_concurrency or max_workers
+        self.per_image_concurrency = dict(per_image_concurrency or {})
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="aegix-router")
+        # artifact collection overlaps sandbox teardown; separate pool so it can't starve handle()
+        self._collector = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aegix-collect")
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_sem: Optional[asyncio.Semaphore] = None
+        self._image_sems: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async(
+        self,
+        call,
+        ctx,
+        run_dir: Optional[Path] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ToolResult:
+        """
+        Awaitable handle(). Cancelling the awaiting task also cancels the call:
+        the running command is killed and its worker thread freed.
+        """
+        import asyncio
+        image = getattr(call, "image", None) or self.default_image
+        if self.images is not None and self._uses_images(call) and not self._snapshot_name(ctx):
+            await self.images.wait_ready(image, self.image_wait_s)  # queued here, not on a worker
+        global_sem, image_sem = self._semaphores(image)
+        cancel = cancel or threading.Event()
+
+        async with global_sem:
+            if image_sem is None:
+                return await self._run_in_executor(call, ctx, run_dir, cancel)
+            async with image_sem:
+                return await self._run_in_executor(call, ctx, run_dir, cancel)
+
+    async def handle_many(self, requests: Iterable[Tuple[Any, Any, Optional[Path]]]) -> List[ToolResult]:
+        """Run (call, ctx, run_dir) requests concurrently; results keep the input order."""
+        import asyncio
+
+        return list(await asyncio.gather(*(
+            self.handle_async(call, ctx, run_dir) for call, ctx, run_dir in requests
+        )))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._collector.shutdown(wait=True)
+        if self.sessions is not None:
+            self.sessions.close_all()
+        if self.snapshots is not None:
+            self.snapshots.close()
+
+    def close_session(self, session_id: str) -> bool:
+        """Tear down a session's sandbox now instead of waiting for its idle timeout."""
+        return self.sessions is not None and self.sessions.close(session_id)
+
+    def reset_session(self, session_id: str) -> bool:
+        """Put a session's sandbox back to the image / snapshot it was opened from."""
+        return self.sessions is not None and self.sessions.reset(session_id)
+
+    def handle(
+        self,
+        call,
+        ctx,
+        run_dir: Optional[Path] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ToolResult:
+        """
+        Run one tool call. The exec is bounded by the policy's timeout_s; setting
+        `cancel` (from any thread) aborts the call with a CANCELLED error.
+        """
+        run = _Run(artifacts=self._artifacts_for(run_dir, getattr(ctx, "run_id", None)), timer=PhaseTimer(), cancel=cancel)
+        result = self._handle(call, ctx, run)
+
+        run.timer.finish()
+        self.metrics.observe_run(
+            run.timer,
+            tool_name=getattr(call, "tool_name", None) or "",
+            image=getattr(call, "image", None) or self.default_image,
+            outcome="ok" if result.ok else result.error.type,
+        )
+        return result
+
+    def _handle(self, call, ctx, run: _Run) -> ToolResult:
         run_id = getattr(ctx, "run_id", None)
+        artifacts = run.artifacts
 
         self.auditor.log("RUN_START", {
             "run_id": run_id,
@@ -39,20 +207,23 @@ class ToolRouter:
         })
 
         # ---------- VALIDATION ----------
-        err = self._validate(call)
+        with run.timer.phase("validation"):
+            err = self._validate(call)
         if err:
             self.auditor.log("VALIDATION_ERROR", {"run_id": run_id, "error": err.__dict__})
-            self._write_report(ctx, call, ok=False, error=err)
+            self._write_report(run, ctx, call, ok=False, error=err)
             self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
             return ToolResult(ok=False, error=err)
 
         # ---------- POLICY ----------
-        decision = self.policy.evaluate(call, ctx)
+        with run.timer.phase("policy"):
+            decision = self.policy.evaluate(call, ctx)
 
         self.auditor.log("POLICY_EVALUATED", {
             "run_id": run_id,
             "allow": decision.allow,
             "reason": decision.reason,
+            "policy_version": decision.policy_version,
         })
 
         if not decision.allow:
@@ -61,20 +232,151 @@ class ToolRouter:
                 message=decision.reason,
             )
             self.auditor.log("POLICY_DENY", {"run_id": run_id, "reason": decision.reason})
-            self._write_report(ctx, call, ok=False, error=err, policy_reason=decision.reason)
+            self._write_report(run, ctx, call, ok=False, error=err, policy_reason=decision.reason, policy_version=decision.policy_version)
             self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
             return ToolResult(ok=False, error=err)
 
         self.auditor.log("POLICY_ALLOW", {"run_id": run_id, "reason": decision.reason})
 
+        image = getattr(call, "image", None) or self.default_image
+
+        backend = self._backend_for(decision.adjusted)
+
+        # ---------- SNAPSHOT ----------
+        snap: Optional[Snapshot] = None
+        snapshot_name = self._snapshot_name(ctx)
+        if snapshot_name:
+            try:
+                if self.snapshots is None:
+                    raise SnapshotError("INVALID_TOOL_CALL", "Snapshots are not enabled")
+                snap = self.snapshots.get(snapshot_name)
+                if snap.backend != decision.adjusted.backend:
+                    raise SnapshotError(
+                        "INVALID_TOOL_CALL",
+                        f"Snapshot {snapshot_name} is for backend '{snap.backend}', "
+                        f"policy runs this tool on '{decision.adjusted.backend}'",
+                    )
+            except SnapshotError as e:
+                err = AegixError(type=e.error_type, message=str(e))
+                self.auditor.log("SNAPSHOT_ERROR", {"run_id": run_id, "snapshot": snapshot_name, "error_type": err.type})
+                self._write_report(run, ctx, call, ok=False, error=err, policy_reason=decision.reason, policy_version=decision.policy_version)
+                self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
+                return ToolResult(ok=False, error=err)
+            run.report["snapshot"] = snap.as_report()
+
+        # ---------- IMAGE ----------
+        pinned: Optional[ResolvedImage] = None
+        if snap is None and self.images is not None and decision.adjusted.backend == "docker":
+            try:
+                with run.timer.phase("image_resolve"):
+                    pinned = self.images.resolve(image)
+            except Exception as e:
+                err = AegixError(
+                    type=e.error_type if isinstance(e, ImageNotReady) else "BACKEND_ERROR",
+                    message=str(e) if isinstance(e, ImageNotReady) else f"{type(e).__name__}: {e}",
+                )
+                self.auditor.log("IMAGE_NOT_READY", {"run_id": run_id, "image": image, "error_type": err.type})
+                self._write_report(run, ctx, call, ok=False, error=err, policy_reason=decision.reason, policy_version=decision.policy_version)
+                self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
+                return ToolResult(ok=False, error=err)
+            run.report["image"] = pinned.as_report()
+        image_id = snap.id if snap is not None else (pinned.id if pinned is not None else None)
+        sandbox_image = image_id or image
+
+        # ---------- RESULT CACHE ----------
+        session_id = self._session_id(ctx)
+        # session sandboxes carry state between calls, so their results are never reused
+        cache_key = None if session_id else self._cache_key(backend, call, ctx, image, decision, image_id)
+        if cache_key is not None:
+            entry = self.result_cache.get(cache_key)
+            if entry is not None:
+                res = entry.exec_result
+                with run.timer.phase("artifact_write"):
+                    self.result_cache.restore(entry, artifacts)
+                self.auditor.log("CACHE_HIT", {
+                    "run_id": run_id,
+                    "key": cache_key,
+                    "cached_at": entry.created_at,
+                })
+                self._write_report(
+                    run, ctx, call, ok=True, exec_result=res,
+                    policy_reason=decision.reason, policy_version=decision.policy_version,
+                    output_cap=decision.adjusted.limits.max_output_bytes,
+                    cache={"hit": True, "key": cache_key},
+                )
+                self.auditor.log("RUN_END", {"run_id": run_id, "ok": True, "exit_code": res.exit_code, "cached": True})
+                return ToolResult(ok=True, exec_result=res)
+
+        # ---------- ADMISSION ----------
+        # after the cache on purpose: a hit costs no sandbox, so it takes no slot or token
+        ticket: Optional[Ticket] = None
+        if self.admission is not None:
+            actor = getattr(ctx, "actor", None) or ""
+            try:
+                priority = _priority(ctx)
+                with run.timer.phase("queue"):
+                    ticket = self.admission.admit(actor, priority=priority, cancel=run.cancel)
+            except AdmissionError as e:
+                err = AegixError(type=e.error_type, message=str(e))
+                self.auditor.log("ADMISSION_REJECTED", {
+                    "run_id": run_id,
+                    "actor": actor,
+                    "error_type": err.type,
+                    "queue_wait_ms": round(e.wait_s * 1000, 3),
+                })
+                self._write_report(run, ctx, call, ok=False, error=err, policy_reason=decision.reason, policy_version=decision.policy_version)
+                self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
+                return ToolResult(ok=False, error=err)
+            run.report["admission"] = ticket.as_report()
+            self.auditor.log("ADMITTED", {"run_id": run_id, **ticket.as_report()})
+
         # ---------- EXEC ----------
         container_id: Optional[str] = None
+        session: Optional[Session] = None
+        broken = False  # the session sandbox can't be trusted for the next call
+        output_cap = decision.adjusted.limits.max_output_bytes
+        timeout_s = decision.adjusted.limits.timeout_s
         try:
-            image = getattr(call, "image", None) or self.default_image
-
-            self.auditor.log("SANDBOX_CREATE_START", {"run_id": run_id, "image": image})
-            container_id = self.backend.create(image=image)
-            self.auditor.log("SANDBOX_CREATE_END", {"run_id": run_id, "container_id": container_id})
+            if run.cancel is not None and run.cancel.is_set():
+                raise ExecCancelled("Call cancelled before it started")
+            if backend is None:
+                raise LookupError(f"No sandbox backend registered as '{decision.adjusted.backend}'")
+
+            if session_id:
+                with run.timer.phase("create"):
+                    session, opened = self.sessions.acquire(
+                        session_id, sandbox_image, decision.adjusted.backend, backend, decision.adjusted,
+                    )
+                container_id = session.container_id
+                remaining = session.remaining_exec_s(self.sessions.config)
+                if remaining is not None:
+                    timeout_s = min(timeout_s, remaining)
+                run.report["session"] = {
+                    "id": session_id,
+                    "container_id": container_id,
+                    "opened": opened,
+                    "call_index": session.calls,
+                }
+            else:
+                self.auditor.log("SANDBOX_CREATE_START", {
+                    "run_id": run_id,
+                    "image": image,
+                    "backend": decision.adjusted.backend,
+                })
+                with run.timer.phase("create"):
+                    container_id = backend.create(image=sandbox_image, adjusted=decision.adjusted)
+                self.auditor.log("SANDBOX_CREATE_END", {"run_id": run_id, "container_id": container_id})
+            self._record_isolation(backend, run, run_id, container_id)
+
+            workspace = getattr(call, "workspace", None)
+            if workspace:
+                with run.timer.phase("workspace_sync"):
+                    self._sync_workspace(backend, run, session, container_id, workspace)
+                self.auditor.log("WORKSPACE_SYNC", {
+                    "run_id": run_id,
+                    "container_id": container_id,
+                    **run.report["workspace_sync"],
+                })
 
             self.auditor.log("EXEC_START", {
                 "run_id": run_id,
@@ -82,20 +384,44 @@ class ToolRouter:
                 "cmd": getattr(call, "cmd", ""),
             })
 
-            res = self.backend.exec(container_id=container_id, cmd=getattr(call, "cmd", ""))
+            sampler = None
+            if self.usage_interval_s and hasattr(backend, "usage"):
+                sampler = UsageSampler(backend, container_id, self.usage_interval_s).start()
+            try:
+                with run.timer.phase("exec"):
+                    res = self._exec(backend, run, container_id, getattr(call, "cmd", ""), output_cap, timeout_s)
+            finally:
+                if sampler is not None:
+                    # timed-out and cancelled runs are accounted too
+                    run.report["usage"] = sampler.stop()
+                    self.auditor.log("RESOURCE_USAGE", {"run_id": run_id, **run.report["usage"]})
 
             self.auditor.log("EXEC_END", {
                 "run_id": run_id,
                 "container_id": container_id,
                 "exit_code": res.exit_code,
-                "stdout_len": len(res.stdout or ""),
-                "stderr_len": len(res.stderr or ""),
+                "stdout_len": res.stdout_len,
+                "stderr_len": res.stderr_len,
+                "truncated": res.truncated,
             })
 
-            # artifacts
-            self.artifacts.write_text("stdout.txt", res.stdout or "")
-            self.artifacts.write_text("stderr.txt", res.stderr or "")
-            self.artifacts.write_text("exit_code.txt", f"{res.exit_code}\n")
+            if decision.adjusted.artifacts.globs:
+                self._collect(backend, run, session, container_id, decision.adjusted.artifacts)
+                collected = run.report["collected_artifacts"]
+                self.auditor.log("ARTIFACTS_COLLECTED", {
+                    "run_id": run_id,
+                    "container_id": container_id,
+                    "file_count": collected["file_count"],
+                    "bytes": collected["bytes"],
+                    "truncated": collected["truncated"],
+                })
+
+            # artifacts (streamed output is already on disk)
+            with run.timer.phase("artifact_write"):
+                if not res.streamed:
+                    artifacts.write_text("stdout.txt", res.stdout or "")
+                    artifacts.write_text("stderr.txt", res.stderr or "")
+                artifacts.write_text("exit_code.txt", f"{res.exit_code}\n")
 
             if res.exit_code != 0:
                 err = AegixError(
@@ -103,42 +429,89 @@ class ToolRouter:
                     message="Command exited with non-zero status",
                     exit_code=res.exit_code,
                 )
-                self._write_report(ctx, call, ok=False, error=err, exec_result=res, policy_reason=decision.reason)
+                self._write_report(run, ctx, call, ok=False, error=err, exec_result=res, policy_reason=decision.reason, policy_version=decision.policy_version, output_cap=output_cap)
                 self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "exit_code": res.exit_code})
                 return ToolResult(ok=False, exec_result=res, error=err)
 
-            self._write_report(ctx, call, ok=True, exec_result=res, policy_reason=decision.reason)
+            if cache_key is not None and not res.truncated:
+                with run.timer.phase("artifact_write"):
+                    self.result_cache.put(cache_key, res, artifacts)
+
+            self._write_report(
+                run, ctx, call, ok=True, exec_result=res,
+                policy_reason=decision.reason, policy_version=decision.policy_version, output_cap=output_cap,
+                cache={"hit": False, "key": cache_key} if cache_key else None,
+            )
             self.auditor.log("RUN_END", {"run_id": run_id, "ok": True, "exit_code": res.exit_code})
             return ToolResult(ok=True, exec_result=res)
 
+        except SessionError as e:
+            err = AegixError(type=e.error_type, message=str(e))
+            self.auditor.log("SESSION_REJECTED", {"run_id": run_id, "session_id": session_id, "message": str(e)})
+            self._write_report(run, ctx, call, ok=False, error=err, policy_reason=decision.reason, policy_version=decision.policy_version)
+            self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
+            return ToolResult(ok=False, error=err)
+
+        except ExecInterrupted as e:
+            broken = True  # docker kills the whole container on timeout / cancel
+            timed_out = isinstance(e, TimeoutError)
+            err = AegixError(
+                type="TIMEOUT" if timed_out else "CANCELLED",
+                message=str(e),
+            )
+            partial = e.partial
+            self.auditor.log("EXEC_TIMEOUT" if timed_out else "EXEC_CANCELLED", {
+                "run_id": run_id,
+                "container_id": container_id,
+                "timeout_s": timeout_s,
+                "message": str(e),
+                "stdout_len": partial.stdout_len if partial else None,
+                "stderr_len": partial.stderr_len if partial else None,
+            })
+            # keep whatever the command printed before it was killed
+            if partial is not None and not partial.streamed:
+                artifacts.write_text("stdout.txt", partial.stdout or "")
+                artifacts.write_text("stderr.txt", partial.stderr or "")
+            self._write_report(
+                run, ctx, call, ok=False, error=err, exec_result=partial,
+                policy_reason=decision.reason, policy_version=decision.policy_version, output_cap=output_cap,
+            )
+            self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
+            return ToolResult(ok=False, exec_result=partial, error=err)
+
         except TimeoutError as e:
+            broken = True
             err = AegixError(
                 type="TIMEOUT",
                 message=str(e),
             )
             self.auditor.log("EXEC_TIMEOUT", {"run_id": run_id, "message": str(e)})
-            self._write_report(ctx, call, ok=False, error=err)
+            self._write_report(run, ctx, call, ok=False, error=err)
             self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
             return ToolResult(ok=False, error=err)
 
         except Exception as e:
+            broken = True
             err = AegixError(
                 type="BACKEND_ERROR",
                 message=f"{type(e).__name__}: {e}",
             )
             self.auditor.log("BACKEND_ERROR", {"run_id": run_id, "message": err.message})
-            self._write_report(ctx, call, ok=False, error=err)
+            self._write_report(run, ctx, call, ok=False, error=err)
             self.auditor.log("RUN_END", {"run_id": run_id, "ok": False, "error_type": err.type})
             return ToolResult(ok=False, error=err)
 
         finally:
-            if container_id:
+            if session is not None:
+                self.sessions.release(session, exec_s=run.timer.durations.get("exec", 0.0), broken=broken)
+            elif container_id:
                 try:
                     self.auditor.log("SANDBOX_DESTROY_START", {
                         "run_id": run_id,
                         "container_id": container_id,
                     })
-                    self.backend.destroy(container_id)
+                    with run.timer.phase("destroy"):
+                        backend.destroy(container_id)
                     self.auditor.log("SANDBOX_DESTROY_END", {
                         "run_id": run_id,
                         "container_id": container_id,
@@ -149,9 +522,138 @@ class ToolRouter:
                         "container_id": container_id,
                         "message": f"{type(e).__name__}: {e}",
                     })
+            if ticket is not None:
+                self.admission.release(ticket)
 
     # ---------------- helpers ----------------
 
+    def _artifacts_for(self, run_dir: Optional[Path], run_id: Optional[str]) -> ArtifactWriter:
+        # concurrent runs must never share a run directory: without one of its own,
+        # a run writes to <artifacts root>/<run_id>
+        if run_dir is None or Path(run_dir) == self.artifacts.run_dir:
+            run_dir = self.artifacts.run_dir / _run_dir_name(run_id)
+        return self.artifacts.for_run(Path(run_dir))
+
+    def _collect(self, backend, run: _Run, session: Optional[Session], container_id: str, rule) -> None:
+        future = self._collector.submit(collect_artifacts, backend, container_id, rule, run.artifacts)
+        stop = getattr(backend, "stop", None)
+        if session is None and stop is not None:
+            # the stop grace period runs while files are read out; destroy() then only removes
+            with run.timer.phase("destroy"):
+                stop(container_id)
+        with run.timer.phase("collect"):
+            run.report["collected_artifacts"] = future.result()
+
+    def _sync_workspace(self, backend, run: _Run, session: Optional[Session], container_id: str, workspace: str) -> None:
+        synced = session.state.get("workspace") if session is not None else None
+        previous = synced[1] if synced and synced[0] == str(workspace) else None
+        manifest, stats = self.workspace_syncer.sync(backend, container_id, workspace, previous)
+        if session is not None:
+            session.state["workspace"] = (str(workspace), manifest)
+        run.report["workspace_sync"] = stats
+
+    def _record_isolation(self, backend, run: _Run, run_id: Optional[str], container_id: str) -> None:
+        # backends that may enforce less than the policy asked for say so (LocalProcessBackend)
+        isolation = getattr(backend, "isolation", None)
+        if isolation is None:
+            return
+        run.report["isolation"] = isolation(container_id)
+        if run.report["isolation"].get("degraded"):
+            self.auditor.log("ISOLATION_DEGRADED", {
+                "run_id": run_id,
+                "container_id": container_id,
+                **run.report["isolation"],
+            })
+
+    def _uses_images(self, call) -> bool:
+        tool_name = getattr(call, "tool_name", None) or ""
+        return self.policy.snapshot.adjusted_for(tool_name).backend == "docker"
+
+    def _snapshot_name(self, ctx) -> Optional[str]:
+        return (getattr(ctx, "metadate", None) or {}).get("snapshot")
+
+    def _session_id(self, ctx) -> Optional[str]:
+        if self.sessions is None:
+            return None
+        return (getattr(ctx, "metadate", None) or {}).get("session_id") or None
+
+    def _backend_for(self, adjusted) -> Optional[Any]:
+        return self.backends.get(getattr(adjusted, "backend", None) or "docker")
+
+    def _cache_key(self, backend, call, ctx, image: str, decision, image_id: Optional[str] = None) -> Optional[str]:
+        if backend is None or self.result_cache is None or not (getattr(ctx, "metadate", None) or {}).get("cache", True):
+            return None
+        if decision.adjusted.artifacts.globs:
+            return None  # the cache keeps stdout/stderr only, not collected files
+        try:
+            image_digest = image_id or backend.image_digest(image)
+        except Exception:
+            return None  # can't pin the image, so the result isn't reproducible
+
+        env = dict(getattr(call, "env", None) or {})
+        allowlist = decision.adjusted.env_allowlist
+        if allowlist is not None:
+            env = {k: v for k, v in env.items() if k in allowlist}
+        workspace = getattr(call, "workspace", None)
+
+        return ResultCache.make_key(
+            image_digest=image_digest,
+            cmd=getattr(call, "cmd", ""),
+            env=env,
+            cwd=getattr(call, "cwd", "/workspace"),
+            workspace_digest=self._workspace_hasher.digest(workspace) if workspace else None,
+            adjusted=decision.adjusted,
+        )
+
+    def _exec(
+        self,
+        backend,
+        run: _Run,
+        container_id: str,
+        cmd: str,
+        output_cap: int,
+        timeout_s: float,
+    ) -> ExecResult:
+        if not (self.stream_output and hasattr(backend, "exec_stream")):
+            return backend.exec(container_id=container_id, cmd=cmd, timeout_s=timeout_s, cancel=run.cancel)
+
+        with run.artifacts.open_binary("stdout.txt") as stdout, run.artifacts.open_binary("stderr.txt") as stderr:
+            return backend.exec_stream(
+                container_id=container_id,
+                cmd=cmd,
+                stdout=stdout,
+                stderr=stderr,
+                max_output_bytes=output_cap,
+                timeout_s=timeout_s,
+                cancel=run.cancel,
+            )
+
+    def _semaphores(self, image: str) -> Tuple[asyncio.Semaphore, Optional[asyncio.Semaphore]]:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # asyncio primitives are bound to one loop; rebuild them for a new one
+            self._async_loop = loop
+            self._global_sem = asyncio.Semaphore(self.max_concurrency)
+            self._image_sems = {}
+
+        image_sem = self._image_sems.get(image)
+        if image_sem is None and image in self.per_image_concurrency:
+            image_sem = asyncio.Semaphore(self.per_image_concurrency[image])
+            self._image_sems[image] = image_sem
+        return self._global_sem, image_sem
+
+    async def _run_in_executor(self, call, ctx, run_dir: Optional[Path], cancel: threading.Event) -> ToolResult:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self.handle, call, ctx, run_dir, cancel)
+        except asyncio.CancelledError:
+            cancel.set()  # the thread can't be interrupted; make handle() give up instead
+            raise
+
     def _validate(self, call) -> Optional[AegixError]:
         if not getattr(call, "tool_name", None):
             return AegixError("INVALID_TOOL_CALL", "tool_name is required")
@@ -163,30 +665,49 @@ class ToolRouter:
 
     def _write_report(
         self,
+        run: _Run,
         ctx,
         call,
         ok: bool,
         error: Optional[AegixError] = None,
         exec_result: Optional[ExecResult] = None,
         policy_reason: Optional[str] = None,
+        policy_version: Optional[str] = None,
+        output_cap: Optional[int] = None,
+        cache: Optional[Dict[str, Any]] = None,
     ) -> None:
         report: Dict[str, Any] = {
             "run_id": getattr(ctx, "run_id", None),
             "ok": ok,
+            "started_at": run.started_at,
             "tool": {
                 "tool_name": getattr(call, "tool_name", None),
                 "image": getattr(call, "image", None) or self.default_image,
                 "cmd": getattr(call, "cmd", None),
             },
-            "policy": {"reason": policy_reason},
+            "policy": {"reason": policy_reason, "version": policy_version},
         }
 
         if exec_result is not None:
             report["exec"] = {
                 "exit_code": exec_result.exit_code,
-                "stdout_len": len(exec_result.stdout or ""),
-                "stderr_len": len(exec_result.stderr or ""),
+                "stdout_len": exec_result.stdout_len,
+                "stderr_len": exec_result.stderr_len,
             }
+            if exec_result.streamed:
+                report["exec"]["output"] = {
+                    "max_output_bytes": output_cap,
+                    "written_bytes": exec_result.written_bytes,
+                    "truncated": exec_result.truncated,
+                }
+
+        if cache is not None:
+            report["cache"] = cache
+
+        report.update(run.report)
+        # phases finished so far; destroy runs after the report is written.
+        # total is the wall span up to here: stop/destroy overlaps artifact collection
+        report["timings_ms"] = {**run.timer.as_ms(), "total": round(run.timer.elapsed() * 1000, 3)}
 
         if error is not None:
             report["error"] = {
@@ -195,4 +716,22 @@ class ToolRouter:
                 "exit_code": error.exit_code,
             }
 
-        self.artifacts.write_text("report.json", self.artifacts.json_dumps(report))
\ No newline at end of file
+        run.artifacts.write_text("report.json", run.artifacts.json_dumps(report))
+
+
+def _priority(ctx) -> int:
+    value = (getattr(ctx, "metadate", None) or {}).get("priority", 0)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise AdmissionError("INVALID_TOOL_CALL", f"metadate.priority must be an integer, got {value!r}")
+    try:
+        return int(value)
+    except ValueError:
+        raise AdmissionError("INVALID_TOOL_CALL", f"metadate.priority must be an integer, got {value!r}")
+
+
+def _run_dir_name(run_id: Optional[str]) -> str:
+    # run ids become directory names; anything that could leave the artifacts root
+    # (or is missing) gets a fresh unique name instead
+    if run_id and _RUN_ID.match(run_id) and run_id not in (".", ".."):
+        return run_id
+    return f"run-{uuid.uuid4().hex[:12]}"
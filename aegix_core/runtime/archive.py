@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Iterator, List
+import io
+import os
+import tarfile
+import threading
+
+CHUNK_SIZE = 64 * 1024
+
+def tar_stream(
+    root: Path,
+    rel_paths: Iterable[str],
+    chunk_size: int = CHUNK_SIZE,
+    prefix: str = "",
+) -> Iterator[bytes]:
+    """
+    Yield an uncompressed tar of `rel_paths` (relative to `root`, named prefix + path) chunk by chunk.
+
+    The archive is written by a helper thread into a pipe, so memory use stays at
+    one chunk however large the files are.
+    """
+    read_fd, write_fd = os.pipe()
+    errors: List[BaseException] = []
+
+    def _write() -> None:
+        try:
+            with os.fdopen(write_fd, "wb") as pipe, tarfile.open(fileobj=pipe, mode="w|") as tar:
+                for rel in rel_paths:
+                    tar.add(Path(root) / rel, arcname=prefix + rel, recursive=False)
+        except BaseException as e:  # BrokenPipe when the reader gave up, or a vanished file
+            errors.append(e)
+
+    writer = threading.Thread(target=_write, name="aegix-tar", daemon=True)
+    writer.start()
+    with os.fdopen(read_fd, "rb") as pipe:
+        for chunk in iter(lambda: pipe.read(chunk_size), b""):
+            yield chunk
+    writer.join()
+    if errors:
+        raise errors[0]
+
+
+class IterReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks (e.g. a docker archive stream)."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def extract_stream(chunks: Iterable[bytes], dest: Path) -> int:
+    """Unpack a streamed tar into `dest` (never outside it). Returns the bytes read."""
+    counter = [0]
+    reader = io.BufferedReader(IterReader(_counted(chunks, counter)), CHUNK_SIZE)
+    with tarfile.open(fileobj=reader, mode="r|") as tar:
+        if hasattr(tarfile, "data_filter"):
+            # refuses absolute paths, links out of dest and device files (3.12, backported)
+            tar.extractall(dest, filter="data")
+        else:
+            tar.extractall(dest)
+    return counter[0]
+
+
+def _counted(chunks: Iterable[bytes], counter: List[int]) -> Iterator[bytes]:
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        yield chunk
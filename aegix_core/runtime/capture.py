@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import BinaryIO, Optional
+
+from aegix.runtime.docker_backend import ExecResult
+
+DEFAULT_TAIL_BYTES = 4096
+
+class TailBuffer:
+    """Keeps only the last `size` bytes written to it."""
+
+    def __init__(self, size: int = DEFAULT_TAIL_BYTES) -> None:
+        self.size = size
+        self._buf = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        if len(chunk) >= self.size:
+            self._buf[:] = chunk[-self.size:]
+            return
+        self._buf += chunk
+        overflow = len(self._buf) - self.size
+        if overflow > 0:
+            del self._buf[:overflow]
+
+    def text(self) -> str:
+        return bytes(self._buf).decode("utf-8", errors="replace")
+
+
+class OutputCapture:
+    """
+    Streams exec output to sinks as it arrives, with bounded memory.
+
+    At most `max_output_bytes` (stdout + stderr combined) reach the sinks; anything
+    past the cap is counted and dropped. Only a tail of each stream is kept in memory.
+    """
+
+    def __init__(
+        self,
+        stdout: BinaryIO,
+        stderr: BinaryIO,
+        max_output_bytes: Optional[int] = None,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+    ) -> None:
+        self._sinks = {"stdout": stdout, "stderr": stderr}
+        self._tails = {"stdout": TailBuffer(tail_bytes), "stderr": TailBuffer(tail_bytes)}
+        self._seen = {"stdout": 0, "stderr": 0}
+        self.max_output_bytes = max_output_bytes
+        self.written_bytes = 0
+        self.truncated = False
+
+    def write_stdout(self, chunk: Optional[bytes]) -> None:
+        self._write("stdout", chunk)
+
+    def write_stderr(self, chunk: Optional[bytes]) -> None:
+        self._write("stderr", chunk)
+
+    def result(self, exit_code: int) -> ExecResult:
+        return ExecResult(
+            stdout=self._tails["stdout"].text(),
+            stderr=self._tails["stderr"].text(),
+            exit_code=exit_code,
+            stdout_bytes=self._seen["stdout"],
+            stderr_bytes=self._seen["stderr"],
+            written_bytes=self.written_bytes,
+            truncated=self.truncated,
+            streamed=True,
+        )
+
+    def _write(self, stream: str, chunk: Optional[bytes]) -> None:
+        if not chunk:
+            return
+        self._seen[stream] += len(chunk)
+        self._tails[stream].write(chunk)
+
+        if self.max_output_bytes is not None:
+            room = self.max_output_bytes - self.written_bytes
+            if room < len(chunk):
+                self.truncated = True
+                chunk = chunk[:max(room, 0)]
+            if not chunk:
+                return
+        self._sinks[stream].write(chunk)
+        self.written_bytes += len(chunk)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+import threading
+import time
+
+POLL_S = 0.05  # how quickly a cancel request is noticed
+
+class Watchdog:
+    """
+    Calls `on_fire` once if `timeout_s` elapses or `cancel` is set before stop().
+
+    Used around blocking backend calls that have no timeout of their own: on_fire
+    kills whatever the call is waiting on, and `reason` ("timeout" / "cancelled")
+    tells the caller why the call returned early. With neither a timeout nor a
+    cancel event nothing is started.
+    """
+
+    def __init__(
+        self,
+        timeout_s: Optional[float],
+        cancel: Optional[threading.Event],
+        on_fire: Callable[[], None],
+    ) -> None:
+        self.deadline = time.monotonic() + timeout_s if timeout_s is not None else None
+        self.cancel = cancel
+        self.on_fire = on_fire
+        self.reason: Optional[str] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> Watchdog:
+        if self.cancel is not None and self.cancel.is_set():
+            self.reason = "cancelled"
+            self.on_fire()
+        elif self.deadline is not None or self.cancel is not None:
+            self._thread = threading.Thread(target=self._run, name="aegix-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def _run(self) -> None:
+        while True:
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                self.reason = "timeout"
+                break
+            if self.cancel is not None and self.cancel.is_set():
+                self.reason = "cancelled"
+                break
+            wait = POLL_S if self.cancel is not None else remaining
+            if remaining is not None:
+                wait = min(wait, remaining)
+            if self._stopped.wait(wait):
+                return
+        try:
+            self.on_fire()
+        except Exception:
+            pass  # the interrupted call reports the failure
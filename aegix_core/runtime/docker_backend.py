@@ -1,31 +1,135 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import docker
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import shlex
+import threading
+
+from aegix.models import AdjustedPolicy
+from aegix.runtime.deadline import Watchdog
 
 @dataclass(frozen=True)
 class ExecResult:
-    stdout: str
+    stdout: str   # full output, or only the tail when streamed
     stderr: str
     exit_code: int
+    stdout_bytes: Optional[int] = None  # total bytes produced (streamed mode)
+    stderr_bytes: Optional[int] = None
+    written_bytes: Optional[int] = None # bytes that reached the sinks (<= output cap)
+    truncated: bool = False
+    streamed: bool = False
+
+    @property
+    def stdout_len(self) -> int:
+        return self.stdout_bytes if self.stdout_bytes is not None else len(self.stdout or "")
+
+    @property
+    def stderr_len(self) -> int:
+        return self.stderr_bytes if self.stderr_bytes is not None else len(self.stderr or "")
+
+KILLED_EXIT_CODE = 128 + 9  # what a SIGKILLed command reports
+REMOVE_BATCH = 500  # paths per rm, well under ARG_MAX
+SNAPSHOT_REPOSITORY = "aegix-snapshot"  # committed snapshots are tagged aegix-snapshot:<name>
+
+class ExecInterrupted(Exception):
+    """exec stopped before the command finished; `partial` holds the output captured so far."""
+
+    reason = "interrupted"
+
+    def __init__(self, message: str, partial: Optional[ExecResult] = None) -> None:
+        super().__init__(message)
+        self.partial = partial
+
+class ExecTimeout(ExecInterrupted, TimeoutError):
+    reason = "timeout"
+
+class ExecCancelled(ExecInterrupted):
+    reason = "cancelled"
+
+def interrupted(reason: str, timeout_s: Optional[float], partial: Optional[ExecResult] = None) -> ExecInterrupted:
+    if reason == "timeout":
+        return ExecTimeout(f"Command exceeded timeout_s={timeout_s}", partial)
+    return ExecCancelled("Command cancelled by caller", partial)
+
+def sandbox_options(adjusted: Optional[AdjustedPolicy]) -> Dict[str, Any]:
+    """containers.run() kwargs enforcing the policy's resource limits and network mode."""
+    if adjusted is None:
+        return {}
+    limits = adjusted.limits
+    return {
+        "mem_limit": f"{limits.mem_mb}m",
+        "nano_cpus": int(limits.cpu * 1e9),
+        "pids_limit": limits.pids,
+        # allowlist egress filtering is not implemented yet: fail closed
+        "network_mode": "none" if adjusted.network_mode == "allowlist" else adjusted.network_mode,
+    }
 
 class DockerBackend:
-    def __init__(self) -> None:
-        self.client = docker.from_env()
+    def __init__(self, stop_timeout: Optional[int] = None, client: Any = None) -> None:
+        # connected on first use, so building a router (or denying a call) never touches docker
+        self._client = client
+        # None => docker default grace period (10s); 0 => skip stop and force-remove
+        self.stop_timeout = stop_timeout
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import docker
+            self._client = docker.from_env()
+        return self._client
     
-    def create(self, image: str) -> str:
+    def create(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> str:
         container = self.client.containers.run(
             image=image,
-            command=["sh", "-lc", "tail -f /dev/null"],
+            # exec: tail is PID 1, so `kill -9 -1` (PooledDockerBackend's reset) leaves it running
+            command=["sh", "-c", "exec tail -f /dev/null"],
             detach=True,
             tty=True,
+            **sandbox_options(adjusted),
         )
         return container.id
     
-    def exec(self, container_id: str, cmd: str) -> ExecResult:
+    def changed_paths(self, container_id: str) -> List[str]:
+        """Paths added, changed or deleted relative to the image (`docker diff`)."""
+        return [entry["Path"] for entry in self.client.api.diff(container_id) or []]
+
+    def image_digest(self, image: str) -> str:
+        """Content id of the local image a tag currently points to."""
+        return self.client.images.get(image).id
+
+    def usage(self, container_id: str) -> Dict[str, int]:
+        """Resource counters of the container right now (see UsageSampler)."""
+        # one_shot: skip the second read docker otherwise takes to compute cpu percent
+        stats = self.client.api.stats(container_id, stream=False, one_shot=True)
+        memory = stats.get("memory_stats") or {}
+        # like `docker stats`: page cache the kernel can reclaim is not counted
+        mem = memory.get("usage", 0) - (memory.get("stats") or {}).get("inactive_file", 0)
+        io = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+        return {
+            "cpu_ns": ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0),
+            "mem_bytes": max(mem, 0),
+            "pids": (stats.get("pids_stats") or {}).get("current", 0),
+            "io_read_bytes": sum(e.get("value", 0) for e in io if str(e.get("op")).lower() == "read"),
+            "io_write_bytes": sum(e.get("value", 0) for e in io if str(e.get("op")).lower() == "write"),
+        }
+
+    def exec(
+        self,
+        container_id: str,
+        cmd: str,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
         container = self.client.containers.get(container_id)
         # demux=True => (stdout_bytes, stderr_bytes)
-        res = container.exec_run(["sh", "-lc", cmd], demux=True)
+        with Watchdog(timeout_s, cancel, on_fire=lambda: self._kill(container_id)) as watchdog:
+            try:
+                res = container.exec_run(["sh", "-lc", cmd], demux=True)
+            except Exception:
+                if watchdog.reason is None:
+                    raise
+        if watchdog.reason is not None:
+            raise interrupted(watchdog.reason, timeout_s)
         exit_code = int(res.exit_code)
 
         stdout_b, stderr_b = res.output if isinstance(res.output, tuple) else (res.output, b"")
@@ -35,7 +139,111 @@ class DockerBackend:
             exit_code=exit_code,
         )
     
-    def destroy(self, container_id: str) -> None:
+    def exec_stream(
+        self,
+        container_id: str,
+        cmd: str,
+        stdout: BinaryIO,
+        stderr: BinaryIO,
+        max_output_bytes: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        """
+        Like exec(), but writes output chunks to the sinks as they arrive.
+
+        When `timeout_s` expires or `cancel` is set the container is killed (docker
+        cannot kill a single exec) and ExecTimeout / ExecCancelled carries the
+        output captured up to that point.
+        """
+        from aegix.runtime.capture import OutputCapture
+
+        api = self.client.api
+        exec_id = api.exec_create(container_id, ["sh", "-lc", cmd], stdout=True, stderr=True)["Id"]
+        capture = OutputCapture(stdout, stderr, max_output_bytes=max_output_bytes)
+
+        with Watchdog(timeout_s, cancel, on_fire=lambda: self._kill(container_id)) as watchdog:
+            try:
+                # keep draining past the cap so the command is not blocked on a full pipe
+                for stdout_b, stderr_b in api.exec_start(exec_id, stream=True, demux=True):
+                    capture.write_stdout(stdout_b)
+                    capture.write_stderr(stderr_b)
+            except Exception:
+                if watchdog.reason is None:
+                    raise
+        if watchdog.reason is not None:
+            raise interrupted(watchdog.reason, timeout_s, capture.result(KILLED_EXIT_CODE))
+
+        exit_code = api.exec_inspect(exec_id).get("ExitCode")
+        return capture.result(int(exit_code) if exit_code is not None else -1)
+
+    def put_archive(self, container_id: str, path: str, data: Iterable[bytes]) -> None:
+        """Unpack a tar, streamed chunk by chunk, at `path` inside the container."""
+        self.exec(container_id, f"mkdir -p {shlex.quote(path)}")
+        if not self.client.api.put_archive(container_id, path, data):
+            raise RuntimeError(f"put_archive into {path} failed")
+
+    def get_archive(self, container_id: str, path: str) -> Iterator[bytes]:
+        """Stream `path` out of the container as a tar (members named like `docker cp`)."""
+        api = self.client.api
+        import docker  # already loaded by self.client
+
+        try:
+            stream, _ = api.get_archive(container_id, path)
+        except docker.errors.NotFound:
+            raise FileNotFoundError(path)
+        return stream
+
+    def remove_paths(self, container_id: str, path: str, rel_paths: Iterable[str]) -> None:
+        rel_paths = list(rel_paths)
+        for i in range(0, len(rel_paths), REMOVE_BATCH):
+            args = " ".join(shlex.quote(f"{path}/{rel}") for rel in rel_paths[i:i + REMOVE_BATCH])
+            self.exec(container_id, f"rm -f -- {args}")
+
+    def stop(self, container_id: str) -> None:
+        """First half of destroy(); the filesystem stays readable until the container is removed."""
         container = self.client.containers.get(container_id)
-        container.stop()
-        container.remove(force=True)
+        if self.stop_timeout is None:
+            container.stop()
+        elif self.stop_timeout > 0:
+            container.stop(timeout=self.stop_timeout)
+        else:
+            container.kill()
+
+    def commit(self, container_id: str, name: str) -> Tuple[str, int]:
+        """
+        Snapshot the container's filesystem as an image. Returns (image id, bytes of
+        the snapshot's own layers): everything above the image it was ultimately
+        started from, so a snapshot of a sandbox started from a snapshot also counts
+        the parent's layers it keeps alive after the parent is evicted or replaced.
+        """
+        api = self.client.api
+        base_id = api.inspect_container(container_id)["Image"]
+        image_id = api.commit(container_id, repository=SNAPSHOT_REPOSITORY, tag=name)["Id"]
+        history = api.history(image_id)  # newest first
+        own = _snapshot_layers(history)
+        if own is None:
+            # no tagged base in sight (e.g. an image pulled by digest): count the
+            # layers above the container's image
+            own = history[:max(len(history) - len(api.history(base_id)), 1)]
+        return image_id, sum(int(entry.get("Size") or 0) for entry in own)
+
+    def remove_snapshot(self, snapshot_id: str) -> None:
+        self.client.api.remove_image(snapshot_id, force=True)
+
+    def _kill(self, container_id: str) -> None:
+        self.client.api.kill(container_id)
+
+    def destroy(self, container_id: str) -> None:
+        if self.stop_timeout != 0:
+            self.stop(container_id)  # no-op if stop() already ran
+        self.client.api.remove_container(container_id, force=True)
+
+
+def _snapshot_layers(history: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """The history entries above the newest image tagged outside SNAPSHOT_REPOSITORY; None if there is none."""
+    for i, entry in enumerate(history):
+        tags = [t for t in entry.get("Tags") or [] if t != "<none>:<none>"]
+        if tags and not all(t.startswith(f"{SNAPSHOT_REPOSITORY}:") for t in tags):
+            return history[:i]
+    return None
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import BinaryIO, Iterable, Iterator, Optional, Set
+import hashlib
+import itertools
+import threading
+import time
+
+from aegix.models import AdjustedPolicy
+from aegix.runtime.docker_backend import ExecResult, interrupted
+
+class FakeBackend:
+    """
+    In-process backend with DockerBackend's create/exec/destroy contract.
+
+    Nothing is executed: exec() sleeps for the configured latency and returns
+    synthetic output of the configured size. Used to measure Aegix's own overhead
+    and to run the router/gateway without a Docker daemon.
+    """
+
+    def __init__(
+        self,
+        create_latency_s: float = 0.0,
+        exec_latency_s: float = 0.0,
+        destroy_latency_s: float = 0.0,
+        stdout_bytes: int = 0,
+        stderr_bytes: int = 0,
+        exit_code: int = 0,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        self.create_latency_s = create_latency_s
+        self.exec_latency_s = exec_latency_s
+        self.destroy_latency_s = destroy_latency_s
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.exit_code = exit_code
+        self.chunk_size = chunk_size
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._live: Set[str] = set()
+
+    @property
+    def live(self) -> Set[str]:
+        with self._lock:
+            return set(self._live)
+
+    def create(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> str:
+        _sleep(self.create_latency_s)
+        container_id = f"fake-{next(self._ids)}"
+        with self._lock:
+            self._live.add(container_id)
+        return container_id
+
+    def image_digest(self, image: str) -> str:
+        return "sha256:" + hashlib.sha256(image.encode("utf-8")).hexdigest()
+
+    def exec(
+        self,
+        container_id: str,
+        cmd: str,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        self._check(container_id)
+        self._run(timeout_s, cancel)
+        return ExecResult(
+            stdout=_payload(self.stdout_bytes, b"o").decode("ascii"),
+            stderr=_payload(self.stderr_bytes, b"e").decode("ascii"),
+            exit_code=self.exit_code,
+        )
+
+    def exec_stream(
+        self,
+        container_id: str,
+        cmd: str,
+        stdout: BinaryIO,
+        stderr: BinaryIO,
+        max_output_bytes: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        from aegix.runtime.capture import OutputCapture
+
+        self._check(container_id)
+        self._run(timeout_s, cancel)
+        capture = OutputCapture(stdout, stderr, max_output_bytes=max_output_bytes)
+        for total, write, fill in (
+            (self.stdout_bytes, capture.write_stdout, b"o"),
+            (self.stderr_bytes, capture.write_stderr, b"e"),
+        ):
+            chunk = _payload(min(total, self.chunk_size), fill)
+            remaining = total
+            while remaining > 0:
+                write(chunk[:remaining])
+                remaining -= len(chunk)
+        return capture.result(self.exit_code)
+
+    def put_archive(self, container_id: str, path: str, data: Iterable[bytes]) -> None:
+        self._check(container_id)
+        for _ in data:  # drain, as the daemon would
+            pass
+
+    def get_archive(self, container_id: str, path: str) -> Iterator[bytes]:
+        self._check(container_id)
+        raise FileNotFoundError(path)  # fake sandboxes have no files
+
+    def remove_paths(self, container_id: str, path: str, rel_paths: Iterable[str]) -> None:
+        self._check(container_id)
+
+    def destroy(self, container_id: str) -> None:
+        _sleep(self.destroy_latency_s)
+        with self._lock:
+            if container_id not in self._live:
+                raise KeyError(f"No such container: {container_id}")
+            self._live.discard(container_id)
+
+    def _run(self, timeout_s: Optional[float], cancel: Optional[threading.Event]) -> None:
+        """Sleep for exec_latency_s as a real command would: killable by deadline or cancel."""
+        budget = self.exec_latency_s if timeout_s is None else min(self.exec_latency_s, timeout_s)
+        if cancel is not None and cancel.wait(budget):
+            raise interrupted("cancelled", timeout_s)
+        if cancel is None:
+            _sleep(budget)
+        if budget < self.exec_latency_s:
+            raise interrupted("timeout", timeout_s)
+
+    def _check(self, container_id: str) -> None:
+        with self._lock:
+            if container_id not in self._live:
+                raise KeyError(f"No such container: {container_id}")
+
+
+def _payload(size: int, fill: bytes) -> bytes:
+    if size <= 0:
+        return b""
+    line = fill * 79 + b"\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _sleep(seconds: float) -> None:
+    if seconds > 0:
+        time.sleep(seconds)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+@dataclass(frozen=True)
+class ResolvedImage:
+    ref: str                    # what the call asked for, e.g. "python:3.11-slim"
+    id: str                     # local content id ("sha256:..."); containers are created from this
+    repo_digest: Optional[str]  # registry digest ("python@sha256:..."), None for local-only images
+
+    def as_report(self) -> Dict[str, Any]:
+        return {"ref": self.ref, "id": self.id, "repo_digest": self.repo_digest}
+
+
+class ImageNotReady(Exception):
+    """The image can't be used yet; `error_type` is the AegixError type to report."""
+
+    def __init__(self, error_type: str, message: str) -> None:
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class ImageManager:
+    """
+    Resolves image tags to pinned ids and keeps image pulls off the request path.
+
+    resolve() answers from a tag -> id cache. Entries live ttl_s, after which the
+    tag is inspected locally again, so a tag re-pointed on this host (docker pull,
+    docker build) is picked up; a tag that is present locally is never pulled, so
+    a tag re-pushed to the registry is not, until someone pulls it. A tag that
+    is not present locally is pulled in the background and the call is rejected
+    with IMAGE_PULLING instead of blocking a worker for the length of the pull.
+    `prefetch` tags are looked up (and pulled if missing) at startup. Async callers can wait_ready() instead,
+    which queues them on the event loop. A failed pull is reported as
+    IMAGE_UNAVAILABLE and retried after retry_after_s. on_resolved, if given, is
+    called with every fresh resolution (at most once per ref per ttl_s).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        ttl_s: float = 300.0,
+        prefetch: Iterable[str] = (),
+        pull_workers: int = 2,
+        retry_after_s: float = 30.0,
+        on_resolved: Optional[Callable[[ResolvedImage], None]] = None,
+    ) -> None:
+        self._client = client
+        self.on_resolved = on_resolved
+        self.ttl_s = ttl_s
+        self.retry_after_s = retry_after_s
+
+        self._lock = threading.Lock()
+        self._resolved: Dict[str, Tuple[ResolvedImage, float]] = {}  # ref -> (image, resolved_at)
+        self._pulling: Dict[str, threading.Event] = {}
+        self._failed: Dict[str, Tuple[str, float]] = {}  # ref -> (message, failed_at)
+        self._pullers = ThreadPoolExecutor(max_workers=pull_workers, thread_name_prefix="aegix-pull")
+
+        for ref in prefetch:
+            self._pullers.submit(self._prefetch, ref)
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import docker
+            self._client = docker.from_env()
+        return self._client
+
+    def resolve(self, ref: str) -> ResolvedImage:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._resolved.get(ref)
+            if cached is not None and now - cached[1] < self.ttl_s:
+                return cached[0]
+            if ref in self._pulling:
+                raise ImageNotReady("IMAGE_PULLING", f"Image {ref} is being pulled; retry shortly")
+
+        image = self._inspect(ref)
+        if image is None:
+            self._raise_missing(ref)
+        self._store(image)
+        return image
+
+    def pull(self, ref: str) -> threading.Event:
+        """Start a background pull (once per ref); the event is set when it ends, either way."""
+        with self._lock:
+            event = self._pulling.get(ref)
+            if event is not None:
+                return event
+            event = self._pulling[ref] = threading.Event()
+            self._failed.pop(ref, None)
+        self._pullers.submit(self._pull, ref, event)
+        return event
+
+    async def wait_ready(self, ref: str, timeout_s: float) -> None:
+        """Await a pull in progress (or start one, if the image isn't local) without holding a worker thread."""
+        import asyncio
+
+        status = self.status(ref)
+        if status in ("ready", "failed"):
+            return
+        if status == "unknown":
+            try:
+                image = await asyncio.get_running_loop().run_in_executor(None, self._inspect, ref)
+            except Exception:
+                return  # docker unreachable: resolve() reports it
+            if image is not None:
+                self._store(image)
+                return
+        event = self.pull(ref)
+        deadline = time.monotonic() + timeout_s
+        while not event.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    def status(self, ref: str) -> str:
+        with self._lock:
+            if ref in self._pulling:
+                return "pulling"
+            if ref in self._resolved:
+                return "ready"
+            if ref in self._failed:
+                return "failed"
+        return "unknown"
+
+    def close(self) -> None:
+        self._pullers.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------- helpers ----------------
+
+    def _inspect(self, ref: str) -> Optional[ResolvedImage]:
+        import docker
+
+        try:
+            img = self.client.images.get(ref)
+        except docker.errors.ImageNotFound:
+            return None
+        repo_digests = img.attrs.get("RepoDigests") or []
+        return ResolvedImage(ref=ref, id=img.id, repo_digest=repo_digests[0] if repo_digests else None)
+
+    def _prefetch(self, ref: str) -> None:
+        try:
+            image = self._inspect(ref)
+        except Exception:
+            image = None
+        if image is not None:
+            self._store(image)
+        else:
+            self.pull(ref)
+
+    def _store(self, image: ResolvedImage) -> None:
+        with self._lock:
+            self._resolved[image.ref] = (image, time.monotonic())
+        if self.on_resolved is not None:
+            try:
+                self.on_resolved(image)
+            except Exception:
+                pass  # a listener (e.g. pool warming) must not fail the resolution
+
+    def _raise_missing(self, ref: str) -> None:
+        with self._lock:
+            failed = self._failed.get(ref)
+        if failed is not None and time.monotonic() - failed[1] < self.retry_after_s:
+            raise ImageNotReady("IMAGE_UNAVAILABLE", f"Pulling image {ref} failed: {failed[0]}")
+        self.pull(ref)
+        raise ImageNotReady("IMAGE_PULLING", f"Image {ref} is not present locally; pull started, retry shortly")
+
+    def _pull(self, ref: str, event: threading.Event) -> None:
+        try:
+            self.client.images.pull(ref)
+            image = self._inspect(ref)
+            if image is None:
+                raise RuntimeError("image missing after pull")
+            self._store(image)
+        except Exception as e:
+            with self._lock:
+                self._failed[ref] = (f"{type(e).__name__}: {e}", time.monotonic())
+        finally:
+            with self._lock:
+                self._pulling.pop(ref, None)
+            event.set()
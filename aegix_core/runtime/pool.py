@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import json
+import threading
+import time
+
+from aegix.models import AdjustedPolicy
+from aegix.runtime.docker_backend import DockerBackend, ExecInterrupted, ExecResult, sandbox_options
+
+DEFAULT_RESET_CMD = (
+    "rm -rf /workspace /tmp/* /tmp/.[!.]* 2>/dev/null; mkdir -p /workspace"
+)
+# run before reset_cmd on every reuse: kill everything the last lease started, and
+# fail (=> recycle) if anything but PID 1 and this shell is left, e.g. a zombie
+# the non-reaping PID 1 will never collect
+KILL_CMD = (
+    'kill -9 -1 2>/dev/null; '
+    'for p in /proc/[0-9]*; do case "${p#/proc/}" in 1|$$) ;; *) exit 1 ;; esac; done'
+)
+# the only paths reset_cmd restores; a change anywhere else (docker diff) recycles the container
+SCRATCH_PATHS = ("/workspace", "/tmp")
+
+@dataclass(frozen=True)
+class PoolConfig:
+    min_size: int = 1         # warm (idle) containers kept per warm key (see warm())
+    max_size: int = 8         # idle + leased containers per pool key
+    idle_ttl_s: float = 300.0 # idle containers above min_size are evicted after this
+    max_reuse: int = 50       # container is recycled after this many leases
+    reset_cmd: Optional[str] = DEFAULT_RESET_CMD  # None => never reuse, always recycle
+    reset_timeout_s: float = 30.0  # a reset that takes longer recycles the container
+    maintain_interval_s: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.min_size < 0 or self.max_size < 1 or self.min_size > self.max_size:
+            raise ValueError(f"Invalid pool size: min={self.min_size} max={self.max_size}")
+        if self.max_reuse < 1:
+            raise ValueError(f"Invalid max_reuse: {self.max_reuse}")
+        if self.reset_timeout_s <= 0:
+            raise ValueError(f"Invalid reset_timeout_s: {self.reset_timeout_s}")
+
+PoolKey = Tuple[str, str]  # (image, sandbox options) - containers are only shared within a key
+
+def _pool_key(image: str, adjusted: Optional[AdjustedPolicy]) -> PoolKey:
+    return (image, json.dumps(sandbox_options(adjusted), sort_keys=True))
+
+@dataclass
+class _Slot:
+    container_id: str
+    key: PoolKey
+    uses: int = 0
+    idle_since: float = field(default_factory=time.monotonic)
+
+
+class PooledDockerBackend:
+    """
+    Same create/exec/destroy contract as DockerBackend, backed by pre-started containers.
+
+    create() leases a warm container (or starts one if the pool is empty), destroy()
+    hands it back. Returned containers are reset and refilled by a background thread,
+    so neither call pays for container startup or the stop grace period. Containers
+    are pooled per (image, resource limits / network mode), since those are fixed
+    when a container starts.
+
+    A container is only reused if nothing of the last lease survives the reset:
+    its processes are killed and reset_cmd wipes SCRATCH_PATHS; if a process is
+    left over or `docker diff` shows changes anywhere else, it is recycled.
+    min_size containers are kept warm only for keys given to warm() (and
+    `images`, with warm_policy); other keys keep what callers hand back until
+    idle_ttl_s and are forgotten once they have no containers.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[DockerBackend] = None,
+        config: Optional[PoolConfig] = None,
+        images: Iterable[str] = (),
+        warm_policy: Optional[AdjustedPolicy] = None,
+    ) -> None:
+        self.backend = backend or DockerBackend(stop_timeout=0)
+        self.config = config or PoolConfig()
+
+        self._lock = threading.Lock()
+        self._idle: Dict[PoolKey, Deque[_Slot]] = {}
+        self._specs: Dict[PoolKey, Optional[AdjustedPolicy]] = {}
+        self._leased: Dict[str, _Slot] = {}
+        self._returned: Deque[_Slot] = deque()
+        self._sizes: Dict[PoolKey, int] = {}  # idle + leased + starting + resetting
+        self._wakeup = threading.Event()
+        self._closed = False
+        # snapshot images: their containers are replaced, never reset (reset_cmd would wipe the prepared state)
+        self._snapshots: Set[str] = set()
+        self._warm: Set[PoolKey] = set()  # keys refilled to min_size
+
+        for image in images:
+            self.warm(image, warm_policy)
+
+        self._thread = threading.Thread(target=self._maintain, name="aegix-pool", daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    # ---------------- backend contract ----------------
+
+    def create(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> str:
+        key = _pool_key(image, adjusted)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Container pool is closed")
+            self._track(key, adjusted)
+            if image in self._snapshots:
+                self._warm.add(key)  # a fresh container from the snapshot is the fast reset
+            idle = self._idle[key]
+            slot = idle.pop() if idle else None
+            reserved = False
+            if slot is None and self._sizes[key] < self.config.max_size:
+                self._sizes[key] += 1
+                reserved = True
+
+        if slot is None:
+            try:
+                container_id = self.backend.create(image=image, adjusted=adjusted)
+            except Exception:
+                if reserved:
+                    with self._lock:
+                        self._unreserve(key)
+                raise
+            if not reserved:
+                # pool is at max_size: hand out an unpooled container, destroyed on release
+                return container_id
+            slot = _Slot(container_id=container_id, key=key)
+
+        slot.uses += 1
+        with self._lock:
+            self._leased[slot.container_id] = slot
+        self._wakeup.set()  # refill below min_size in the background
+        return slot.container_id
+
+    def warm(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> None:
+        """Keep min_size containers of (image, adjusted's sandbox options) ready."""
+        key = _pool_key(image, adjusted)
+        with self._lock:
+            self._track(key, adjusted)
+            self._warm.add(key)
+        self._wakeup.set()
+
+    def unwarm(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> None:
+        """Stop keeping containers of the key warm; idle ones expire after idle_ttl_s."""
+        with self._lock:
+            self._warm.discard(_pool_key(image, adjusted))
+
+    def image_digest(self, image: str) -> str:
+        return self.backend.image_digest(image)
+
+    def usage(self, container_id: str) -> Dict[str, int]:
+        return self.backend.usage(container_id)
+
+    def commit(self, container_id: str, name: str) -> Tuple[str, int]:
+        snapshot_id, size = self.backend.commit(container_id, name)
+        self.register_snapshot(snapshot_id)
+        return snapshot_id, size
+
+    def register_snapshot(self, snapshot_id: str) -> None:
+        with self._lock:
+            self._snapshots.add(snapshot_id)
+
+    def remove_snapshot(self, snapshot_id: str) -> None:
+        # stop keeping containers of it warm; leased ones are retired when handed back
+        with self._lock:
+            keys = [key for key in self._idle if key[0] == snapshot_id]
+            idle = [slot for key in keys for slot in self._idle.pop(key)]
+            for key in keys:
+                self._specs.pop(key, None)
+                self._warm.discard(key)
+        for slot in idle:
+            self._retire(slot)
+        self.backend.remove_snapshot(snapshot_id)
+        with self._lock:
+            self._snapshots.discard(snapshot_id)
+
+    def exec(
+        self,
+        container_id: str,
+        cmd: str,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        return self.backend.exec(container_id=container_id, cmd=cmd, timeout_s=timeout_s, cancel=cancel)
+
+    def exec_stream(
+        self,
+        container_id: str,
+        cmd: str,
+        stdout: BinaryIO,
+        stderr: BinaryIO,
+        max_output_bytes: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        # timeout_s / cancel: a killed container fails its reset and is retired
+        return self.backend.exec_stream(
+            container_id=container_id,
+            cmd=cmd,
+            stdout=stdout,
+            stderr=stderr,
+            max_output_bytes=max_output_bytes,
+            timeout_s=timeout_s,
+            cancel=cancel,
+        )
+
+    def put_archive(self, container_id: str, path: str, data: Iterable[bytes]) -> None:
+        self.backend.put_archive(container_id, path, data)
+
+    def get_archive(self, container_id: str, path: str) -> Iterator[bytes]:
+        return self.backend.get_archive(container_id, path)
+
+    def remove_paths(self, container_id: str, path: str, rel_paths: Iterable[str]) -> None:
+        self.backend.remove_paths(container_id, path, rel_paths)
+
+    def destroy(self, container_id: str) -> None:
+        with self._lock:
+            slot = self._leased.pop(container_id, None)
+            closed = self._closed
+            if slot is not None and not closed:
+                self._returned.append(slot)
+        if slot is None:
+            self.backend.destroy(container_id)
+        elif closed:
+            self._retire(slot)
+        else:
+            self._wakeup.set()
+
+    # ---------------- lifecycle ----------------
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                f"{image} {options}": {
+                    "idle": len(self._idle[(image, options)]),
+                    "total": self._sizes[(image, options)],
+                }
+                for image, options in self._idle
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            slots: List[_Slot] = [s for q in self._idle.values() for s in q]
+            slots.extend(self._returned)
+            for q in self._idle.values():
+                q.clear()
+            self._returned.clear()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        for slot in slots:
+            self._retire(slot)
+
+    # ---------------- helpers ----------------
+
+    def _track(self, key: PoolKey, adjusted: Optional[AdjustedPolicy]) -> None:  # under _lock
+        self._idle.setdefault(key, deque())
+        self._specs.setdefault(key, adjusted)
+        self._sizes.setdefault(key, 0)
+
+    def _maintain(self) -> None:
+        while True:
+            self._wakeup.wait(timeout=self.config.maintain_interval_s)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self._recycle_returned()
+                self._evict_idle()
+                self._refill()
+            except Exception:
+                # pool maintenance must never kill the thread; next tick retries
+                pass
+
+    def _recycle_returned(self) -> None:
+        while True:
+            with self._lock:
+                if not self._returned:
+                    return
+                slot = self._returned.popleft()
+
+            if self._reset(slot):
+                slot.idle_since = time.monotonic()
+                with self._lock:
+                    if not self._closed and slot.key in self._idle:
+                        self._idle[slot.key].append(slot)
+                        continue
+            self._retire(slot)
+
+    def _reset(self, slot: _Slot) -> bool:
+        if self.config.reset_cmd is None or slot.uses >= self.config.max_reuse:
+            return False
+        if slot.key[0] in self._snapshots or slot.key not in self._idle:
+            return False  # retired; _refill starts a pristine one from the snapshot
+        try:
+            # bounded: a hung reset_cmd would otherwise stall the maintenance thread for good
+            res = self.backend.exec(
+                container_id=slot.container_id,
+                cmd=f"{KILL_CMD}\n{self.config.reset_cmd}",
+                timeout_s=self.config.reset_timeout_s,
+            )
+            if res.exit_code != 0:
+                return False
+            changed_paths = getattr(self.backend, "changed_paths", None)
+            if changed_paths is not None:
+                return all(_is_scratch(path) for path in changed_paths(slot.container_id))
+        except ExecInterrupted:
+            return False  # timed out: recycled like a failed reset
+        except Exception:
+            return False
+        return True
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        expired: List[_Slot] = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                # oldest first; warm keys always keep min_size
+                keep = self.config.min_size if key in self._warm else 0
+                while len(idle) > keep and now - idle[0].idle_since > self.config.idle_ttl_s:
+                    expired.append(idle.popleft())
+        for slot in expired:
+            self._retire(slot)
+
+    def _refill(self) -> None:
+        with self._lock:
+            wanted: List[Tuple[PoolKey, Optional[AdjustedPolicy]]] = []
+            for key in self._warm:
+                missing = min(
+                    self.config.min_size - len(self._idle[key]),
+                    self.config.max_size - self._sizes[key],
+                )
+                for _ in range(max(missing, 0)):
+                    self._sizes[key] += 1
+                    wanted.append((key, self._specs[key]))
+
+        for key, adjusted in wanted:
+            try:
+                container_id = self.backend.create(image=key[0], adjusted=adjusted)
+            except Exception:
+                with self._lock:
+                    self._unreserve(key)
+                continue
+            with self._lock:
+                if not self._closed and key in self._idle:
+                    self._idle[key].append(_Slot(container_id=container_id, key=key))
+                    continue
+            self._retire(_Slot(container_id=container_id, key=key))
+
+    def _unreserve(self, key: PoolKey) -> None:
+        """Drop one container from key's count (under _lock); forget a cold key left with none."""
+        size = self._sizes[key] = max(self._sizes.get(key, 1) - 1, 0)
+        if size == 0 and key not in self._warm and not self._idle.get(key):
+            self._idle.pop(key, None)
+            self._specs.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def _retire(self, slot: _Slot) -> None:
+        with self._lock:
+            self._unreserve(slot.key)
+        try:
+            self.backend.destroy(slot.container_id)
+        except Exception:
+            pass
+
+
+def _is_scratch(path: str) -> bool:
+    return any(path == root or path.startswith(root + "/") for root in SCRATCH_PATHS)
@@ -0,0 +1,507 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import ctypes
+import io
+import json
+import math
+import os
+import posixpath
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from aegix.models import AdjustedPolicy, Limits, NetworkMode
+from aegix.runtime.archive import extract_stream, tar_stream
+from aegix.runtime.deadline import POLL_S
+from aegix.runtime.docker_backend import KILLED_EXIT_CODE, ExecResult, interrupted
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+CGROUP_CONTROLLERS = "+cpu +memory +pids"
+CPU_PERIOD_US = 100_000
+READ_CHUNK = 64 * 1024
+WORKSPACE = "/workspace"
+SANDBOX_INIT = str(Path(__file__).with_name("sandbox_init.py"))  # run as a script by _spawn
+
+MNT_DETACH = 2
+SNAPSHOT_PREFIX = "procsnap-"
+
+@dataclass
+class _Sandbox:
+    workdir: Path
+    limits: Limits
+    network_mode: NetworkMode
+    network_isolated: bool = False  # commands run in an empty network namespace
+    cgroup: Optional[Path] = None
+    pgids: Set[int] = field(default_factory=set)
+    snapshot: Optional[Path] = None  # the workdir started as a copy / overlay of this
+    overlay: Optional[Tuple[Path, Path]] = None  # (upperdir, workdir) when mounted as an overlay
+
+
+class LocalProcessBackend:
+    """
+    Runs commands as local subprocesses, with DockerBackend's create/exec/destroy contract.
+
+    Each sandbox is a throwaway working directory. Limits are enforced per exec:
+    timeout_s by the backend itself, mem_mb / CPU seconds / process count with
+    rlimits, and cpu share, memory and pids with a cgroup v2 group when one can be
+    created. network_mode="none" (and "allowlist", which is not filtered yet, so
+    fails closed like DockerBackend) runs the command in a fresh network namespace.
+    If the kernel won't create one, create() fails with require_network_isolation;
+    otherwise the command gets the host network and isolation() reports it.
+    Only for trusted-but-governed workloads: there is no filesystem isolation.
+
+    commit() snapshots a sandbox's working directory under root/snapshots; a
+    sandbox created with a snapshot id as its image starts from it, as an overlay
+    mount over the read-only snapshot when the kernel lets us mount one (reset()
+    then only discards the upper layer), otherwise as a copy.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        cgroup_parent: Optional[Path] = None,
+        use_cgroups: bool = True,
+        isolate_network: bool = True,
+        require_network_isolation: bool = False,
+    ) -> None:
+        self.root = Path(root) if root else Path(tempfile.gettempdir()) / "aegix-sandboxes"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.cgroup_parent = (cgroup_parent or _default_cgroup_parent()) if use_cgroups else None
+        self.isolate_network = isolate_network
+        self.require_network_isolation = require_network_isolation
+
+        self._libc = ctypes.CDLL(None, use_errno=True)  # overlay mounts of snapshots
+        self.snapshots_root = self.root / "snapshots"
+        self._lock = threading.Lock()
+        self._sandboxes: Dict[str, _Sandbox] = {}
+        self._netns: Optional[bool] = None  # can this process create network namespaces? probed once
+
+    def create(self, image: str, adjusted: Optional[AdjustedPolicy] = None) -> str:
+        # `image` has no meaning for local processes; the host environment is the image
+        sandbox_id = f"proc-{uuid.uuid4().hex[:12]}"
+        workdir = self.root / sandbox_id
+        workdir.mkdir(parents=True)
+        limits = adjusted.limits if adjusted else Limits()
+        network_mode = adjusted.network_mode if adjusted else "none"
+        isolate = self.isolate_network and network_mode in ("none", "allowlist")
+        if isolate and not self._netns_available() and self.require_network_isolation:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise OSError("Network namespaces are unavailable and require_network_isolation is set")
+        sandbox = _Sandbox(
+            workdir=workdir,
+            limits=limits,
+            network_mode=network_mode,
+            network_isolated=isolate and bool(self._netns),
+            cgroup=self._make_cgroup(sandbox_id, limits),
+        )
+        if image.startswith(SNAPSHOT_PREFIX):
+            snapshot = self.snapshots_root / image
+            if not snapshot.is_dir():
+                shutil.rmtree(workdir, ignore_errors=True)
+                raise FileNotFoundError(f"No such snapshot: {image}")
+            sandbox.snapshot = snapshot
+            self._populate(sandbox_id, sandbox)
+        with self._lock:
+            self._sandboxes[sandbox_id] = sandbox
+        return sandbox_id
+
+    def isolation(self, container_id: str) -> Dict[str, Any]:
+        """What the sandbox actually enforces; `degraded` lists what the policy asked for but it can't."""
+        sandbox = self._get(container_id)
+        wanted_isolation = sandbox.network_mode in ("none", "allowlist")
+        return {
+            "network_mode": sandbox.network_mode,
+            "network_isolated": sandbox.network_isolated,
+            "cgroup": sandbox.cgroup is not None,
+            "degraded": ["network"] if wanted_isolation and not sandbox.network_isolated else [],
+        }
+
+    def image_digest(self, image: str) -> str:
+        return f"local:{os.uname().sysname}-{os.uname().release}"
+
+    def exec(
+        self,
+        container_id: str,
+        cmd: str,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        stdout, stderr = io.BytesIO(), io.BytesIO()
+        res = self.exec_stream(container_id, cmd, stdout, stderr, timeout_s=timeout_s, cancel=cancel)
+        return ExecResult(
+            stdout=stdout.getvalue().decode("utf-8", errors="replace"),
+            stderr=stderr.getvalue().decode("utf-8", errors="replace"),
+            exit_code=res.exit_code,
+        )
+
+    def exec_stream(
+        self,
+        container_id: str,
+        cmd: str,
+        stdout: BinaryIO,
+        stderr: BinaryIO,
+        max_output_bytes: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ExecResult:
+        from aegix.runtime.capture import OutputCapture
+
+        sandbox = self._get(container_id)
+        capture = OutputCapture(stdout, stderr, max_output_bytes=max_output_bytes)
+        if timeout_s is None:
+            timeout_s = sandbox.limits.timeout_s
+        deadline = time.monotonic() + timeout_s
+
+        proc = _spawn(self._setup(sandbox), ["/bin/sh", "-c", cmd], sandbox.workdir)
+        with self._lock:
+            sandbox.pgids.add(proc.pid)
+
+        try:
+            reason = _pump(proc, capture, deadline, cancel)
+        finally:
+            _kill_group(proc.pid)
+            proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+            with self._lock:
+                sandbox.pgids.discard(proc.pid)
+
+        if reason is not None:
+            raise interrupted(reason, timeout_s, capture.result(KILLED_EXIT_CODE))
+        code = proc.returncode
+        # report signals the way a shell (and docker) does: 128 + signal number
+        return capture.result(128 - code if code < 0 else code)
+
+    def put_archive(self, container_id: str, path: str, data: Iterable[bytes]) -> None:
+        dest = self._host_path(self._get(container_id), path)
+        dest.mkdir(parents=True, exist_ok=True)
+        extract_stream(data, dest)
+
+    def get_archive(self, container_id: str, path: str) -> Iterator[bytes]:
+        host = self._host_path(self._get(container_id), path)
+        if host.is_file():
+            return tar_stream(host.parent, [host.name])
+        if not host.is_dir():
+            raise FileNotFoundError(path)
+        rel_paths = [
+            (Path(dirpath) / name).relative_to(host).as_posix()
+            for dirpath, _, filenames in os.walk(host)
+            for name in filenames
+        ]
+        # members are named <basename of path>/..., as docker does
+        return tar_stream(host, rel_paths, prefix=posixpath.basename(path.rstrip("/")) + "/")
+
+    def remove_paths(self, container_id: str, path: str, rel_paths: Iterable[str]) -> None:
+        dest = self._host_path(self._get(container_id), path)
+        root = dest.resolve()
+        for rel in rel_paths:
+            # unlink the entry itself (a symlink, not what it points to); only its
+            # directory is resolved, so no link along the way leads out of /workspace
+            target = dest / rel
+            if target.parent.resolve().is_relative_to(root) and target.name not in ("", ".", ".."):
+                target.unlink(missing_ok=True)
+
+    def usage(self, container_id: str) -> Optional[Dict[str, int]]:
+        """cgroup v2 counters of the sandbox; None without a cgroup (nothing per-sandbox to read)."""
+        cgroup = self._get(container_id).cgroup
+        if cgroup is None:
+            return None
+        cpu = dict(line.split() for line in (cgroup / "cpu.stat").read_text().splitlines() if line)
+        read_bytes = write_bytes = 0
+        for line in (cgroup / "io.stat").read_text().splitlines() if (cgroup / "io.stat").exists() else ():
+            fields = dict(f.split("=", 1) for f in line.split()[1:] if "=" in f)
+            read_bytes += int(fields.get("rbytes", 0))
+            write_bytes += int(fields.get("wbytes", 0))
+        return {
+            "cpu_ns": int(cpu.get("usage_usec", 0)) * 1000,
+            "mem_bytes": int((cgroup / "memory.current").read_text()),
+            "pids": int((cgroup / "pids.current").read_text()),
+            "io_read_bytes": read_bytes,
+            "io_write_bytes": write_bytes,
+        }
+
+    def commit(self, container_id: str, name: str) -> Tuple[str, int]:
+        """Copy the sandbox's working directory into a snapshot. Returns (snapshot id, bytes)."""
+        sandbox = self._get(container_id)
+        snapshot_id = f"{SNAPSHOT_PREFIX}{uuid.uuid4().hex[:12]}"
+        dest = self.snapshots_root / snapshot_id
+        self.snapshots_root.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(sandbox.workdir, dest, symlinks=True)
+        return snapshot_id, _tree_size(dest)
+
+    def reset(self, container_id: str) -> bool:
+        """Put a sandbox started from a snapshot back to it. False if it has no snapshot."""
+        sandbox = self._get(container_id)
+        if sandbox.snapshot is None:
+            return False
+        for pgid in list(sandbox.pgids):
+            _kill_group(pgid)
+        self._unpopulate(sandbox)
+        self._populate(container_id, sandbox)
+        return True
+
+    def remove_snapshot(self, snapshot_id: str) -> None:
+        if not snapshot_id.startswith(SNAPSHOT_PREFIX):
+            raise ValueError(f"Not a snapshot id: {snapshot_id}")
+        shutil.rmtree(self.snapshots_root / snapshot_id)
+
+    def destroy(self, container_id: str) -> None:
+        with self._lock:
+            sandbox = self._sandboxes.pop(container_id, None)
+        if sandbox is None:
+            raise KeyError(f"No such sandbox: {container_id}")
+        for pgid in list(sandbox.pgids):
+            _kill_group(pgid)
+        if sandbox.cgroup is not None:
+            _remove_cgroup(sandbox.cgroup)
+        self._unpopulate(sandbox)
+        shutil.rmtree(sandbox.workdir, ignore_errors=True)
+
+    # ---------------- helpers ----------------
+
+    def _get(self, container_id: str) -> _Sandbox:
+        with self._lock:
+            sandbox = self._sandboxes.get(container_id)
+        if sandbox is None:
+            raise KeyError(f"No such sandbox: {container_id}")
+        return sandbox
+
+    def _host_path(self, sandbox: _Sandbox, path: str) -> Path:
+        # the sandbox workdir stands in for /workspace; nothing else of the guest exists
+        rel = os.path.relpath(path, WORKSPACE)
+        if rel.startswith(".."):
+            raise ValueError(f"{path} is outside {WORKSPACE}, the only path a process sandbox has")
+        return sandbox.workdir / rel
+
+    def _populate(self, sandbox_id: str, sandbox: _Sandbox) -> None:
+        upper, work = self.root / f"{sandbox_id}.upper", self.root / f"{sandbox_id}.work"
+        upper.mkdir()
+        work.mkdir()
+        options = f"lowerdir={sandbox.snapshot},upperdir={upper},workdir={work}".encode()
+        if self._libc.mount(b"overlay", str(sandbox.workdir).encode(), b"overlay", 0, options) == 0:
+            sandbox.overlay = (upper, work)
+            return
+        # unprivileged or no overlayfs: a full copy, slower for big snapshots
+        shutil.rmtree(upper, ignore_errors=True)
+        shutil.rmtree(work, ignore_errors=True)
+        shutil.copytree(sandbox.snapshot, sandbox.workdir, symlinks=True, dirs_exist_ok=True)
+
+    def _unpopulate(self, sandbox: _Sandbox) -> None:
+        if sandbox.overlay is not None:
+            self._libc.umount2(str(sandbox.workdir).encode(), MNT_DETACH)
+            for path in sandbox.overlay:
+                shutil.rmtree(path, ignore_errors=True)
+            sandbox.overlay = None
+        elif sandbox.snapshot is not None:
+            for entry in os.scandir(sandbox.workdir):
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.unlink(entry.path)
+
+    def _netns_available(self) -> bool:
+        with self._lock:
+            if self._netns is None:
+                self._netns = _probe_network_namespace()
+            return self._netns
+
+    def _make_cgroup(self, sandbox_id: str, limits: Limits) -> Optional[Path]:
+        if self.cgroup_parent is None:
+            return None
+        cgroup = self.cgroup_parent / sandbox_id
+        try:
+            cgroup.mkdir()
+            (cgroup / "memory.max").write_text(str(limits.mem_mb * 1024 * 1024))
+            (cgroup / "pids.max").write_text(str(limits.pids))
+            (cgroup / "cpu.max").write_text(f"{max(int(limits.cpu * CPU_PERIOD_US), 1000)} {CPU_PERIOD_US}")
+        except OSError:
+            _remove_cgroup(cgroup)
+            return None
+        return cgroup
+
+    def _setup(self, sandbox: _Sandbox) -> Dict[str, Any]:
+        """What sandbox_init applies in the child before exec (see _spawn)."""
+        limits = sandbox.limits
+        mem_bytes = limits.mem_mb * 1024 * 1024
+        cgroup_procs = str(sandbox.cgroup / "cgroup.procs") if sandbox.cgroup else None
+        return {
+            "cgroup_procs": cgroup_procs,
+            "rlimit_as": mem_bytes,
+            "rlimit_cpu": max(1, math.ceil(limits.timeout_s * max(limits.cpu, 1.0))),
+            # without a pids cgroup, RLIMIT_NPROC (per uid) is the only process cap
+            "rlimit_nproc": None if cgroup_procs else limits.pids + _count_user_processes(),
+            "unshare_net": sandbox.network_isolated,
+        }
+
+
+def _spawn(setup: Dict[str, Any], argv: List[str], cwd: Path) -> subprocess.Popen:
+    """
+    Start argv through the sandbox_init wrapper, which applies `setup` and then execs it.
+
+    No preexec_fn: that runs Python in a fork of this multi-threaded process. A
+    failed setup comes back on a status pipe and is raised here, before argv runs.
+    """
+    status_r, status_w = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, "-I", "-S", SANDBOX_INIT, json.dumps(setup), str(status_w), *argv],
+            cwd=cwd,
+            env=_sandbox_env(cwd),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,  # own process group, killed as a unit
+            pass_fds=(status_w,),
+        )
+    except BaseException:
+        os.close(status_r)
+        raise
+    finally:
+        os.close(status_w)
+    with os.fdopen(status_r, "rb") as status:
+        failure = status.read()  # EOF once the wrapper has exec'd argv
+    if failure:
+        proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+        raise OSError(f"Sandbox setup failed: {failure.decode('utf-8', 'replace')}")
+    return proc
+
+
+def _probe_network_namespace() -> bool:
+    """Whether a child of this process can enter a new network namespace."""
+    try:
+        proc = _spawn({"unshare_net": True}, ["/bin/sh", "-c", "exit 0"], Path(tempfile.gettempdir()))
+    except OSError:
+        return False
+    proc.communicate()
+    return proc.returncode == 0
+
+
+def _pump(
+    proc: subprocess.Popen,
+    capture,
+    deadline: float,
+    cancel: Optional[threading.Event],
+) -> Optional[str]:
+    """
+    Stream both pipes into `capture` until EOF and exit.
+
+    Returns None on a normal exit, else why it stopped early ("timeout" / "cancelled").
+    """
+    sel = selectors.DefaultSelector()
+    sel.register(proc.stdout, selectors.EVENT_READ, capture.write_stdout)
+    sel.register(proc.stderr, selectors.EVENT_READ, capture.write_stderr)
+    try:
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timeout"
+            if cancel is not None:
+                if cancel.is_set():
+                    return "cancelled"
+                remaining = min(remaining, POLL_S)
+            for key, _ in sel.select(timeout=remaining):
+                chunk = os.read(key.fd, READ_CHUNK)
+                if chunk:
+                    key.data(chunk)
+                else:
+                    sel.unregister(key.fileobj)
+    finally:
+        sel.close()
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if cancel is not None:
+            if cancel.is_set():
+                return "cancelled"
+            remaining = min(remaining, POLL_S)
+        try:
+            proc.wait(timeout=max(remaining, 0))
+            return None
+        except subprocess.TimeoutExpired:
+            if time.monotonic() >= deadline:
+                return "timeout"
+
+
+def _kill_group(pgid: int) -> None:
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _sandbox_env(workdir: Path) -> Dict[str, str]:
+    return {
+        "PATH": os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin"),
+        "LANG": os.environ.get("LANG", "C.UTF-8"),
+        "HOME": str(workdir),
+        "TMPDIR": str(workdir),
+    }
+
+
+def _tree_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _count_user_processes() -> int:
+    uid = os.getuid()
+    count = 0
+    for entry in os.scandir("/proc"):
+        if entry.name.isdigit():
+            try:
+                if entry.stat().st_uid == uid:
+                    count += 1
+            except OSError:
+                continue
+    return count
+
+
+def _default_cgroup_parent() -> Optional[Path]:
+    """/sys/fs/cgroup/aegix if cgroup v2 is mounted and we may manage it (usually root)."""
+    if not (CGROUP_ROOT / "cgroup.controllers").exists():
+        return None
+    parent = CGROUP_ROOT / "aegix"
+    try:
+        parent.mkdir(exist_ok=True)
+        for cgroup in (CGROUP_ROOT, parent):
+            (cgroup / "cgroup.subtree_control").write_text(CGROUP_CONTROLLERS)
+    except OSError:
+        return None
+    return parent
+
+
+def _remove_cgroup(cgroup: Path) -> None:
+    kill = cgroup / "cgroup.kill"
+    try:
+        if kill.exists():
+            kill.write_text("1")
+        else:
+            for pid in (cgroup / "cgroup.procs").read_text().split():
+                _kill_group(int(pid))
+    except OSError:
+        pass
+    for _ in range(50):  # the kernel refuses rmdir until the last task is gone
+        try:
+            cgroup.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(0.01)
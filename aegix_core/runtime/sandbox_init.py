@@ -0,0 +1,73 @@
+"""
+Exec wrapper LocalProcessBackend starts sandboxed commands through.
+
+    python -I -S sandbox_init.py <setup json> <status fd> <argv...>
+
+Joins the cgroup, sets the rlimits and enters a fresh network namespace, then
+execs argv. This runs in its own single-threaded interpreter, unlike a
+preexec_fn, which runs in a fork of the (threaded) router process. A setup
+failure is written to `status fd` and the wrapper exits before argv ever runs;
+the fd is close-on-exec, so the parent reads EOF once argv has started.
+
+Run as a script, not imported from the package: stdlib only.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import ctypes
+import json
+import os
+import resource
+import sys
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+SETUP_FAILED_EXIT = 127
+
+
+def apply(setup: Dict[str, Any]) -> None:
+    if setup.get("cgroup_procs"):
+        with open(setup["cgroup_procs"], "w") as f:
+            f.write("0")
+    for name in ("RLIMIT_AS", "RLIMIT_CPU", "RLIMIT_NPROC"):
+        value = setup.get(name.lower())
+        if value is not None:
+            resource.setrlimit(getattr(resource, name), (value, value))
+    # promised at create(): never fall back to the host network here
+    if setup.get("unshare_net") and not unshare_network(ctypes.CDLL(None, use_errno=True)):
+        raise OSError("network namespace unavailable")
+
+
+def unshare_network(libc: ctypes.CDLL) -> bool:
+    """Move the calling process into an empty network namespace."""
+    uid, gid = os.getuid(), os.getgid()
+    if libc.unshare(CLONE_NEWNET) == 0:
+        return True
+    # unprivileged: a user namespace grants CAP_SYS_ADMIN over the new netns
+    if libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) != 0:
+        return False
+    try:
+        with open("/proc/self/setgroups", "w") as f:
+            f.write("deny")
+        with open("/proc/self/uid_map", "w") as f:
+            f.write(f"{uid} {uid} 1")
+        with open("/proc/self/gid_map", "w") as f:
+            f.write(f"{gid} {gid} 1")
+    except OSError:
+        pass  # still isolated from the network, just running unmapped
+    return True
+
+
+def main(argv: List[str]) -> None:
+    setup, status_fd, cmd = json.loads(argv[1]), int(argv[2]), argv[3:]
+    os.set_inheritable(status_fd, False)
+    try:
+        apply(setup)
+        os.execv(cmd[0], cmd)
+    except BaseException as e:
+        os.write(status_fd, f"{type(e).__name__}: {e}".encode("utf-8", "replace"))
+        os._exit(SETUP_FAILED_EXIT)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
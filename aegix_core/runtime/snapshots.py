@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+from aegix.models import AdjustedPolicy
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+@dataclass
+class Snapshot:
+    name: str
+    id: str                # backend handle: an image id (docker) or a procsnap- id (process)
+    backend: str
+    source_image: str
+    size_bytes: int
+    created_at: float      # epoch seconds
+    last_used: float       # epoch seconds; LRU order for eviction
+
+    def as_report(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "id": self.id,
+            "backend": self.backend,
+            "source_image": self.source_image,
+            "size_bytes": self.size_bytes,
+        }
+
+
+class SnapshotError(Exception):
+    """A snapshot could not be made or used; `error_type` is the AegixError type to report."""
+
+    def __init__(self, error_type: str, message: str) -> None:
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class SnapshotStore:
+    """
+    Named snapshots of prepared sandboxes.
+
+    prepare() runs a setup command (dependency installs, fixtures) in a fresh
+    sandbox and commits the result under a name; a call with
+    ctx.metadate["snapshot"] = name then starts from it instead of the base
+    image, and a session can be reset back to it. Committing is the backend's
+    job (backend.commit / backend.remove_snapshot): an image commit for docker,
+    a directory copy mounted as an overlay for the process backend.
+
+    Snapshots are evicted least recently used first once their summed size
+    exceeds max_bytes. The name -> snapshot table is kept in index_path so
+    snapshots survive a restart; use order is tracked in memory and written
+    with the next commit / remove, or on close().
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, Any],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        index_path: Optional[Path] = None,
+    ) -> None:
+        self.backends = backends
+        self.max_bytes = max_bytes
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._dirty = False  # last_used changed since the index was written
+        if index_path is not None and index_path.exists():
+            for entry in json.loads(index_path.read_text()):
+                snap = Snapshot(**entry)
+                self._snapshots[snap.name] = snap
+                register = getattr(self.backends.get(snap.backend), "register_snapshot", None)
+                if register is not None:
+                    register(snap.id)
+
+    def prepare(
+        self,
+        name: str,
+        backend_name: str,
+        image: str,
+        setup_cmd: str,
+        adjusted: Optional[AdjustedPolicy] = None,
+        timeout_s: Optional[int] = None,
+    ) -> Snapshot:
+        """Run setup_cmd in a new sandbox of `image` and snapshot it as `name`."""
+        backend = self._backend(backend_name)
+        container_id = backend.create(image=image, adjusted=adjusted)
+        try:
+            res = backend.exec(container_id=container_id, cmd=setup_cmd, timeout_s=timeout_s)
+            if res.exit_code != 0:
+                raise SnapshotError(
+                    "NONZERO_EXIT",
+                    f"Snapshot {name}: setup exited {res.exit_code}: {(res.stderr or '')[-500:]}",
+                )
+            return self.commit(name, backend_name, container_id, image)
+        finally:
+            backend.destroy(container_id)
+
+    def commit(self, name: str, backend_name: str, container_id: str, source_image: str) -> Snapshot:
+        """Snapshot a running sandbox as `name`, replacing an older snapshot of that name."""
+        backend = self._backend(backend_name)
+        snapshot_id, size = backend.commit(container_id, name)
+        now = time.time()
+        snap = Snapshot(
+            name=name, id=snapshot_id, backend=backend_name, source_image=source_image,
+            size_bytes=size, created_at=now, last_used=now,
+        )
+        with self._lock:
+            old = self._snapshots.get(name)
+            self._snapshots[name] = snap
+        if old is not None and old.id != snap.id:
+            self._drop(old)
+        self._evict(keep=name)
+        self._save()
+        return snap
+
+    def get(self, name: str) -> Snapshot:
+        """The snapshot called `name`, marked as just used."""
+        with self._lock:
+            snap = self._snapshots.get(name)
+            if snap is None:
+                raise SnapshotError("INVALID_TOOL_CALL", f"No such snapshot: {name}")
+            snap.last_used = time.time()
+            self._dirty = True  # saved later: no disk write on the call path
+        return snap
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            snap = self._snapshots.pop(name, None)
+        if snap is None:
+            return False
+        self._drop(snap)
+        self._save()
+        return True
+
+    def close(self) -> None:
+        """Write use order that changed since the last save, so LRU eviction survives a restart."""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self._save()
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {**snap.as_report(), "created_at": snap.created_at, "last_used": snap.last_used}
+                for snap in sorted(self._snapshots.values(), key=lambda s: -s.last_used)
+            ]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(snap.size_bytes for snap in self._snapshots.values())
+
+    # ---------------- helpers ----------------
+
+    def _backend(self, name: str) -> Any:
+        backend = self.backends.get(name)
+        if backend is None or getattr(backend, "commit", None) is None:
+            raise SnapshotError("INVALID_TOOL_CALL", f"Backend '{name}' can't take snapshots")
+        return backend
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            total = sum(snap.size_bytes for snap in self._snapshots.values())
+            victims = []
+            for snap in sorted(self._snapshots.values(), key=lambda s: s.last_used):
+                if total <= self.max_bytes:
+                    break
+                if snap.name == keep:
+                    continue  # the one just taken stays, even if it alone is over budget
+                victims.append(self._snapshots.pop(snap.name))
+                total -= snap.size_bytes
+        for snap in victims:
+            self._drop(snap)
+
+    def _drop(self, snap: Snapshot) -> None:
+        try:
+            self.backends[snap.backend].remove_snapshot(snap.id)
+        except Exception:
+            pass  # still in use by a sandbox, or already gone; it no longer counts either way
+
+    def _save(self) -> None:
+        if self.index_path is None:
+            return
+        # one writer at a time (they share the tmp file), without holding up get()
+        with self._save_lock:
+            with self._lock:
+                data = [asdict(snap) for snap in self._snapshots.values()]
+                self._dirty = False
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=2))
+            os.replace(tmp, self.index_path)
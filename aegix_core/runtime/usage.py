@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import threading
+
+DEFAULT_INTERVAL_S = 0.5
+
+class UsageSampler:
+    """
+    Polls backend.usage(container_id) on a daemon thread while one command runs.
+
+    backend.usage() returns cumulative counters (cpu_ns, io_read_bytes,
+    io_write_bytes) and current gauges (mem_bytes, pids), or None when the
+    sandbox can't report them. The first sample is the baseline, so a reused
+    container's earlier work is not counted; CPU and I/O are the difference to
+    the last sample, taken when the command ends. Memory and pids are peaks over
+    the samples, so spikes shorter than interval_s can be missed. One backend
+    call per interval_s, off the exec path.
+    """
+
+    def __init__(self, backend: Any, container_id: str, interval_s: float = DEFAULT_INTERVAL_S) -> None:
+        self.backend = backend
+        self.container_id = container_id
+        self.interval_s = interval_s
+
+        self._first: Optional[Dict[str, int]] = None
+        self._last: Optional[Dict[str, int]] = None
+        self._peak_mem = 0
+        self._peak_pids = 0
+        self._samples = 0
+        self._errors = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aegix-usage", daemon=True)
+
+    def start(self) -> UsageSampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        """Take the final sample and summarise."""
+        self._stopped.set()
+        self._thread.join()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"samples": self._samples, "interval_s": self.interval_s}
+        if self._first is None or self._last is None:
+            result["available"] = False
+            return result
+
+        def delta(key: str) -> int:
+            return max(self._last.get(key, 0) - self._first.get(key, 0), 0)
+
+        result.update({
+            "available": True,
+            "cpu_s": round(delta("cpu_ns") / 1e9, 3),
+            "peak_mem_mb": round(self._peak_mem / (1024 * 1024), 1),
+            "peak_pids": self._peak_pids,
+            "io_read_bytes": delta("io_read_bytes"),
+            "io_write_bytes": delta("io_write_bytes"),
+        })
+        if self._errors:
+            result["errors"] = self._errors
+        return result
+
+    def _run(self) -> None:
+        self._sample()
+        while not self._stopped.wait(self.interval_s):
+            self._sample()
+        self._sample()
+
+    def _sample(self) -> None:
+        try:
+            usage = self.backend.usage(self.container_id)
+        except Exception:
+            self._errors += 1  # a missed sample only makes the numbers coarser
+            return
+        if usage is None:
+            return
+        if self._first is None:
+            self._first = usage
+        self._last = usage
+        self._samples += 1
+        self._peak_mem = max(self._peak_mem, usage.get("mem_bytes", 0))
+        self._peak_pids = max(self._peak_pids, usage.get("pids", 0))
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+import json
+import threading
+import time
+
+from aegix.logging.audit import AuditLogger
+from aegix.models import AdjustedPolicy
+from aegix.runtime.docker_backend import sandbox_options
+
+@dataclass(frozen=True)
+class SessionConfig:
+    idle_timeout_s: float = 600.0        # closed after this long without a call
+    max_lifetime_s: float = 3600.0       # closed this long after opening, busy or not
+    max_calls: Optional[int] = 500       # budget: calls per session
+    max_exec_s: Optional[float] = 1800.0 # budget: summed exec wall time per session
+    reap_interval_s: float = 5.0
+
+    def __post_init__(self) -> None:
+        if self.idle_timeout_s <= 0 or self.max_lifetime_s <= 0:
+            raise ValueError("Session timeouts must be positive")
+
+
+class SessionError(Exception):
+    """A call could not run in its session; `error_type` is the AegixError type to report."""
+
+    def __init__(self, error_type: str, message: str) -> None:
+        super().__init__(message)
+        self.error_type = error_type
+
+
+SessionKey = Tuple[str, str, str]  # (image, backend, sandbox options) fixed at open
+
+@dataclass
+class Session:
+    session_id: str
+    key: SessionKey
+    backend: Any
+    container_id: str
+    adjusted: Optional[AdjustedPolicy] = None  # what the sandbox was created with, to recreate it
+    opened_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    calls: int = 0
+    exec_s: float = 0.0
+    closed: bool = False
+    state: Dict[str, Any] = field(default_factory=dict)  # router-owned, e.g. the synced workspace
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)  # one call at a time
+
+    def remaining_exec_s(self, config: SessionConfig) -> Optional[float]:
+        return None if config.max_exec_s is None else max(config.max_exec_s - self.exec_s, 0.0)
+
+
+class SessionManager:
+    """
+    Long-lived sandboxes shared by the calls of one session.
+
+    acquire() returns the session's container, opening it on first use; calls in a
+    session run one at a time and see each other's /workspace. Sessions close when
+    idle for idle_timeout_s, max_lifetime_s after opening, when their container
+    breaks, or explicitly. A session that has used up its call / exec-time budget
+    rejects further calls until it is closed. reset() puts the sandbox back to
+    the image (or snapshot) it was opened from without closing the session.
+    SESSION_OPEN / SESSION_RESET / SESSION_CLOSE are written to the audit log.
+    """
+
+    def __init__(self, auditor: AuditLogger, config: Optional[SessionConfig] = None) -> None:
+        self.auditor = auditor
+        self.config = config or SessionConfig()
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Session] = {}
+        self._opening: Dict[str, threading.Event] = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._reap_loop, name="aegix-sessions", daemon=True)
+        self._thread.start()
+
+    def acquire(
+        self,
+        session_id: str,
+        image: str,
+        backend_name: str,
+        backend: Any,
+        adjusted: AdjustedPolicy,
+    ) -> Tuple[Session, bool]:
+        """Lease the session for one call (blocks while another call holds it). True if newly opened."""
+        key = (image, backend_name, json.dumps(sandbox_options(adjusted), sort_keys=True))
+        while True:
+            with self._lock:
+                if self._stopped.is_set():
+                    raise RuntimeError("Session manager is closed")
+                session = self._sessions.get(session_id)
+                opening = self._opening.get(session_id)
+                if session is None and opening is None:
+                    self._opening[session_id] = threading.Event()
+            if opening is not None:
+                opening.wait()
+                continue
+            if session is None:
+                return self._open(session_id, key, backend, adjusted), True
+
+            session.lock.acquire()
+            expired = self._expiry(session, time.monotonic())
+            if session.closed or expired:
+                session.lock.release()
+                if expired:
+                    self.close(session_id, reason=expired)
+                continue
+            try:
+                self._check(session, key)
+            except SessionError:
+                session.lock.release()
+                raise
+            return session, False
+
+    def release(self, session: Session, exec_s: float = 0.0, broken: bool = False) -> None:
+        session.calls += 1
+        session.exec_s += exec_s
+        session.last_used = time.monotonic()
+        session.lock.release()
+        if broken:
+            self.close(session.session_id, reason="broken")
+
+    def close(self, session_id: str, reason: str = "closed") -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        with session.lock:  # let an in-flight call finish first
+            session.closed = True
+        self._destroy(session, reason)
+        return True
+
+    def reset(self, session_id: str) -> bool:
+        """
+        Discard what the session's calls changed. Backends with reset() (the process
+        backend over a snapshot) roll back in place; otherwise the container is
+        replaced by a new one of the same image, which a warm pool hands out at once.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        start = time.monotonic()
+        with session.lock:
+            if session.closed:
+                return False
+            old_id = session.container_id
+            reset = getattr(session.backend, "reset", None)
+            in_place = reset is not None and reset(old_id)
+            if not in_place:
+                session.container_id = session.backend.create(image=session.key[0], adjusted=session.adjusted)
+                try:
+                    session.backend.destroy(old_id)
+                except Exception:
+                    pass
+            session.state.clear()  # e.g. the synced workspace manifest is stale now
+        self.auditor.log("SESSION_RESET", {
+            "session_id": session_id,
+            "container_id": session.container_id,
+            "replaced": not in_place,
+            "reset_ms": round((time.monotonic() - start) * 1000, 3),
+        })
+        return True
+
+    def close_all(self, reason: str = "shutdown") -> None:
+        self._stopped.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            self.close(session_id, reason=reason)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                s.session_id: {
+                    "container_id": s.container_id,
+                    "image": s.key[0],
+                    "backend": s.key[1],
+                    "calls": s.calls,
+                    "exec_s": round(s.exec_s, 3),
+                    "age_s": round(now - s.opened_at, 3),
+                    "idle_s": round(now - s.last_used, 3),
+                }
+                for s in self._sessions.values()
+            }
+
+    # ---------------- helpers ----------------
+
+    def _open(self, session_id: str, key: SessionKey, backend: Any, adjusted: AdjustedPolicy) -> Session:
+        try:
+            container_id = backend.create(image=key[0], adjusted=adjusted)
+            session = Session(
+                session_id=session_id, key=key, backend=backend, container_id=container_id, adjusted=adjusted,
+            )
+            session.lock.acquire()
+            with self._lock:
+                self._sessions[session_id] = session
+        finally:
+            with self._lock:
+                self._opening.pop(session_id).set()
+
+        self.auditor.log("SESSION_OPEN", {
+            "session_id": session_id,
+            "container_id": container_id,
+            "image": key[0],
+            "backend": key[1],
+        })
+        return session
+
+    def _check(self, session: Session, key: SessionKey) -> None:
+        if key != session.key:
+            raise SessionError(
+                "INVALID_TOOL_CALL",
+                f"Session {session.session_id} is bound to image={session.key[0]}, "
+                f"backend={session.key[1]} and the limits it was opened with",
+            )
+        cfg = self.config
+        if cfg.max_calls is not None and session.calls >= cfg.max_calls:
+            raise SessionError("BUDGET_EXCEEDED", f"Session {session.session_id} used its {cfg.max_calls} calls")
+        if cfg.max_exec_s is not None and session.exec_s >= cfg.max_exec_s:
+            raise SessionError("BUDGET_EXCEEDED", f"Session {session.session_id} used its {cfg.max_exec_s}s of exec time")
+
+    def _expiry(self, session: Session, now: float) -> Optional[str]:
+        if now - session.opened_at > self.config.max_lifetime_s:
+            return "max_lifetime"
+        if now - session.last_used > self.config.idle_timeout_s:
+            return "idle_timeout"
+        return None
+
+    def _reap_loop(self) -> None:
+        while not self._stopped.wait(self.config.reap_interval_s):
+            now = time.monotonic()
+            with self._lock:
+                # sessions busy with a call are left alone; acquire() re-checks expiry
+                expired = [
+                    (s.session_id, reason) for s in self._sessions.values()
+                    if not s.lock.locked() and (reason := self._expiry(s, now))
+                ]
+            for session_id, reason in expired:
+                try:
+                    self.close(session_id, reason=reason)
+                except Exception:
+                    pass  # the reaper must never die; close_all() retries at shutdown
+
+    def _destroy(self, session: Session, reason: str) -> None:
+        data: Dict[str, Any] = {
+            "session_id": session.session_id,
+            "container_id": session.container_id,
+            "reason": reason,
+            "calls": session.calls,
+            "exec_s": round(session.exec_s, 3),
+            "age_s": round(time.monotonic() - session.opened_at, 3),
+        }
+        try:
+            session.backend.destroy(session.container_id)
+        except Exception as e:
+            data["destroy_error"] = f"{type(e).__name__}: {e}"
+        self.auditor.log("SESSION_CLOSE", data)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import heapq
+import json
+import os
+
+from aegix.io.store import MANIFEST, BlobStore
+from aegix.logging.audit import segment_paths
+from aegix.metrics import DEFAULT_BUCKETS, Histogram
+
+# bytes; 1 KiB .. 1 GiB in powers of 4
+SIZE_BUCKETS: Tuple[float, ...] = tuple(float(1024 * 4 ** i) for i in range(11))
+
+TOP_SLOWEST = 10
+BATCH_SIZE = 256  # run dirs per worker task
+CMD_PREVIEW = 200
+
+@dataclass(frozen=True)
+class StatsFilter:
+    since_ns: Optional[int] = None
+    until_ns: Optional[int] = None  # exclusive
+    tools: Tuple[str, ...] = ()      # empty => every tool
+
+    def admits_time(self, ts_ns: Optional[int]) -> bool:
+        if ts_ns is None:
+            return self.since_ns is None and self.until_ns is None
+        if self.since_ns is not None and ts_ns < self.since_ns:
+            return False
+        return self.until_ns is None or ts_ns < self.until_ns
+
+
+@dataclass
+class RunStats:
+    """Mergeable aggregate over runs; size is independent of how many runs went in."""
+    runs: int = 0
+    ok: int = 0
+    unreadable: int = 0
+    phases: Dict[str, Histogram] = field(default_factory=dict)  # seconds
+    errors: Counter = field(default_factory=Counter)
+    tools: Counter = field(default_factory=Counter)
+    output_bytes: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    max_output_bytes: int = 0
+    slowest: List[Tuple[float, str, str, str]] = field(default_factory=list)  # min-heap (total_ms, run_id, tool, cmd)
+    events: Counter = field(default_factory=Counter)
+
+    def add_report(self, report: Dict[str, Any]) -> None:
+        self.runs += 1
+        self.ok += bool(report.get("ok"))
+        tool = (report.get("tool") or {}).get("tool_name") or ""
+        self.tools[tool] += 1
+        if not report.get("ok"):
+            self.errors[(report.get("error") or {}).get("type") or "UNKNOWN"] += 1
+
+        timings = dict(report.get("timings_ms") or {})
+        # the wall span; phases overlap (destroy runs during collect), so their sum
+        # over-counts. Only reports from before "total" was recorded fall back to it
+        total_ms = timings.pop("total", None)
+        if total_ms is None:
+            total_ms = sum(timings.values())
+        for phase, ms in timings.items():
+            self._phase(phase).observe(ms / 1000)
+        self._phase("total").observe(total_ms / 1000)
+
+        exec_ = report.get("exec")
+        if exec_ is not None:
+            size = (exec_.get("stdout_len") or 0) + (exec_.get("stderr_len") or 0)
+            self.output_bytes.observe(size)
+            self.max_output_bytes = max(self.max_output_bytes, size)
+
+        cmd = ((report.get("tool") or {}).get("cmd") or "")[:CMD_PREVIEW]
+        self._keep_slowest((total_ms, report.get("run_id") or "", tool, cmd))
+
+    def merge(self, other: RunStats) -> None:
+        self.runs += other.runs
+        self.ok += other.ok
+        self.unreadable += other.unreadable
+        for phase, hist in other.phases.items():
+            self._phase(phase).merge(hist)
+        self.errors.update(other.errors)
+        self.tools.update(other.tools)
+        self.output_bytes.merge(other.output_bytes)
+        self.max_output_bytes = max(self.max_output_bytes, other.max_output_bytes)
+        for entry in other.slowest:
+            self._keep_slowest(entry)
+        self.events.update(other.events)
+
+    def as_dict(self) -> Dict[str, Any]:
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            "runs": self.runs,
+            "ok": self.ok,
+            "unreadable": self.unreadable,
+            "tools": dict(self.tools.most_common()),
+            "errors": dict(self.errors.most_common()),
+            "phases_ms": {
+                phase: {
+                    "count": hist.count,
+                    "mean": ms(hist.sum / hist.count) if hist.count else None,
+                    "p50": ms(hist.quantile(0.5)),
+                    "p99": ms(hist.quantile(0.99)),
+                }
+                for phase, hist in sorted(self.phases.items())
+            },
+            "output_bytes": {
+                "count": self.output_bytes.count,
+                "p50": self._output_quantile(0.5),
+                "p99": self._output_quantile(0.99),
+                "max": self.max_output_bytes,
+            },
+            "slowest": [
+                {"run_id": run_id, "tool_name": tool, "total_ms": round(total_ms, 3), "cmd": cmd}
+                for total_ms, run_id, tool, cmd in sorted(self.slowest, reverse=True)
+            ],
+            "events": dict(self.events.most_common()),
+        }
+
+    def _output_quantile(self, q: float) -> Optional[int]:
+        value = self.output_bytes.quantile(q)
+        # buckets are coarse at this scale; never report more than was seen
+        return None if value is None else min(int(round(value)), self.max_output_bytes)
+
+    def _phase(self, name: str) -> Histogram:
+        hist = self.phases.get(name)
+        if hist is None:
+            hist = self.phases[name] = Histogram(DEFAULT_BUCKETS)
+        return hist
+
+    def _keep_slowest(self, entry: Tuple[float, str, str, str]) -> None:
+        if len(self.slowest) < TOP_SLOWEST:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+def collect_stats(
+    runs_root: Path,
+    flt: Optional[StatsFilter] = None,
+    events_path: Optional[Path] = None,
+    blob_root: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> RunStats:
+    """
+    Aggregate every run under runs_root (and the audit log's event counts).
+
+    Run directories are listed lazily and handed to worker processes in batches
+    of BATCH_SIZE, with at most two batches per worker in flight; each worker folds
+    its batch into a RunStats that is merged here. Memory stays constant in the
+    number of runs. Percentiles come from fixed-bucket histograms, so they are
+    estimates within one bucket. workers=0 runs everything in this process.
+    """
+    flt = flt or StatsFilter()
+    tasks: Iterator[Tuple[Any, ...]] = chain(
+        (("runs", batch, flt, blob_root) for batch in _batches(iter_run_dirs(runs_root), BATCH_SIZE)),
+        (("events", path, flt) for path in (segment_paths(events_path) if events_path else ())),
+    )
+    total = RunStats()
+    if workers == 0:
+        for task in tasks:
+            total.merge(_run_task(task))
+        return total
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight: Set[Future] = set()
+        for task in tasks:
+            if len(inflight) >= 2 * workers:
+                done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+            inflight.add(pool.submit(_run_task, task))
+        for future in inflight:
+            total.merge(future.result())
+    return total
+
+
+def iter_run_dirs(runs_root: Path) -> Iterator[Path]:
+    """Run directories under runs_root (a report.json or a store manifest), in directory order."""
+    with os.scandir(runs_root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                path = Path(entry.path)
+                if (path / "report.json").exists() or (path / MANIFEST).exists():
+                    yield path
+
+
+def read_report(run_dir: Path, blob_root: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """A run's report.json, from the run dir or (StoreArtifactWriter runs) the blob store."""
+    path = run_dir / "report.json"
+    if path.exists():
+        return json.loads(path.read_bytes())
+    if blob_root is None:
+        return None
+    manifest = json.loads((run_dir / MANIFEST).read_bytes())
+    entry = manifest.get("artifacts", {}).get("report.json")
+    if entry is None:
+        return None
+    with BlobStore(blob_root).open(entry["digest"]) as f:
+        return json.load(f)
+
+
+def format_table(stats: Dict[str, Any]) -> str:
+    """Plain-text rendering of RunStats.as_dict()."""
+    lines = [f"runs: {stats['runs']}  ok: {stats['ok']}  unreadable: {stats['unreadable']}", ""]
+
+    lines.append(f"{'phase':<16}{'count':>10}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    for phase, row in stats["phases_ms"].items():
+        lines.append(
+            f"{phase:<16}{row['count']:>10}{_cell(row['mean']):>12}{_cell(row['p50']):>12}{_cell(row['p99']):>12}"
+        )
+
+    out = stats["output_bytes"]
+    lines += ["", f"output bytes: p50 {out['p50'] if out['p50'] is not None else '-'}  p99 {out['p99'] if out['p99'] is not None else '-'}  max {out['max']}"]
+
+    for title, counts in (("errors", stats["errors"]), ("tools", stats["tools"]), ("events", stats["events"])):
+        if counts:
+            lines += ["", f"{title}:"]
+            lines += [f"  {name:<28}{n:>10}" for name, n in counts.items()]
+
+    if stats["slowest"]:
+        lines += ["", "slowest:"]
+        for row in stats["slowest"]:
+            lines.append(f"  {row['total_ms']:>12.1f} ms  {row['run_id']:<24} {row['tool_name']:<10} {row['cmd'][:60]}")
+    return "\n".join(lines)
+
+
+# ---------------- workers ----------------
+
+def _run_task(task: Tuple[Any, ...]) -> RunStats:
+    if task[0] == "runs":
+        return _runs_task(*task[1:])
+    return _events_task(*task[1:])
+
+
+def _runs_task(run_dirs: Sequence[Path], flt: StatsFilter, blob_root: Optional[Path]) -> RunStats:
+    stats = RunStats()
+    for run_dir in run_dirs:
+        try:
+            report = read_report(run_dir, blob_root)
+        except (OSError, ValueError):
+            report = None
+        if report is None:
+            stats.unreadable += 1
+            continue
+        if flt.tools and (report.get("tool") or {}).get("tool_name") not in flt.tools:
+            continue
+        started_at = report.get("started_at")
+        if started_at is None:  # reports written before started_at was recorded
+            started_at = (run_dir / "report.json").stat().st_mtime if (run_dir / "report.json").exists() else None
+        if not flt.admits_time(None if started_at is None else int(started_at * 1e9)):
+            continue
+        stats.add_report(report)
+    return stats
+
+
+def _events_task(path: Path, flt: StatsFilter) -> RunStats:
+    stats = RunStats()
+    with path.open("rb") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+                if flt.admits_time(event.get("ts_ns")):
+                    stats.events[event["type"]] += 1
+            except (ValueError, KeyError, TypeError):
+                continue  # torn line
+    return stats
+
+
+def _batches(items: Iterable[Path], size: int) -> Iterator[List[Path]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _cell(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+from aegix.runtime.archive import tar_stream
+
+CHUNK_SIZE = 1024 * 1024
+WORKSPACE_DEST = "/workspace"
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class WorkspaceHasher:
+    """
+    Content hashes of a host workspace, as {relative posix path: sha256}.
+
+    File hashes are cached by (mtime_ns, size, inode), so re-hashing an unchanged
+    tree costs one stat per file instead of reading every byte again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+
+    def manifest(self, root: str | Path) -> Dict[str, str]:
+        root = Path(root)
+        out: Dict[str, str] = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                if path.is_symlink() or not path.is_file():
+                    continue
+                out[path.relative_to(root).as_posix()] = self._hash(path)
+        return out
+
+    def digest(self, root: str | Path) -> str:
+        return manifest_digest(self.manifest(root))
+
+    def _hash(self, path: Path) -> str:
+        st = path.stat()
+        sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        key = str(path)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        digest = file_sha256(path)
+        with self._lock:
+            self._cache[key] = (sig, digest)
+        return digest
+
+
+class WorkspaceSyncer:
+    """
+    Copies a host workspace into a sandbox's /workspace.
+
+    The first sync sends the whole tree as one streamed tar (backend.put_archive).
+    Given the manifest of what a sandbox already holds, later syncs send only files
+    whose content hash changed and remove files deleted on the host. Changes made
+    inside the sandbox are not tracked: a file is re-sent only when the host copy
+    changes.
+    """
+
+    def __init__(self, hasher: Optional[WorkspaceHasher] = None, dest: str = WORKSPACE_DEST) -> None:
+        self.hasher = hasher or WorkspaceHasher()
+        self.dest = dest
+
+    def sync(
+        self,
+        backend,
+        container_id: str,
+        root: str | Path,
+        previous: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Returns the manifest now in the sandbox and stats for report.json."""
+        start = time.perf_counter()
+        manifest = self.hasher.manifest(root)
+        if previous is None:
+            changed = list(manifest)
+            deleted = []
+        else:
+            changed = [rel for rel, digest in manifest.items() if previous.get(rel) != digest]
+            deleted = [rel for rel in previous if rel not in manifest]
+
+        bytes_sent = 0
+        if changed or previous is None:
+            counter = [0]
+
+            def _chunks():
+                for chunk in tar_stream(Path(root), changed):
+                    counter[0] += len(chunk)
+                    yield chunk
+
+            backend.put_archive(container_id, self.dest, _chunks())
+            bytes_sent = counter[0]
+        if deleted:
+            backend.remove_paths(container_id, self.dest, deleted)
+
+        return manifest, {
+            "mode": "full" if previous is None else "incremental",
+            "files": len(manifest),
+            "files_sent": len(changed),
+            "files_deleted": len(deleted),
+            "bytes_sent": bytes_sent,
+            "sync_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+
+def manifest_digest(manifest: Dict[str, str]) -> str:
+    raw = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
@@ -0,0 +1,92 @@
+"""
+Microbenchmark: command matching throughput vs. deny-list size.
+
+Compares PatternSet (one tokenising pass, then only candidate patterns) with the
+old one-regex-at-a-time loop, and shows PolicyEngine.evaluate with and without
+the decision cache.
+
+    python benchmarks/policy_matcher.py --counts 10 100 500 1000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from typing import Callable, Dict, List
+
+from aegix.models import ToolCall, ToolContext
+from aegix.policy import PatternSet, PolicyConfig, PolicyEngine
+
+COMMANDS = [
+    "ls -la /workspace",
+    "python -c 'print(1 + 1)'",
+    "cat README.md | grep -n aegix",
+    "find . -name '*.py' -newer setup.cfg",
+    "echo done && exit 0",
+]
+
+
+def make_patterns(n: int) -> List[str]:
+    return [rf"(?i)\bforbidden_tool_{i}\b" for i in range(n)]
+
+
+def rate(fn: Callable[[int], None], iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return iterations / (time.perf_counter() - start)
+
+
+def bench(n: int, iterations: int) -> Dict[str, float]:
+    patterns = make_patterns(n)
+    compiled = [re.compile(p) for p in patterns]
+    pattern_set = PatternSet(patterns)
+
+    def naive(i: int) -> None:
+        cmd = COMMANDS[i % len(COMMANDS)]
+        for r in compiled:
+            if r.search(cmd):
+                break
+
+    def combined(i: int) -> None:
+        pattern_set.search(COMMANDS[i % len(COMMANDS)])
+
+    cfg = PolicyConfig(deny_cmd_patterns=patterns)
+    uncached = PolicyEngine(cfg, cache_size=0)
+    cached = PolicyEngine(cfg)
+    calls = [ToolCall(tool_name="bash", cmd=c) for c in COMMANDS]
+    ctx = ToolContext(run_id="bench")
+
+    return {
+        "patterns": n,
+        "naive_match_per_s": rate(naive, iterations),
+        "pattern_set_match_per_s": rate(combined, iterations),
+        "evaluate_per_s": rate(lambda i: uncached.evaluate(calls[i % len(calls)], ctx), iterations),
+        "evaluate_cached_per_s": rate(lambda i: cached.evaluate(calls[i % len(calls)], ctx), iterations),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 500, 1000])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    rows = [bench(n, args.iterations) for n in args.counts]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'patterns':>9} {'naive/s':>12} {'pattern_set/s':>14} {'evaluate/s':>12} {'cached/s':>12}")
+    for row in rows:
+        print(
+            f"{row['patterns']:>9} {row['naive_match_per_s']:>12,.0f} {row['pattern_set_match_per_s']:>14,.0f}"
+            f" {row['evaluate_per_s']:>12,.0f} {row['evaluate_cached_per_s']:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
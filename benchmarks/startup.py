@@ -0,0 +1,135 @@
+"""
+Startup benchmark: wall time of fresh `aegix` processes.
+
+  help          aegix --help
+  denied_run    aegix run with a command the default policy denies
+  import_router python -c "import aegix.router"
+  denied_router a policy-denied ToolRouter.handle through DockerBackend; also
+                checks that docker was never imported (denial short-circuits)
+
+Each scenario runs in a new interpreter, so module imports are included.
+
+    python benchmarks/startup.py --repeat 20 --output startup.json
+    python benchmarks/startup.py --baseline startup.json --tolerance 0.2
+
+With --baseline, every scenario whose median got slower by more than the
+tolerance is reported and the exit status is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+DENIED_CMD = "sudo rm -rf /"
+
+DENIED_ROUTER = f"""
+import sys, tempfile
+from pathlib import Path
+from aegix.io.artifacts import ArtifactWriter
+from aegix.logging.audit import AuditLogger
+from aegix.models import ToolCall, ToolContext
+from aegix.policy import PolicyEngine
+from aegix.router import ToolRouter
+from aegix.runtime.docker_backend import DockerBackend
+
+root = Path(tempfile.mkdtemp())
+auditor = AuditLogger(root / "events.jsonl")
+policy = Path(sys.argv[1])
+router = ToolRouter(PolicyEngine.from_file(policy), DockerBackend(), auditor, ArtifactWriter(root))
+result = router.handle(ToolCall(tool_name="bash", cmd={DENIED_CMD!r}), ToolContext(run_id="bench"), root / "bench")
+router.close()
+auditor.close()
+assert result.error is not None and result.error.type == "DENIED_POLICY", result
+assert "docker" not in sys.modules, "a denied call imported docker"
+"""
+
+DEFAULT_POLICY = Path(__file__).resolve().parent.parent / "aegix_core" / "policy" / "default.yaml"
+
+
+def scenarios(workdir: Path, policy: Path) -> Dict[str, List[str]]:
+    py = sys.executable
+    return {
+        "help": [py, "-m", "aegix.cli", "--help"],
+        "denied_run": [py, "-m", "aegix.cli", "run", "--cmd", DENIED_CMD, "--run-dir", str(workdir / "runs")],
+        "import_router": [py, "-c", "import aegix.router"],
+        "denied_router": [py, "-c", DENIED_ROUTER, str(policy)],
+    }
+
+
+def measure(argv: List[str], repeat: int, expect_ok: bool = True) -> Dict[str, Any]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        samples.append(time.perf_counter() - start)
+        if expect_ok and proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+    samples.sort()
+    return {
+        "median_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p90_ms": round(samples[min(int(0.9 * len(samples)), len(samples) - 1)] * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios whose median latency grew by more than `tolerance`."""
+    regressions = []
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name, {}).get("median_ms")
+        new = result.get("median_ms")
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"{name}.median_ms: {new:,.1f} > {old:,.1f} (+{new / old - 1:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--policy", type=Path, default=DEFAULT_POLICY)
+    parser.add_argument("--output", type=Path, help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="aegix-startup-"))
+    try:
+        results = {
+            # a denied `aegix run` exits 1 by design
+            name: measure(argv, args.repeat, expect_ok=name != "denied_run")
+            for name, argv in scenarios(workdir, args.policy).items()
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
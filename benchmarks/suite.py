@@ -0,0 +1,211 @@
+"""
+Aegix overhead benchmark suite.
+
+Runs against FakeBackend so the numbers measure Aegix itself, not Docker:
+
+  router_handle     ToolRouter.handle end to end (calls/s, p50/p99 latency)
+  router_usage      the same with resource usage sampling on, against a backend
+                    whose usage() costs --usage-latency-ms (docker stats round-trip)
+  policy_evaluate   PolicyEngine.evaluate throughput, cold and cached
+  audit_logger      AuditLogger events/s
+  artifact_writer   ArtifactWriter / StoreArtifactWriter bytes/s
+
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --baseline bench.json --tolerance 0.2
+
+With --baseline, every throughput metric that dropped by more than the
+tolerance is reported and the exit status is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from aegix.io.artifacts import ArtifactWriter
+from aegix.io.store import BlobStore, StoreArtifactWriter
+from aegix.logging.audit import AuditLogger
+from aegix.models import ToolCall, ToolContext
+from aegix.policy import PolicyEngine, load_policy
+from aegix.router import ToolRouter
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.runtime.usage import DEFAULT_INTERVAL_S
+
+DEFAULT_POLICY = Path(__file__).resolve().parent.parent / "aegix_core" / "policy" / "default.yaml"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def timed(fn: Callable[[int], None], iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class UsageFakeBackend(FakeBackend):
+    """FakeBackend that also reports resource usage, each usage() call taking `usage_latency_s`."""
+
+    def __init__(self, usage_latency_s: float, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.usage_latency_s = usage_latency_s
+
+    def usage(self, container_id: str) -> Dict[str, int]:
+        time.sleep(self.usage_latency_s)
+        return {"cpu_ns": 0, "mem_bytes": 0, "pids": 1, "io_read_bytes": 0, "io_write_bytes": 0}
+
+
+def bench_router(
+    workdir: Path,
+    policy: PolicyEngine,
+    iterations: int,
+    output_bytes: int,
+    name: str = "router",
+    backend: Any = None,
+    **router_kwargs: Any,
+) -> Dict[str, Any]:
+    backend = backend or FakeBackend(stdout_bytes=output_bytes)
+    auditor = AuditLogger(workdir / name / "events.jsonl")
+    router = ToolRouter(policy, backend, auditor, ArtifactWriter(workdir / name), **router_kwargs)
+    try:
+        samples = timed(
+            lambda i: router.handle(
+                ToolCall(tool_name="bash", cmd=f"echo {i}"),
+                ToolContext(run_id=f"bench-{i}"),
+                workdir / name / f"bench-{i}",
+            ),
+            iterations,
+        )
+    finally:
+        router.close()
+        auditor.close()
+    return {
+        "calls_per_s": len(samples) / sum(samples),
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "output_bytes": output_bytes,
+    }
+
+
+def bench_policy(policy_path: Path, iterations: int) -> Dict[str, Any]:
+    cfg = load_policy(policy_path)
+    cold = PolicyEngine(cfg, cache_size=0)
+    cached = PolicyEngine(cfg)
+    calls = [ToolCall(tool_name="bash", cmd=c) for c in ("ls -la", "python -c 'print(1)'", "sudo rm -rf /")]
+    ctx = ToolContext(run_id="bench")
+
+    cold_s = sum(timed(lambda i: cold.evaluate(calls[i % len(calls)], ctx), iterations))
+    cached_s = sum(timed(lambda i: cached.evaluate(calls[i % len(calls)], ctx), iterations))
+    return {
+        "evals_per_s": iterations / cold_s,
+        "cached_evals_per_s": iterations / cached_s,
+        "deny_patterns": len(cfg.deny_cmd_patterns),
+    }
+
+
+def bench_audit(workdir: Path, iterations: int) -> Dict[str, Any]:
+    auditor = AuditLogger(workdir / "audit" / "events.jsonl")
+    data = {"run_id": "bench", "container_id": "fake-1", "exit_code": 0}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        auditor.log("EXEC_END", data)
+    auditor.close()
+    return {"events_per_s": iterations / (time.perf_counter() - start)}
+
+
+def bench_artifacts(workdir: Path, iterations: int, size: int) -> Dict[str, Any]:
+    payload = ("x" * 79 + "\n") * (size // 80)
+    chunk = payload.encode("utf-8")
+    results: Dict[str, Any] = {"artifact_bytes": len(chunk)}
+
+    writers = {
+        "plain": ArtifactWriter(workdir / "artifacts-plain"),
+        "store": StoreArtifactWriter(workdir / "artifacts-store", BlobStore(workdir / "blobs")),
+    }
+    for name, base in writers.items():
+        def write(i: int) -> None:
+            writer = base.for_run(base.run_dir / f"run-{i}")
+            writer.write_text("stdout.txt", payload)
+            with writer.open_binary("stderr.txt") as f:
+                f.write(chunk)
+
+        elapsed = sum(timed(write, iterations))
+        results[f"{name}_bytes_per_s"] = 2 * len(chunk) * iterations / elapsed
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Throughput metrics (*_per_s) that regressed by more than `tolerance`."""
+    regressions = []
+    for section, metrics in current["results"].items():
+        for name, value in metrics.items():
+            if not name.endswith("_per_s"):
+                continue
+            old = baseline.get("results", {}).get(section, {}).get(name)
+            if old and value < old * (1 - tolerance):
+                regressions.append(f"{section}.{name}: {value:,.0f} < {old:,.0f} (-{1 - value / old:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--policy", type=Path, default=DEFAULT_POLICY)
+    parser.add_argument("--output-bytes", type=int, default=4096, help="stdout size per fake exec")
+    parser.add_argument("--usage-latency-ms", type=float, default=2.0, help="cost of one usage() call in router_usage")
+    parser.add_argument("--output", type=Path, help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="aegix-bench-"))
+    try:
+        policy = PolicyEngine(load_policy(args.policy))
+        results = {
+            "router_handle": bench_router(workdir, policy, args.iterations, args.output_bytes),
+            "router_usage": bench_router(
+                workdir, policy, args.iterations // 10 or 1, args.output_bytes, name="router-usage",
+                backend=UsageFakeBackend(args.usage_latency_ms / 1000, stdout_bytes=args.output_bytes),
+                usage_interval_s=DEFAULT_INTERVAL_S,
+            ),
+            "policy_evaluate": bench_policy(args.policy, args.iterations * 10),
+            "audit_logger": bench_audit(workdir, args.iterations * 10),
+            "artifact_writer": bench_artifacts(workdir, args.iterations // 4 or 1, 256 * 1024),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+The modules import each other as `aegix.*` while the sources live in aegix_core/;
+alias the package so the tests run from a plain checkout.
+"""
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+if "aegix" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "aegix", ROOT / "aegix_core" / "__init__.py", submodule_search_locations=[str(ROOT / "aegix_core")],
+    )
+    sys.modules["aegix"] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules["aegix"])
+
+POLICY = """
+version: 1
+network:
+  mode: "{network}"
+limits:
+  default:
+    timeout_s: {timeout_s}
+commands:
+  deny_cmd_patterns:
+    - "(?i)\\\\bsudo\\\\b"
+"""
+
+
+@pytest.fixture
+def make_router(tmp_path):
+    """ToolRouter over the given backend, with a small policy; yields the factory, closes what it built."""
+    from aegix.io.artifacts import ArtifactWriter
+    from aegix.logging.audit import AuditLogger
+    from aegix.policy import PolicyEngine, parse_policy
+    from aegix.router import ToolRouter
+
+    built = []
+
+    def factory(backend, network="none", timeout_s=10, extra_policy="", **kwargs):
+        auditor = AuditLogger(tmp_path / "events.jsonl")
+        router = ToolRouter(
+            PolicyEngine(parse_policy(POLICY.format(network=network, timeout_s=timeout_s) + extra_policy)),
+            backend,
+            auditor,
+            ArtifactWriter(tmp_path / "runs"),
+            **kwargs,
+        )
+        built.append(router)
+        return router
+
+    yield factory
+    for router in built:
+        router.close()
+        router.auditor.close()
+
+
+@pytest.fixture
+def audit_events():
+    """read(router) -> every event the router's auditor has written so far."""
+    from aegix.logging.audit import segment_paths
+
+    def read(router):
+        router.auditor.flush()
+        events = []
+        for path in segment_paths(router.auditor.events_path):
+            events += [json.loads(line) for line in path.read_text().splitlines() if line]
+        return events
+
+    return read
@@ -0,0 +1,102 @@
+import json
+import threading
+
+import pytest
+
+from aegix import admission as admission_module
+from aegix.admission import ActorQuota, AdmissionConfig, AdmissionController, AdmissionError
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.fake_backend import FakeBackend
+
+
+def test_rate_limit_rejects_past_the_burst():
+    controller = AdmissionController(AdmissionConfig(default=ActorQuota(rate_per_s=0.001, burst=2)))
+    controller.release(controller.admit("a"))
+    controller.release(controller.admit("a"))
+    with pytest.raises(AdmissionError) as exc:
+        controller.admit("a")
+    assert exc.value.error_type == "RATE_LIMITED"
+    controller.release(controller.admit("b"))  # buckets are per actor
+
+
+def test_shed_calls_get_their_token_back():
+    controller = AdmissionController(AdmissionConfig(
+        max_running=1, max_queued=0, default=ActorQuota(rate_per_s=0.001, burst=2),
+    ))
+    running = controller.admit("a")
+    for _ in range(5):
+        with pytest.raises(AdmissionError) as exc:
+            controller.admit("a")
+        assert exc.value.error_type == "OVERLOADED"
+    controller.release(running)
+    # one token was spent on the call that ran; shedding cost nothing
+    controller.release(controller.admit("a"))
+    with pytest.raises(AdmissionError) as exc:
+        controller.admit("a")
+    assert exc.value.error_type == "RATE_LIMITED"
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(AdmissionConfig(max_running=1))
+    running = controller.admit("a")
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(AdmissionError) as exc:
+        controller.admit("b", cancel=cancel)
+    assert exc.value.error_type == "CANCELLED"
+    assert controller.stats()["queued"] == 0
+    controller.release(running)
+
+
+def test_priority_goes_first():
+    controller = AdmissionController(AdmissionConfig(max_running=1))
+    running = controller.admit("a")
+    order = []
+
+    def wait(actor, priority):
+        ticket = controller.admit(actor, priority=priority)
+        order.append(actor)
+        controller.release(ticket)
+
+    low = threading.Thread(target=wait, args=("low", 0))
+    low.start()
+    while controller.stats()["queued"] < 1:
+        pass
+    high = threading.Thread(target=wait, args=("high", 5))
+    high.start()
+    while controller.stats()["queued"] < 2:
+        pass
+    controller.release(running)
+    low.join()
+    high.join()
+    assert order == ["high", "low"]
+
+
+def test_idle_actors_are_forgotten(monkeypatch):
+    monkeypatch.setattr(admission_module, "PRUNE_INTERVAL_S", 0.0)
+    controller = AdmissionController(AdmissionConfig(
+        default=ActorQuota(rate_per_s=1e9),  # buckets are full again at once
+        per_actor={"slow": ActorQuota(rate_per_s=0.001)},
+    ))
+    controller.release(controller.admit("slow"))
+    busy = controller.admit("busy")
+    for i in range(100):
+        controller.release(controller.admit(f"client-{i}"))
+    # each admit prunes the actors left idle with a full bucket, except the one just used
+    actors = controller.stats()["actors"]
+    assert set(actors) == {"busy", "slow", "client-99"}  # running / bucket not refilled / just used
+    controller.release(busy)
+
+
+def test_invalid_priority_is_a_structured_error(make_router, audit_events, tmp_path):
+    router = make_router(FakeBackend(), admission=AdmissionController())
+    result = router.handle(
+        ToolCall(tool_name="bash", cmd="true"),
+        ToolContext(run_id="r1", metadate={"priority": "high"}),
+        tmp_path / "r1",
+    )
+    assert not result.ok and result.error.type == "INVALID_TOOL_CALL"
+    report = json.loads((tmp_path / "r1" / "report.json").read_text())
+    assert report["error"]["type"] == "INVALID_TOOL_CALL"
+    ends = [e for e in audit_events(router) if e["type"] == "RUN_END"]
+    assert len(ends) == 1 and ends[0]["data"]["error_type"] == "INVALID_TOOL_CALL"
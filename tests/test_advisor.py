@@ -0,0 +1,86 @@
+import json
+
+import pytest
+import yaml
+
+from aegix.advisor import LimitsAdvisor, command_class, tighten_policy_data
+from aegix.models import ToolCall, ToolContext
+from aegix.policy import parse_policy
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.stats import iter_run_dirs, read_report
+from conftest import POLICY
+
+CFG = parse_policy(POLICY.format(network="none", timeout_s=10))  # default Limits otherwise: 512 MB, 1 cpu, 256 pids
+
+
+def report(tool, cmd, mem_mb, cpu_s=0.1, pids=3, exec_ms=1000.0, available=True):
+    return {
+        "tool": {"tool_name": tool, "cmd": cmd},
+        "timings_ms": {"exec": exec_ms, "total": exec_ms + 5},
+        "usage": {"available": available, "peak_mem_mb": mem_mb, "cpu_s": cpu_s, "peak_pids": pids},
+    }
+
+
+def test_command_class():
+    assert command_class("FOO=1 /usr/bin/python3 -m x | head") == "python3"
+    assert command_class("ls -la") == "ls"
+    assert command_class("echo 'unbalanced") == "echo"
+    assert command_class("") == ""
+
+
+def test_suggestions_follow_the_most_demanding_class():
+    advisor = LimitsAdvisor(headroom=1.5, min_runs=20)
+    reports = [report("bash", "ls -la", mem_mb=20) for _ in range(30)]
+    reports += [report("bash", "python3 build.py", mem_mb=100, pids=10) for _ in range(10)]
+    reports += [report("bash", "ls", mem_mb=20, available=False), {"tool": {"tool_name": "bash"}}]  # unsampled
+    assert advisor.observe_reports(reports) == 40
+
+    bash = advisor.suggest(CFG)["bash"]
+    assert bash["runs"] == 40 and list(bash["classes"]) == ["ls", "python3"]
+    assert bash["current"] == {"mem_mb": 512, "cpu": 1.0, "pids": 256, "timeout_s": 10}
+    proposed = bash["proposed"]
+    assert 150 <= proposed["mem_mb"] <= 100 * 1.5 * 1.2  # python3's p99 x headroom, within a bucket
+    assert 15 <= proposed["pids"] <= 16 * 1.2 + 1 or proposed["pids"] == 16
+    assert proposed["cpu"] == 0.25 and proposed["timeout_s"] == 5  # floors (MIN_LIMITS)
+    assert bash["tighten"] == proposed
+
+
+def test_limits_are_only_ever_lowered_and_need_enough_runs():
+    advisor = LimitsAdvisor(min_runs=20)
+    advisor.observe_reports([report("bash", "make", mem_mb=2048, exec_ms=100) for _ in range(25)])
+    advisor.observe_reports([report("python", "python3 x.py", mem_mb=10) for _ in range(5)])
+    suggestions = advisor.suggest(CFG)
+
+    assert suggestions["bash"]["proposed"]["mem_mb"] > 512
+    assert "mem_mb" not in suggestions["bash"]["tighten"]
+    assert "proposed" not in suggestions["python"] and "min_runs=20" in suggestions["python"]["skipped"]
+
+    tightened = advisor.tighten(CFG)
+    assert "mem_mb" not in tightened.per_tool_limits["bash"] and "python" not in tightened.per_tool_limits
+
+
+def test_tightened_policy_document_still_loads():
+    advisor = LimitsAdvisor(min_runs=1)
+    advisor.observe_reports([report("bash", "ls", mem_mb=20)])
+    suggestions = advisor.suggest(CFG)
+    data = tighten_policy_data(yaml.safe_load(POLICY.format(network="none", timeout_s=10)), suggestions)
+    cfg = parse_policy(yaml.safe_dump(data))
+    assert cfg.per_tool_limits["bash"] == suggestions["bash"]["tighten"]
+
+
+class SampledBackend(FakeBackend):
+    def usage(self, container_id):
+        return {"cpu_ns": 0, "mem_bytes": 40 * 1024 * 1024, "pids": 2, "io_read_bytes": 0, "io_write_bytes": 0}
+
+
+def test_advice_from_sampled_router_runs(make_router, tmp_path):
+    router = make_router(SampledBackend(exec_latency_s=0.02), usage_interval_s=0.01)
+    for i in range(5):
+        assert router.handle(ToolCall(tool_name="bash", cmd="ls"), ToolContext(run_id=f"r{i}")).ok
+
+    advisor = LimitsAdvisor(min_runs=5)
+    reports = [read_report(d) for d in iter_run_dirs(tmp_path / "runs")]
+    assert advisor.observe_reports(reports) == 5
+    bash = advisor.suggest(CFG)["bash"]
+    assert bash["classes"]["ls"]["mem_mb"] == pytest.approx(40, rel=0.2)
+    assert bash["tighten"]["mem_mb"] < 512
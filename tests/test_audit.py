@@ -0,0 +1,116 @@
+import json
+import logging
+
+import pytest
+
+from aegix.logging.audit import AuditLogger, index_path, segment_paths
+from aegix.logging.index import AuditIndex
+
+
+def write(logger, run_ids, events_per_run=3):
+    for i in range(events_per_run):
+        for run_id in run_ids:
+            logger.log("EXEC_END", {"run_id": run_id, "i": i})
+            logger.flush()  # one group commit per event, so rotation can fall between any two
+
+
+def test_segments_rotate_at_the_size_limit(tmp_path):
+    events = tmp_path / "events.jsonl"
+    logger = AuditLogger(events, segment_bytes=400)
+    write(logger, ["a", "b"])
+    logger.close()
+
+    segments = segment_paths(events)
+    assert len(segments) > 1 and not events.exists()
+    lines = [json.loads(line) for path in segments for line in path.read_text().splitlines()]
+    assert [(e["data"]["run_id"], e["data"]["i"]) for e in lines] == [(r, i) for i in range(3) for r in "ab"]
+    # a segment only grows past the limit by the batch that crossed it
+    assert all(path.stat().st_size < 400 + 200 for path in segments)
+
+
+def test_index_lookups_span_segments(tmp_path):
+    events = tmp_path / "events.jsonl"
+    logger = AuditLogger(events, segment_bytes=400, index=True)
+    write(logger, ["a", "b"], events_per_run=5)
+    logger.log("RUN_END", {"run_id": "a"})
+    logger.close()
+    assert len(segment_paths(events)) > 2
+
+    index = AuditIndex(index_path(events))
+    try:
+        found = list(index.query(run_id="a"))
+        assert [e["data"].get("i") for e in found] == [0, 1, 2, 3, 4, None]
+        assert len({e["ts_ns"] for e in found}) == 6
+        assert index.count(run_id="b") == 5
+        assert [e["data"]["run_id"] for e in index.query(types=["RUN_END"])] == ["a"]
+
+        # a time range that starts in one segment and ends in a later one
+        middle = found[1]["ts_ns"], found[4]["ts_ns"]
+        in_range = list(index.query(since_ns=middle[0], until_ns=middle[1]))
+        assert [(e["data"]["run_id"], e["data"]["i"]) for e in in_range] == [
+            ("a", 1), ("b", 1), ("a", 2), ("b", 2), ("a", 3), ("b", 3),
+        ]
+    finally:
+        index.close()
+
+
+def test_retention_drops_old_segments_from_the_index(tmp_path):
+    events = tmp_path / "events.jsonl"
+    logger = AuditLogger(events, segment_bytes=400, retain_segments=2, index=True)
+    write(logger, ["a"], events_per_run=20)
+    logger.close()
+
+    assert len(segment_paths(events)) == 2
+    index = AuditIndex(index_path(events))
+    try:
+        kept = [e["data"]["i"] for e in index.query(run_id="a")]
+        assert kept == list(range(20 - len(kept), 20))
+        assert index.count(run_id="a") == len(kept) < 20
+    finally:
+        index.close()
+
+
+def test_reopened_logger_continues_the_newest_segment(tmp_path):
+    events = tmp_path / "events.jsonl"
+    logger = AuditLogger(events, segment_bytes=10_000, index=True)
+    write(logger, ["a"], events_per_run=2)
+    logger.close()
+    logger = AuditLogger(events, segment_bytes=10_000, index=True)
+    write(logger, ["a"], events_per_run=1)
+    logger.close()
+
+    assert len(segment_paths(events)) == 1
+    index = AuditIndex(index_path(events))
+    try:
+        assert index.count(run_id="a") == 3
+    finally:
+        index.close()
+
+
+def test_write_failures_are_logged_not_raised(tmp_path, monkeypatch, caplog):
+    logger = AuditLogger(tmp_path / "events.jsonl")
+
+    def fail(batch):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logger, "_commit", fail)
+    with caplog.at_level(logging.ERROR, logger="aegix.logging.audit"):
+        logger.log("RUN_END", {"run_id": "a"})  # returns instead of waiting forever
+    monkeypatch.undo()
+    logger.close()
+    assert "audit write failed: disk full" in caplog.text
+
+
+def test_audit_query_command_reads_across_segments(tmp_path):
+    testing = pytest.importorskip("typer.testing")
+    from aegix.cli import app
+
+    events = tmp_path / "events.jsonl"
+    logger = AuditLogger(events, segment_bytes=400, index=True)
+    write(logger, ["a", "b"], events_per_run=5)
+    logger.close()
+
+    runner = testing.CliRunner()
+    result = runner.invoke(app, ["audit", "query", "--log", str(events), "--run-id", "b"])
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line)["data"]["i"] for line in result.output.splitlines()] == list(range(5))
@@ -0,0 +1,73 @@
+import json
+import time
+
+from aegix.cache import ResultCache
+from aegix.models import ToolCall, ToolContext
+from aegix.policy import parse_policy
+from aegix.runtime.fake_backend import FakeBackend
+from conftest import POLICY
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self, **kwargs):
+        super().__init__(stdout_bytes=8, **kwargs)
+        self.created = 0
+
+    def create(self, image, adjusted=None):
+        self.created += 1
+        return super().create(image, adjusted)
+
+
+def cached_router(make_router, tmp_path, backend=None, **cache):
+    router = make_router(backend or CountingBackend(), result_cache=ResultCache(tmp_path / "cache", **cache))
+    return router, router.backend
+
+
+def run(router, tmp_path, run_id, cmd="echo hi", image=None, **metadate):
+    result = router.handle(
+        ToolCall(tool_name="bash", cmd=cmd, image=image), ToolContext(run_id=run_id, metadate=metadate), tmp_path / run_id,
+    )
+    report = json.loads((tmp_path / run_id / "report.json").read_text())
+    return result, report.get("cache")
+
+
+def test_identical_calls_are_served_from_the_cache(make_router, tmp_path):
+    router, backend = cached_router(make_router, tmp_path)
+    first, cache = run(router, tmp_path, "r1")
+    assert first.ok and cache["hit"] is False
+    second, cache = run(router, tmp_path, "r2")
+    assert second.ok and cache["hit"] is True
+    assert backend.created == 1
+    assert second.exec_result.exit_code == first.exec_result.exit_code
+    assert (tmp_path / "r2" / "stdout.txt").read_bytes() == (tmp_path / "r1" / "stdout.txt").read_bytes()
+
+
+def test_key_covers_cmd_image_and_policy(make_router, tmp_path):
+    router, backend = cached_router(make_router, tmp_path)
+    run(router, tmp_path, "r1")
+    assert run(router, tmp_path, "r2", cmd="echo other")[1]["hit"] is False
+    assert run(router, tmp_path, "r3", image="alpine:3")[1]["hit"] is False
+
+    router.policy.swap(parse_policy(POLICY.format(network="none", timeout_s=20)))
+    assert run(router, tmp_path, "r4")[1]["hit"] is False
+    assert backend.created == 4
+
+
+def test_entries_expire(make_router, tmp_path):
+    router, backend = cached_router(make_router, tmp_path, ttl_s=0.05)
+    run(router, tmp_path, "r1")
+    time.sleep(0.1)
+    assert run(router, tmp_path, "r2")[1]["hit"] is False
+    assert backend.created == 2
+
+
+def test_only_successful_cacheable_calls_are_stored(make_router, tmp_path):
+    router, backend = cached_router(make_router, tmp_path, backend=CountingBackend(exit_code=1))
+    assert not run(router, tmp_path, "r1")[0].ok
+    assert not run(router, tmp_path, "r2")[0].ok
+    assert backend.created == 2 and router.result_cache.stats()["entries"] == 0
+
+    router, backend = cached_router(make_router, tmp_path / "opt-out")
+    assert run(router, tmp_path, "r3", cache=False)[1] is None
+    assert run(router, tmp_path, "r4", cache=False)[1] is None
+    assert backend.created == 2 and router.result_cache.stats()["entries"] == 0
@@ -0,0 +1,63 @@
+import io
+import sys
+
+import pytest
+
+from aegix.runtime.capture import OutputCapture, TailBuffer
+from aegix.runtime.process_backend import LocalProcessBackend
+
+
+def test_output_past_the_cap_is_counted_and_dropped():
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+    capture = OutputCapture(stdout, stderr, max_output_bytes=10, tail_bytes=4)
+    capture.write_stdout(b"abcdef")
+    capture.write_stderr(b"123")
+    assert not capture.truncated
+    capture.write_stdout(b"ghij")    # crosses the cap: 1 byte still fits
+    capture.write_stderr(b"45678")   # entirely past it
+    capture.write_stdout(None)       # EOF markers are ignored
+
+    res = capture.result(0)
+    assert stdout.getvalue() == b"abcdefg" and stderr.getvalue() == b"123"
+    assert (res.written_bytes, res.stdout_bytes, res.stderr_bytes) == (10, 10, 8)
+    assert res.truncated and res.streamed
+    # tails keep the end of each stream, including what the cap dropped
+    assert (res.stdout, res.stderr) == ("ghij", "5678")
+
+
+def test_no_cap_writes_everything():
+    stdout = io.BytesIO()
+    capture = OutputCapture(stdout, io.BytesIO())
+    for _ in range(100):
+        capture.write_stdout(b"x" * 1000)
+    res = capture.result(3)
+    assert len(stdout.getvalue()) == res.written_bytes == res.stdout_len == 100_000
+    assert not res.truncated and res.exit_code == 3
+
+
+def test_tail_buffer_keeps_the_last_bytes():
+    tail = TailBuffer(5)
+    tail.write(b"abc")
+    tail.write(b"defg")
+    assert tail.text() == "cdefg"
+    tail.write(b"0123456789")
+    assert tail.text() == "56789"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="process sandboxes are Linux-only")
+def test_capped_command_is_drained_to_completion(tmp_path):
+    backend = LocalProcessBackend(root=tmp_path, use_cgroups=False)
+    container_id = backend.create("local")
+    try:
+        stdout, stderr = io.BytesIO(), io.BytesIO()
+        # far more than a pipe buffer: a reader that stopped at the cap would hang the writer
+        res = backend.exec_stream(
+            container_id, "head -c 2000000 /dev/zero; echo done >&2", stdout, stderr,
+            max_output_bytes=1000, timeout_s=10,
+        )
+        assert res.exit_code == 0 and res.truncated
+        assert res.stdout_bytes == 2_000_000 and res.written_bytes == 1000
+        assert len(stdout.getvalue()) == 1000 and stderr.getvalue() == b""
+        assert res.stderr == "done\n"
+    finally:
+        backend.destroy(container_id)
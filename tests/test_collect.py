@@ -0,0 +1,27 @@
+import json
+import sys
+
+import pytest
+
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.process_backend import LocalProcessBackend
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="process sandboxes are Linux-only")
+
+ARTIFACTS = """
+artifacts:
+  globs:
+    - "/tmp/x/*.log"
+    - "/workspace/*.txt"
+"""
+
+
+def test_a_refused_glob_doesnt_fail_the_call(make_router, tmp_path):
+    router = make_router(LocalProcessBackend(root=tmp_path / "sandboxes", use_cgroups=False), extra_policy=ARTIFACTS)
+    result = router.handle(ToolCall(tool_name="bash", cmd="echo ok > out.txt"), ToolContext(run_id="r1"))
+    assert result.ok, result.error
+    collected = json.loads((tmp_path / "runs" / "r1" / "report.json").read_text())["collected_artifacts"]
+    assert [f["path"] for f in collected["files"]] == ["/workspace/out.txt"]
+    assert len(collected["errors"]) == 1
+    assert collected["errors"][0].startswith("/tmp/x/*.log: ValueError: /tmp/x is outside /workspace")
+    assert (tmp_path / "runs" / "r1" / "artifacts" / "workspace" / "out.txt").read_text() == "ok\n"
@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.capture import OutputCapture
+from aegix.runtime.deadline import Watchdog
+from aegix.runtime.docker_backend import KILLED_EXIT_CODE, interrupted
+from aegix.runtime.fake_backend import FakeBackend
+
+
+class BlockingBackend(FakeBackend):
+    """Streams some output, then blocks until the router's deadline or cancel kills it."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+
+    def exec_stream(self, container_id, cmd, stdout, stderr, max_output_bytes=None, timeout_s=None, cancel=None):
+        capture = OutputCapture(stdout, stderr, max_output_bytes=max_output_bytes)
+        capture.write_stdout(b"partial output\n")
+        killed = threading.Event()
+        with Watchdog(timeout_s, cancel, on_fire=killed.set) as watchdog:
+            self.started.set()
+            killed.wait(30)
+        raise interrupted(watchdog.reason, timeout_s, capture.result(KILLED_EXIT_CODE))
+
+
+def run(router, tmp_path, cancel=None):
+    result = router.handle(ToolCall(tool_name="bash", cmd="sleep 30"), ToolContext(run_id="r1"), tmp_path / "r1", cancel=cancel)
+    return result, json.loads((tmp_path / "r1" / "report.json").read_text())
+
+
+def test_timeout_keeps_partial_output(make_router, audit_events, tmp_path):
+    backend = BlockingBackend()
+    router = make_router(backend, timeout_s=1)
+    start = time.monotonic()
+    result, report = run(router, tmp_path)
+    assert 1 <= time.monotonic() - start < 5
+
+    assert not result.ok and result.error.type == "TIMEOUT"
+    assert report["error"]["type"] == "TIMEOUT"
+    assert report["exec"]["stdout_len"] == len("partial output\n")
+    assert (tmp_path / "r1" / "stdout.txt").read_bytes() == b"partial output\n"
+    types = [e["type"] for e in audit_events(router)]
+    assert "EXEC_TIMEOUT" in types and "EXEC_CANCELLED" not in types
+    assert backend.live == set()
+
+
+def test_cancel_is_not_reported_as_a_timeout(make_router, audit_events, tmp_path):
+    backend = BlockingBackend()
+    router = make_router(backend)
+    cancel = threading.Event()
+    threading.Thread(target=lambda: backend.started.wait(5) and cancel.set(), daemon=True).start()
+    start = time.monotonic()
+    result, report = run(router, tmp_path, cancel=cancel)
+    assert time.monotonic() - start < 5  # well before the 10 s deadline
+
+    assert not result.ok and result.error.type == "CANCELLED"
+    assert report["error"]["type"] == "CANCELLED"
+    assert (tmp_path / "r1" / "stdout.txt").read_bytes() == b"partial output\n"
+    types = [e["type"] for e in audit_events(router)]
+    assert "EXEC_CANCELLED" in types and "EXEC_TIMEOUT" not in types
+
+
+def test_watchdog_reasons():
+    fired = []
+    with Watchdog(0.05, None, on_fire=lambda: fired.append("t")) as timeout:
+        time.sleep(0.2)
+    assert timeout.reason == "timeout" and fired == ["t"]
+
+    cancel = threading.Event()
+    cancel.set()
+    with Watchdog(10, cancel, on_fire=lambda: fired.append("c")) as cancelled:
+        pass
+    assert cancelled.reason == "cancelled" and fired == ["t", "c"]
+
+    with Watchdog(0.05, threading.Event(), on_fire=lambda: fired.append("late")) as finished:
+        pass
+    time.sleep(0.1)
+    assert finished.reason is None and fired == ["t", "c"]  # stopped before the deadline
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from aegix.gateway import GatewayClient, GatewayError, _pool_warmer, create_gateway
+from aegix.runtime.images import ResolvedImage
+
+
+@pytest.fixture
+def served(tmp_path):
+    """(gateway, client) factory over a fake-backend gateway on a Unix socket."""
+    opened = []
+
+    def factory(**kwargs):
+        gateway = create_gateway(tmp_path / "runs", backend="fake", **kwargs)
+        server = gateway.serve(f"unix://{tmp_path}/gw.sock")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        opened.append((gateway, server))
+        return gateway, GatewayClient(f"unix://{tmp_path}/gw.sock")
+
+    yield factory
+    for gateway, server in opened:
+        server.shutdown()
+        server.server_close()
+        gateway.close()
+
+
+def test_workspaces_are_refused_without_a_root(served):
+    _, client = served()
+    with pytest.raises(GatewayError) as exc:
+        client.call("bash", "ls", workspace="/etc")
+    assert exc.value.status == 403
+
+
+def test_workspaces_must_stay_under_the_root(served, tmp_path):
+    root = tmp_path / "workspaces"
+    (root / "proj").mkdir(parents=True)
+    (tmp_path / "secret").mkdir()
+    (root / "escape").symlink_to(tmp_path / "secret")
+    gateway, client = served(workspace_root=root)
+
+    for outside in ("/etc", "../secret", "proj/../../secret", "escape"):
+        with pytest.raises(GatewayError) as exc:
+            client.call("bash", "ls", workspace=outside)
+        assert exc.value.status == 403, outside
+
+    assert gateway._workspace("proj") == str(root / "proj")
+    assert client.call("bash", "ls", workspace="proj")["ok"]
+
+
+class RecordingPool:
+    def __init__(self):
+        self.warm_keys = set()
+
+    def warm(self, image, adjusted=None):
+        self.warm_keys.add((image, adjusted.limits.mem_mb))
+
+    def unwarm(self, image, adjusted=None):
+        self.warm_keys.discard((image, adjusted.limits.mem_mb))
+
+
+def test_pool_is_warmed_with_the_resolved_id_and_policy_limits(tmp_path):
+    gateway = create_gateway(tmp_path / "runs", backend="fake")
+    try:
+        engine = gateway.router.policy
+        pool = RecordingPool()
+        on_resolved = _pool_warmer(pool, engine, ["python:3.11-slim"])
+
+        on_resolved(ResolvedImage(ref="python:3.11-slim", id="sha256:one", repo_digest=None))
+        # default.yaml: bash / the default at 512 MB, python at 768 MB
+        assert pool.warm_keys == {("sha256:one", 512), ("sha256:one", 768)}
+
+        on_resolved(ResolvedImage(ref="python:3.11-slim", id="sha256:two", repo_digest=None))
+        assert pool.warm_keys == {("sha256:two", 512), ("sha256:two", 768)}
+
+        on_resolved(ResolvedImage(ref="other:latest", id="sha256:three", repo_digest=None))
+        assert all(image == "sha256:two" for image, _ in pool.warm_keys)
+    finally:
+        gateway.close()
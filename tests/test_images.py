@@ -0,0 +1,69 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+docker = pytest.importorskip("docker")
+
+from aegix.runtime.images import ImageManager, ImageNotReady  # noqa: E402
+
+
+class FakeImages:
+    def __init__(self, local=(), pullable=()):
+        self.local = {ref: f"sha256:{ref}" for ref in local}
+        self.pullable = set(pullable)
+        self.pulls = []
+
+    def get(self, ref):
+        if ref not in self.local:
+            raise docker.errors.ImageNotFound(ref)
+        return SimpleNamespace(id=self.local[ref], attrs={"RepoDigests": []})
+
+    def pull(self, ref):
+        self.pulls.append(ref)
+        if ref not in self.pullable:
+            raise RuntimeError("registry unreachable")
+        self.local[ref] = f"sha256:{ref}"
+
+
+def manager(images, **kwargs):
+    return ImageManager(client=SimpleNamespace(images=images), **kwargs)
+
+
+def test_local_image_is_never_pulled():
+    images = FakeImages(local=["airgapped:1"])
+    m = manager(images, prefetch=["airgapped:1"])
+    try:
+        asyncio.run(m.wait_ready("airgapped:1", timeout_s=1))
+        assert m.resolve("airgapped:1").id == "sha256:airgapped:1"
+        time.sleep(0.05)
+        assert images.pulls == []
+    finally:
+        m.close()
+
+
+def test_missing_image_is_pulled_in_the_background():
+    images = FakeImages(pullable=["remote:1"])
+    m = manager(images)
+    try:
+        with pytest.raises(ImageNotReady) as exc:
+            m.resolve("remote:1")
+        assert exc.value.error_type == "IMAGE_PULLING"
+        asyncio.run(m.wait_ready("remote:1", timeout_s=2))
+        assert m.resolve("remote:1").id == "sha256:remote:1"
+        assert images.pulls == ["remote:1"]
+    finally:
+        m.close()
+
+
+def test_failed_pull_is_reported_unavailable():
+    images = FakeImages()
+    m = manager(images)
+    try:
+        asyncio.run(m.wait_ready("nowhere:1", timeout_s=2))
+        with pytest.raises(ImageNotReady) as exc:
+            m.resolve("nowhere:1")
+        assert exc.value.error_type == "IMAGE_UNAVAILABLE"
+    finally:
+        m.close()
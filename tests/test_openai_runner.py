@@ -0,0 +1,61 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from aegix_agent import openai_runner  # noqa: E402
+
+
+def tool_call(command):
+    return SimpleNamespace(function=SimpleNamespace(arguments=json.dumps({"command": command})))
+
+
+class SlowRuntime:
+    """Calls block until cancelled; the gateway only learns of a call after `unknown_for` cancel attempts."""
+
+    def __init__(self, unknown_for=0, cancel_error=None):
+        self.unknown_for = unknown_for
+        self.cancel_error = cancel_error
+        self.stopped = {}
+        self.attempts = 0
+
+    def execute(self, command, run_id=None):
+        if command == "fast":
+            return {"stdout": "ok", "stderr": "", "exit_code": 0}
+        stop = self.stopped.setdefault(run_id, threading.Event())
+        stop.wait(10)
+        return {"error": {"type": "CANCELLED", "message": "killed"}}
+
+    def cancel(self, run_id):
+        self.attempts += 1
+        if self.cancel_error is not None:
+            raise self.cancel_error
+        if self.attempts <= self.unknown_for:
+            return False
+        self.stopped.setdefault(run_id, threading.Event()).set()
+        return True
+
+
+def test_cancel_is_retried_until_the_gateway_knows_the_call(monkeypatch):
+    runtime = SlowRuntime(unknown_for=3)
+    monkeypatch.setattr(openai_runner, "aegix", runtime)
+    results = openai_runner.run_tool_calls([tool_call("fast"), tool_call("slow")], deadline_s=0.1)
+    assert results[0]["stdout"] == "ok"
+    assert results[1]["error"]["type"] == "CANCELLED"
+    assert runtime.attempts == 4
+
+
+def test_a_failing_cancel_doesnt_hold_or_abort_the_turn(monkeypatch):
+    runtime = SlowRuntime(cancel_error=ConnectionError("gateway gone"))
+    monkeypatch.setattr(openai_runner, "aegix", runtime)
+    monkeypatch.setattr(openai_runner, "CANCEL_GRACE_S", 0.2)
+    start = time.monotonic()
+    results = openai_runner.run_tool_calls([tool_call("slow")], deadline_s=0.1)
+    assert time.monotonic() - start < 2
+    assert results[0]["error"]["type"] == "TIMEOUT"
+    for stop in runtime.stopped.values():
+        stop.set()
@@ -0,0 +1,153 @@
+import time
+
+import pytest
+
+from aegix.models import AdjustedPolicy, FSRule, Limits
+from aegix.runtime.docker_backend import ExecResult, interrupted
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.runtime.pool import KILL_CMD, PoolConfig, PooledDockerBackend
+
+
+class RecordingBackend(FakeBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cmds = []
+        self.diff = {}          # container_id -> changed paths
+        self.reset_exit = 0
+        self.reset_hangs = False
+        self.reset_timeouts = []
+        self.created = []
+
+    def create(self, image, adjusted=None):
+        container_id = super().create(image, adjusted)
+        self.created.append((image, container_id))
+        return container_id
+
+    def exec(self, container_id, cmd, timeout_s=None, cancel=None):
+        self.cmds.append((container_id, cmd))
+        if cmd.startswith(KILL_CMD):
+            self.reset_timeouts.append(timeout_s)
+            if self.reset_hangs:
+                time.sleep(timeout_s)
+                raise interrupted("timeout", timeout_s)
+            return ExecResult(stdout="", stderr="", exit_code=self.reset_exit)
+        return super().exec(container_id, cmd, timeout_s, cancel)
+
+    def changed_paths(self, container_id):
+        return self.diff.get(container_id, ["/workspace", "/tmp"])
+
+
+def wait_for(predicate, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+
+def make_pool(backend, **config):
+    config.setdefault("maintain_interval_s", 0.01)
+    config.setdefault("min_size", 1)
+    return PooledDockerBackend(backend, PoolConfig(**config))
+
+
+def adjusted(mem_mb=512):
+    return AdjustedPolicy(limits=Limits(mem_mb=mem_mb), network_mode="none", env_allowlist=None, fs_rules=FSRule())
+
+
+def test_reset_kills_processes_and_reuses_clean_container(backend):
+    pool = make_pool(backend, min_size=0)
+    try:
+        first = pool.create("img")
+        pool.destroy(first)
+        assert wait_for(lambda: pool.stats()["img {}"]["idle"] == 1)
+        reset_cmds = [cmd for cid, cmd in backend.cmds if cid == first]
+        assert reset_cmds and reset_cmds[0].startswith(KILL_CMD)
+        assert pool.create("img") == first
+    finally:
+        pool.close()
+
+
+def test_changes_outside_scratch_paths_recycle_the_container(backend):
+    pool = make_pool(backend, min_size=0)
+    try:
+        first = pool.create("img")
+        backend.diff[first] = ["/workspace/out.txt", "/root/.bashrc"]
+        pool.destroy(first)
+        assert wait_for(lambda: first not in backend.live)
+        assert pool.create("img") != first
+    finally:
+        pool.close()
+
+
+def test_leftover_processes_recycle_the_container(backend):
+    backend.reset_exit = 1  # KILL_CMD found a process it couldn't get rid of
+    pool = make_pool(backend, min_size=0)
+    try:
+        first = pool.create("img")
+        pool.destroy(first)
+        assert wait_for(lambda: first not in backend.live)
+    finally:
+        pool.close()
+
+
+def test_hung_reset_times_out_and_recycles_the_container(backend):
+    backend.reset_hangs = True
+    pool = make_pool(backend, min_size=0, reset_timeout_s=0.05)
+    try:
+        first = pool.create("img")
+        pool.destroy(first)
+        assert wait_for(lambda: first not in backend.live)
+        assert backend.reset_timeouts == [0.05]
+
+        # the maintenance thread is still alive: the next reset goes through
+        backend.reset_hangs = False
+        second = pool.create("img")
+        pool.destroy(second)
+        assert wait_for(lambda: pool.stats()["img {}"]["idle"] == 1)
+        assert pool.create("img") == second
+    finally:
+        pool.close()
+
+
+def test_min_size_only_applies_to_warm_keys(backend):
+    pool = make_pool(backend, idle_ttl_s=0.05)
+    try:
+        pool.warm("warm", adjusted())
+        assert wait_for(lambda: any(image == "warm" for image, _ in backend.created))
+
+        cold = pool.create("cold", adjusted(mem_mb=256))
+        pool.destroy(cold)
+        # not refilled, expires after idle_ttl_s, then the key is forgotten
+        assert wait_for(lambda: not any(k.startswith("cold ") for k in pool.stats()))
+        assert sum(1 for image, _ in backend.created if image == "cold") == 1
+        assert any(k.startswith("warm ") for k in pool.stats())
+    finally:
+        pool.close()
+
+
+def test_removed_snapshot_is_no_longer_refilled(backend):
+    backend.commit = lambda container_id, name: ("sha256:snap", 10)
+    backend.remove_snapshot = lambda snapshot_id: None
+    pool = make_pool(backend)
+    try:
+        base = pool.create("img")
+        snapshot_id, _ = pool.commit(base, "prepared")
+        leased = pool.create(snapshot_id)
+        assert wait_for(lambda: pool.stats().get(f"{snapshot_id} {{}}", {}).get("idle") == 1)
+
+        pool.remove_snapshot(snapshot_id)
+        pool.destroy(leased)
+        assert wait_for(lambda: not any(k.startswith(snapshot_id) for k in pool.stats()))
+        assert wait_for(lambda: leased not in backend.live)
+        # snapshot containers are replaced, never reset
+        assert not any(cid == leased and cmd.startswith(KILL_CMD) for cid, cmd in backend.cmds)
+    finally:
+        pool.destroy(base)
+        pool.close()
@@ -0,0 +1,116 @@
+import json
+import sys
+
+import pytest
+
+from aegix.models import AdjustedPolicy, FSRule, Limits, ToolCall, ToolContext
+from aegix.runtime import process_backend
+from aegix.runtime.process_backend import LocalProcessBackend
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="process sandboxes are Linux-only")
+
+
+def adjusted(network_mode):
+    return AdjustedPolicy(limits=Limits(), network_mode=network_mode, env_allowlist=None, fs_rules=FSRule())
+
+
+def interfaces(backend, container_id):
+    lines = backend.exec(container_id, "cat /proc/net/dev").stdout.splitlines()[2:]
+    return sorted(line.split(":")[0].strip() for line in lines)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalProcessBackend(root=tmp_path, use_cgroups=False)
+
+
+@pytest.mark.parametrize("network_mode", ["none", "allowlist"])
+def test_no_network_modes_get_an_empty_namespace(backend, network_mode):
+    if not backend._netns_available():
+        pytest.skip("network namespaces unavailable here")
+    container_id = backend.create("local", adjusted(network_mode))
+    try:
+        assert backend.isolation(container_id)["degraded"] == []
+        assert interfaces(backend, container_id) == ["lo"]
+    finally:
+        backend.destroy(container_id)
+
+
+def test_missing_namespace_support_is_reported(backend, monkeypatch):
+    monkeypatch.setattr(process_backend, "_probe_network_namespace", lambda: False)
+    container_id = backend.create("local", adjusted("allowlist"))
+    try:
+        isolation = backend.isolation(container_id)
+        assert isolation["network_isolated"] is False
+        assert isolation["degraded"] == ["network"]
+        assert backend.exec(container_id, "echo ran").stdout == "ran\n"
+    finally:
+        backend.destroy(container_id)
+
+
+def test_required_isolation_fails_closed(tmp_path, monkeypatch):
+    monkeypatch.setattr(process_backend, "_probe_network_namespace", lambda: False)
+    backend = LocalProcessBackend(root=tmp_path, use_cgroups=False, require_network_isolation=True)
+    with pytest.raises(OSError):
+        backend.create("local", adjusted("none"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_bridge_mode_is_not_isolated(backend):
+    container_id = backend.create("local", adjusted("bridge"))
+    try:
+        assert backend.isolation(container_id) == {
+            "network_mode": "bridge", "network_isolated": False, "cgroup": False, "degraded": [],
+        }
+    finally:
+        backend.destroy(container_id)
+
+
+def test_reset_restores_the_snapshot(backend):
+    container_id = backend.create("local")
+    backend.exec(container_id, "echo prepared > state.txt")
+    snapshot_id, size = backend.commit(container_id, "prepared")
+    backend.destroy(container_id)
+    assert size == len("prepared\n")
+
+    container_id = backend.create(snapshot_id)
+    try:
+        backend.exec(container_id, "rm state.txt; echo junk > junk.txt")
+        assert backend.reset(container_id) is True
+        assert backend.exec(container_id, "ls; cat state.txt").stdout == "state.txt\nprepared\n"
+    finally:
+        backend.destroy(container_id)
+        backend.remove_snapshot(snapshot_id)
+
+
+def test_router_records_degraded_isolation(backend, make_router, audit_events, monkeypatch, tmp_path):
+    monkeypatch.setattr(process_backend, "_probe_network_namespace", lambda: False)
+    router = make_router(backend)
+    result = router.handle(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id="r1"), tmp_path / "r1")
+
+    assert result.ok
+    report = json.loads((tmp_path / "r1" / "report.json").read_text())
+    assert report["isolation"]["degraded"] == ["network"]
+    degraded = [e for e in audit_events(router) if e["type"] == "ISOLATION_DEGRADED"]
+    assert degraded and degraded[0]["data"]["run_id"] == "r1"
+
+
+def test_limits_are_applied_before_the_command_runs(backend):
+    limits = Limits(mem_mb=256)
+    container_id = backend.create("local", AdjustedPolicy(limits=limits, network_mode="bridge", env_allowlist=None, fs_rules=FSRule()))
+    try:
+        assert backend.exec(container_id, "ulimit -v").stdout.strip() == str(256 * 1024)
+    finally:
+        backend.destroy(container_id)
+
+
+def test_failed_setup_raises_instead_of_running(backend, monkeypatch):
+    container_id = backend.create("local")
+    monkeypatch.setattr(backend, "_setup", lambda sandbox: {"cgroup_procs": "/nonexistent/cgroup.procs"})
+    try:
+        with pytest.raises(OSError, match="Sandbox setup failed"):
+            backend.exec(container_id, "touch ran")
+        monkeypatch.undo()
+        assert backend.exec(container_id, "ls").stdout == ""
+    finally:
+        backend.destroy(container_id)
@@ -0,0 +1,29 @@
+import asyncio
+import json
+
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.fake_backend import FakeBackend
+
+
+def test_runs_without_a_run_dir_get_their_own(make_router, tmp_path):
+    router = make_router(FakeBackend(exec_latency_s=0.05, stdout_bytes=16))
+    requests = [(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id=f"r{i}"), None) for i in range(4)]
+    results = asyncio.run(router.handle_many(requests))
+    assert all(result.ok for result in results)
+    for i in range(4):
+        run_dir = tmp_path / "runs" / f"r{i}"
+        assert json.loads((run_dir / "report.json").read_text())["run_id"] == f"r{i}"
+        assert (run_dir / "stdout.txt").read_bytes() == b"o" * 16
+
+
+def test_unsafe_run_ids_stay_under_the_artifacts_root(make_router, tmp_path):
+    router = make_router(FakeBackend())
+    assert router.handle(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id="../escape")).ok
+    assert not (tmp_path / "escape").exists()
+    assert len(list((tmp_path / "runs").glob("run-*/report.json"))) == 1
+
+
+def test_concurrency_limit_defaults_to_the_worker_pool(make_router):
+    assert make_router(FakeBackend(), max_workers=4).max_concurrency == 4
+    router = make_router(FakeBackend(), max_workers=4, max_concurrency=16)
+    assert router._executor._max_workers == 16
@@ -0,0 +1,58 @@
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.sessions import SessionConfig, SessionManager
+
+
+def make_sessions(router_factory, backend, **config):
+    router = router_factory(backend)
+    router.sessions = SessionManager(router.auditor, SessionConfig(**config))
+    return router
+
+
+def call(router, tmp_path, run_id, **metadate):
+    return router.handle(
+        ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id=run_id, metadate=metadate), tmp_path / run_id,
+    )
+
+
+def test_calls_without_a_session_id_get_throwaway_sandboxes(make_router, tmp_path):
+    backend = FakeBackend()
+    router = make_sessions(make_router, backend)
+    for i in range(3):
+        assert call(router, tmp_path, f"r{i}").ok
+    assert router.sessions.stats() == {}
+    assert backend.live == set()
+
+
+def test_calls_sharing_a_session_id_share_one_sandbox(make_router, tmp_path, audit_events):
+    backend = FakeBackend()
+    router = make_sessions(make_router, backend)
+    for i in range(3):
+        assert call(router, tmp_path, f"r{i}", session_id="s1").ok
+    assert router.sessions.stats()["s1"]["calls"] == 3
+    assert len(backend.live) == 1
+
+    assert router.close_session("s1")
+    assert backend.live == set()
+    types = [e["type"] for e in audit_events(router)]
+    assert types.count("SESSION_OPEN") == 1 and types.count("SESSION_CLOSE") == 1
+
+
+def test_call_budget_is_enforced(make_router, tmp_path):
+    router = make_sessions(make_router, FakeBackend(), max_calls=2)
+    assert call(router, tmp_path, "r0", session_id="s1").ok
+    assert call(router, tmp_path, "r1", session_id="s1").ok
+    result = call(router, tmp_path, "r2", session_id="s1")
+    assert not result.ok and result.error.type == "BUDGET_EXCEEDED"
+
+
+def test_reset_replaces_the_sandbox_of_backends_without_reset(make_router, tmp_path):
+    backend = FakeBackend()
+    router = make_sessions(make_router, backend)
+    assert call(router, tmp_path, "r0", session_id="s1").ok
+    before = router.sessions.stats()["s1"]["container_id"]
+
+    assert router.reset_session("s1")
+    after = router.sessions.stats()["s1"]["container_id"]
+    assert after != before and backend.live == {after}
+    assert not router.reset_session("missing")
@@ -0,0 +1,115 @@
+import json
+from types import SimpleNamespace
+
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.docker_backend import DockerBackend
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.runtime.snapshots import SnapshotStore
+
+
+class SnapshottingBackend(FakeBackend):
+    """FakeBackend whose commits are `size` bytes each."""
+
+    def __init__(self, size=100):
+        super().__init__()
+        self.size = size
+        self.snapshots = set()
+        self.registered = []
+
+    def commit(self, container_id, name):
+        snapshot_id = f"snap-{name}-{len(self.snapshots)}"
+        self.snapshots.add(snapshot_id)
+        return snapshot_id, self.size
+
+    def remove_snapshot(self, snapshot_id):
+        self.snapshots.remove(snapshot_id)
+
+    def register_snapshot(self, snapshot_id):
+        self.registered.append(snapshot_id)
+
+
+def names(store):
+    return {snap["name"] for snap in store.list()}
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    backend = SnapshottingBackend()
+    store = SnapshotStore({"docker": backend}, max_bytes=250)
+    store.prepare("a", "docker", "img", "true")
+    store.prepare("b", "docker", "img", "true")
+    store.get("a")
+    store.prepare("c", "docker", "img", "true")
+    assert names(store) == {"a", "c"}
+    assert len(backend.snapshots) == 2
+
+
+def test_last_used_survives_a_restart(tmp_path):
+    index = tmp_path / "snapshots.json"
+    backend = SnapshottingBackend()
+    store = SnapshotStore({"docker": backend}, max_bytes=250, index_path=index)
+    store.prepare("a", "docker", "img", "true")
+    store.prepare("b", "docker", "img", "true")
+    written = index.read_text()
+    used = store.get("a").last_used
+    assert index.read_text() == written  # no write on the call path
+    store.close()
+    assert {e["name"]: e["last_used"] for e in json.loads(index.read_text())}["a"] == used
+
+    reloaded = SnapshotStore({"docker": backend}, max_bytes=250, index_path=index)
+    assert sorted(backend.registered) == sorted(backend.snapshots)
+    reloaded.prepare("c", "docker", "img", "true")
+    assert names(reloaded) == {"a", "c"}
+
+
+def test_calls_start_from_a_snapshot(make_router, tmp_path):
+    backend = SnapshottingBackend()
+    router = make_router(backend)
+    router.snapshots = SnapshotStore(router.backends)
+    router.snapshots.prepare("deps", "docker", "img", "true")
+
+    ok = router.handle(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id="r1", metadate={"snapshot": "deps"}))
+    assert ok.ok
+    report = json.loads((tmp_path / "runs" / "r1" / "report.json").read_text())
+    assert report["snapshot"]["name"] == "deps"
+
+    missing = router.handle(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id="r2", metadate={"snapshot": "nope"}))
+    assert not missing.ok and missing.error.type == "INVALID_TOOL_CALL"
+
+
+class FakeApi:
+    """Docker API over a tagged two-layer base image; each commit adds one 30-byte layer."""
+
+    def __init__(self):
+        self.histories = {"sha256:base": [
+            {"Id": "sha256:base", "Size": 70, "Tags": ["python:3.11-slim"]},
+            {"Id": "<missing>", "Size": 1000, "Tags": None},
+        ]}
+        self.containers = {}
+
+    def inspect_container(self, container_id):
+        return {"Image": self.containers[container_id]}
+
+    def commit(self, container_id, repository, tag):
+        image_id = f"sha256:{tag}"
+        for history in self.histories.values():  # the tag moves off an older snapshot
+            for entry in history:
+                if entry["Tags"] and f"{repository}:{tag}" in entry["Tags"]:
+                    entry["Tags"] = None
+        layer = {"Id": image_id, "Size": 30, "Tags": [f"{repository}:{tag}"]}
+        self.histories[image_id] = [layer] + self.histories[self.containers[container_id]]
+        return {"Id": image_id}
+
+    def history(self, image_id):
+        return self.histories[image_id]
+
+
+def test_docker_snapshot_size_counts_the_layers_it_keeps_alive():
+    api = FakeApi()
+    backend = DockerBackend(client=SimpleNamespace(api=api))
+    api.containers["c1"] = "sha256:base"
+    assert backend.commit("c1", "deps") == ("sha256:deps", 30)
+
+    # re-snapshotting a sandbox started from "deps" keeps the old layer alive too;
+    # the base image's own layers are never counted
+    api.containers["c2"] = "sha256:deps"
+    assert backend.commit("c2", "deps") == ("sha256:deps", 60)
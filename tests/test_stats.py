@@ -0,0 +1,89 @@
+import json
+import time
+
+import pytest
+
+from aegix.logging.audit import AuditLogger
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.fake_backend import FakeBackend
+from aegix.stats import StatsFilter, collect_stats, format_table
+
+
+def write_report(runs, run_id, tool="bash", ok=True, started_at=None, **timings):
+    run_dir = runs / run_id
+    run_dir.mkdir(parents=True)
+    report = {
+        "run_id": run_id,
+        "ok": ok,
+        "started_at": started_at or time.time(),
+        "tool": {"tool_name": tool, "cmd": f"cmd of {run_id}"},
+        "exec": {"exit_code": 0, "stdout_len": 100, "stderr_len": 0},
+        "timings_ms": timings,
+    }
+    if not ok:
+        report["error"] = {"type": "NONZERO_EXIT"}
+    (run_dir / "report.json").write_text(json.dumps(report))
+
+
+def test_total_is_the_wall_span_not_the_phase_sum(tmp_path):
+    # destroy (stop) ran while artifacts were collected: 100 + 50 + 60 > 170
+    write_report(tmp_path, "r1", exec=100.0, destroy=50.0, collect=60.0, total=170.0)
+    stats = collect_stats(tmp_path, workers=0).as_dict()
+    assert stats["slowest"][0]["total_ms"] == 170.0
+    assert stats["phases_ms"]["total"]["count"] == 1
+    assert 150 < stats["phases_ms"]["total"]["mean"] <= 170
+
+    # reports from before total was recorded still get the sum
+    write_report(tmp_path, "old", exec=10.0, destroy=5.0)
+    slowest = collect_stats(tmp_path, workers=0).as_dict()["slowest"]
+    assert [(row["run_id"], row["total_ms"]) for row in slowest] == [("r1", 170.0), ("old", 15.0)]
+
+
+def test_router_reports_feed_stats(make_router, tmp_path):
+    router = make_router(FakeBackend(exec_latency_s=0.01))
+    for i in range(3):
+        router.handle(ToolCall(tool_name="bash", cmd="true"), ToolContext(run_id=f"r{i}"))
+    timings = json.loads((tmp_path / "runs" / "r0" / "report.json").read_text())["timings_ms"]
+    assert timings["total"] >= timings["exec"] >= 10
+
+    stats = collect_stats(tmp_path / "runs", workers=0).as_dict()
+    assert stats["runs"] == stats["ok"] == 3
+    assert stats["phases_ms"]["total"]["count"] == 3
+
+
+def test_filters_errors_and_events(tmp_path):
+    runs = tmp_path / "runs"
+    write_report(runs, "a", tool="bash", exec=1.0, total=2.0)
+    write_report(runs, "b", tool="python", ok=False, exec=1.0, total=2.0)
+    write_report(runs, "old", tool="bash", started_at=time.time() - 7200, exec=1.0, total=2.0)
+    (runs / "broken").mkdir()
+    (runs / "broken" / "report.json").write_text("{not json")
+    logger = AuditLogger(runs / "events.jsonl")
+    logger.log("RUN_END", {"run_id": "a"})
+    logger.close()
+
+    stats = collect_stats(runs, events_path=runs / "events.jsonl", workers=0).as_dict()
+    assert (stats["runs"], stats["ok"], stats["unreadable"]) == (3, 2, 1)
+    assert stats["errors"] == {"NONZERO_EXIT": 1}
+    assert stats["events"] == {"RUN_END": 1}
+    assert stats["output_bytes"]["max"] == 100
+
+    since = StatsFilter(since_ns=time.time_ns() - 3600 * 10**9, tools=("bash",))
+    assert collect_stats(runs, since, workers=0).as_dict()["runs"] == 1
+    assert "slowest:" in format_table(stats)
+
+
+def test_worker_processes_agree_with_in_process(tmp_path):
+    for i in range(20):
+        write_report(tmp_path, f"r{i}", exec=float(i), total=float(i + 1))
+    assert collect_stats(tmp_path, workers=2).as_dict() == collect_stats(tmp_path, workers=0).as_dict()
+
+
+def test_stats_command(tmp_path):
+    testing = pytest.importorskip("typer.testing")
+    from aegix.cli import app
+
+    write_report(tmp_path, "r1", exec=1.0, total=2.0)
+    result = testing.CliRunner().invoke(app, ["stats", "--runs", str(tmp_path), "--workers", "0", "--format", "json"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["runs"] == 1
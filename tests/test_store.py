@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+from aegix.io.store import BlobStore, StoreArtifactWriter, collect_garbage, read_manifest
+
+
+def blob_files(store):
+    return sorted(p.name for p in store.root.glob("*/*/*.gz"))
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def write_run(store, runs, name, files, created_at=None):
+    writer = StoreArtifactWriter(runs / name, store)
+    for rel, content in files.items():
+        writer.write_text(rel, content)
+    if created_at is not None:
+        manifest = read_manifest(runs / name)
+        manifest["created_at"] = created_at
+        (runs / name / "manifest.json").write_text(json.dumps(manifest))
+    return writer
+
+
+def test_identical_artifacts_are_stored_once(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    a = write_run(store, tmp_path / "runs", "a", {"stdout.txt": "same", "stderr.txt": ""})
+    b = write_run(store, tmp_path / "runs", "b", {"stdout.txt": "same", "stderr.txt": "different"})
+    assert len(blob_files(store)) == 3
+    assert read_manifest(a.run_dir)["artifacts"]["stdout.txt"] == read_manifest(b.run_dir)["artifacts"]["stdout.txt"]
+    with b.open_read("stderr.txt") as f:
+        assert f.read() == b"different"
+    assert list(store.root.glob(".tmp-*")) == []
+
+
+def test_gc_keeps_blobs_live_runs_reference(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    runs = tmp_path / "runs"
+    write_run(store, runs, "old", {"stdout.txt": "shared", "stderr.txt": "old only"}, created_at=time.time() - 7200)
+    write_run(store, runs, "new", {"stdout.txt": "shared"})
+    for digest in store.iter_digests():
+        age(store.path(digest), 7200)
+
+    result = collect_garbage(store, runs, retention_s=3600)
+    assert result["runs_removed"] == 1 and result["blobs_removed"] == 1
+    assert not (runs / "old").exists()
+    with StoreArtifactWriter(runs / "new", store).open_read("stdout.txt") as f:
+        assert f.read() == b"shared"
+
+
+def test_gc_spares_young_unreferenced_blobs(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    digest = store.put_bytes(b"being written by a run without a manifest yet")
+    stale = store.put_bytes(b"abandoned")
+    age(store.path(stale), 7200)
+
+    result = collect_garbage(store, tmp_path / "runs", retention_s=3600, grace_s=3600)
+    assert result["blobs_removed"] == 1
+    assert store.exists(digest) and not store.exists(stale)
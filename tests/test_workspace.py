@@ -0,0 +1,117 @@
+import io
+import json
+import sys
+import tarfile
+
+import pytest
+
+from aegix.models import ToolCall, ToolContext
+from aegix.runtime.process_backend import LocalProcessBackend
+from aegix.sessions import SessionManager
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="process sandboxes are Linux-only")
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalProcessBackend(root=tmp_path / "sandboxes", use_cgroups=False)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "host"
+    (root / "src").mkdir(parents=True)
+    (root / "README").write_text("hello\n")
+    (root / "src" / "main.py").write_text("print(1)\n")
+    return root
+
+
+def call(router, tmp_path, run_id, cmd, workspace):
+    result = router.handle(
+        ToolCall(tool_name="bash", cmd=cmd, workspace=str(workspace)),
+        ToolContext(run_id=run_id, metadate={"session_id": "s1"}),
+        tmp_path / run_id,
+    )
+    report = json.loads((tmp_path / run_id / "report.json").read_text())
+    return result, report["workspace_sync"]
+
+
+def test_workspace_round_trips_and_syncs_changes(make_router, backend, workspace, tmp_path):
+    router = make_router(backend)
+    router.sessions = SessionManager(router.auditor)
+
+    result, sync = call(router, tmp_path, "r1", "cat README src/main.py", workspace)
+    assert result.ok and result.exec_result.stdout == "hello\nprint(1)\n"
+    assert sync["mode"] == "full" and sync["files_sent"] == 2
+
+    (workspace / "README").write_text("changed\n")
+    (workspace / "src" / "main.py").unlink()
+    (workspace / "new.txt").write_text("new\n")
+    result, sync = call(router, tmp_path, "r2", "cat README new.txt; ls src", workspace)
+    assert result.ok and result.exec_result.stdout == "changed\nnew\n"
+    assert (sync["mode"], sync["files_sent"], sync["files_deleted"]) == ("incremental", 2, 1)
+
+    result, sync = call(router, tmp_path, "r3", "true", workspace)
+    assert (sync["files_sent"], sync["files_deleted"], sync["bytes_sent"]) == (0, 0, 0)
+
+
+def test_host_symlinks_are_not_followed(make_router, backend, workspace, tmp_path):
+    secret = tmp_path / "secret"
+    secret.write_text("do not copy\n")
+    (workspace / "link").symlink_to(secret)
+    router = make_router(backend)
+    router.sessions = SessionManager(router.auditor)
+
+    result, sync = call(router, tmp_path, "r1", "ls", workspace)
+    assert result.ok and "link" not in result.exec_result.stdout.split()
+    assert sync["files"] == 2
+
+
+def tar_of(*members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for info, data in members:
+            tar.addfile(info, io.BytesIO(data) if data is not None else None)
+    return [buf.getvalue()]
+
+
+def test_archives_cant_write_outside_the_workspace(backend, tmp_path):
+    container_id = backend.create("local")
+    try:
+        escape = tarfile.TarInfo("../escaped")
+        escape.size = 3
+        with pytest.raises(tarfile.TarError):
+            backend.put_archive(container_id, "/workspace", tar_of((escape, b"bad")))
+
+        link = tarfile.TarInfo("out")
+        link.type, link.linkname = tarfile.SYMTYPE, str(tmp_path)
+        with pytest.raises(tarfile.TarError):
+            backend.put_archive(container_id, "/workspace", tar_of((link, None)))
+
+        with pytest.raises(ValueError):
+            backend.put_archive(container_id, "/workspace/../etc", tar_of())
+        assert not list(tmp_path.rglob("escaped"))
+    finally:
+        backend.destroy(container_id)
+
+
+def test_removals_stay_inside_the_workspace(backend, tmp_path):
+    outside = tmp_path / "outside.txt"
+    outside.write_text("keep\n")
+    container_id = backend.create("local")
+    try:
+        backend.exec(container_id, f"ln -s {outside} link")
+        backend.remove_paths(container_id, "/workspace", ["../outside.txt", "link/../outside.txt"])
+        assert outside.read_text() == "keep\n"
+    finally:
+        backend.destroy(container_id)
+
+
+def test_removing_a_symlink_removes_the_link_not_its_target(backend):
+    container_id = backend.create("local")
+    try:
+        backend.exec(container_id, "echo keep > target.txt; ln -s target.txt link; mkdir d; ln -s ../target.txt d/up")
+        backend.remove_paths(container_id, "/workspace", ["link", "d/up"])
+        assert backend.exec(container_id, "ls -A . d; cat target.txt").stdout == ".:\nd\ntarget.txt\n\nd:\nkeep\n"
+    finally:
+        backend.destroy(container_id)